@@ -0,0 +1,657 @@
+"""Reproducible micro-benchmarks for extraction, prompting, persistence and step startup.
+
+Runs entirely offline: the database is a throwaway SQLite file and LLM calls
+go to the deterministic fake server in scripts/fake_groq_server.py.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --output new.json --compare bench.json
+    python benchmarks/run_benchmarks.py --only extraction --repeat 20
+    python benchmarks/run_benchmarks.py --only startup    # cold import + first request per step
+    python benchmarks/run_benchmarks.py --only dashboard  # counter reads vs full scans
+    python benchmarks/run_benchmarks.py --only similarity # MinHash signatures, numpy vs pure Python
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+WORKDIR = tempfile.mkdtemp(prefix="docflow-bench-")
+
+# Configure the environment before any utils module reads it
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}"
+os.environ["CONTENT_STORE_DIR"] = os.path.join(WORKDIR, "content")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["GROQ_API_KEY"] = "fake"
+os.environ["GROQ_REQUESTS_PER_MINUTE"] = "1000000"
+os.environ["GROQ_TOKENS_PER_MINUTE"] = "1000000000"
+
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+from fake_groq_server import start_server, CLASSIFICATION_RESPONSE, RISK_RESPONSE, SUMMARY_RESPONSE
+
+fake_server = start_server()
+os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{fake_server.server_address[1]}"
+
+sys.path.insert(0, os.path.join(ROOT, 'src', 'steps'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from sqlalchemy import event, insert, text as sql_text, update
+
+from utils.database import Base, get_engine, run_in_session, Document, DocumentBlob, DocumentType, DocumentStatus
+from utils import analysis
+from utils import dashboard
+from utils import document_repository
+from utils import file_processor
+from utils import similarity
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+PARAGRAPH = (
+    "The applicant requests a personal loan of $50,000 for home renovation. "
+    "Annual income is $85,000 with 6 years at the current employer. "
+)
+
+
+# ---------------------------------------------------------------------------
+# Harness
+# ---------------------------------------------------------------------------
+def measure(fn, repeat):
+    """Run fn `repeat` times (after one warm-up) and summarise wall times in ms"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarise(samples)
+
+
+def summarise(samples):
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "min_ms": round(samples[0], 4),
+    }
+
+
+# One long-lived loop so the per-loop Groq client and its connection pool
+# are reused across runs, as they are inside the Motia worker
+LOOP = asyncio.new_event_loop()
+
+
+def run_async(coro_fn):
+    return lambda: LOOP.run_until_complete(coro_fn())
+
+
+def generated_text(chars):
+    return (PARAGRAPH * (chars // len(PARAGRAPH) + 1))[:chars]
+
+
+# ---------------------------------------------------------------------------
+# Generated documents
+# ---------------------------------------------------------------------------
+def varied_text(chars, seed=7):
+    """Words drawn from a large random vocabulary, so nearly every shingle is distinct"""
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(2, 10))) for _ in range(5000)]
+    words = []
+    while sum(map(len, words)) + len(words) < chars:
+        words.append(rng.choice(vocabulary))
+    return " ".join(words)[:chars]
+
+
+def write_txt(path, chars):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(generated_text(chars))
+
+
+def write_docx(path, chars):
+    from docx import Document as DocxDocument
+    doc = DocxDocument()
+    text = generated_text(chars)
+    for start in range(0, len(text), 500):
+        doc.add_paragraph(text[start:start + 500])
+    doc.save(path)
+
+
+def write_pdf(path, chars, chars_per_page=3000):
+    """Minimal multi-page PDF with a Helvetica text layer (no external deps)"""
+    text = generated_text(chars)
+    pages = [text[i:i + chars_per_page] for i in range(0, len(text), chars_per_page)] or [""]
+
+    objects = []
+    page_ids = []
+    font_id = 3
+    next_id = 4
+    for page_text in pages:
+        lines = [page_text[i:i + 90] for i in range(0, len(page_text), 90)]
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines]
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        objects.append((content_id, f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"))
+        objects.append((page_id, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                                 f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"))
+        page_ids.append(page_id)
+
+    objects.append((1, "<< /Type /Catalog /Pages 2 0 R >>"))
+    objects.append((2, f"<< /Type /Pages /Kids [{' '.join(f'{p} 0 R' for p in page_ids)}] /Count {len(page_ids)} >>"))
+    objects.append((font_id, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"))
+    objects.sort()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id, body in objects:
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for obj_id in range(1, len(objects) + 1):
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+# ---------------------------------------------------------------------------
+# Suites
+# ---------------------------------------------------------------------------
+def bench_extraction(repeat):
+    results = []
+    for chars in SIZES:
+        for ext, writer, extract in (
+            ("txt", write_txt, file_processor.extract_text_from_txt),
+            ("docx", write_docx, file_processor.extract_text_from_docx),
+            ("pdf", write_pdf, file_processor.extract_text_from_pdf),
+        ):
+            path = os.path.join(WORKDIR, f"doc_{chars}.{ext}")
+            writer(path, chars)
+            # The 1M-char PDF is ~330 pages; fewer runs keep the suite quick
+            runs = repeat if chars < 1_000_000 else max(1, repeat // 5)
+            results.append({
+                "name": f"extract_{ext}",
+                "params": {"chars": chars, "file_bytes": os.path.getsize(path)},
+                **measure(lambda: extract(path), runs),
+            })
+            if ext == "pdf":
+                results.append({
+                    "name": "extract_pdf_budget_3000",
+                    "params": {"chars": chars},
+                    **measure(lambda: file_processor.extract_text_from_pdf(path, char_budget=3000), runs),
+                })
+    return results
+
+
+def bench_prompts(repeat):
+    content = generated_text(100_000)
+    classification = dict(CLASSIFICATION_RESPONSE)
+    summary = SUMMARY_RESPONSE
+    repeat = repeat * 50  # these are microsecond-scale
+
+    wrapped = f"Here is the result:\n```json\n{json.dumps(RISK_RESPONSE)}\n```"
+    return [
+        {"name": "build_classification_prompt", "params": {},
+         **measure(lambda: analysis.build_classification_prompt("loan_application", content), repeat)},
+        {"name": "build_summary_prompt", "params": {},
+         **measure(lambda: analysis.build_summary_prompt("loan_application", content, classification), repeat)},
+        {"name": "build_risk_prompt", "params": {},
+         **measure(lambda: analysis.build_risk_prompt("loan_application", summary, classification), repeat)},
+        {"name": "build_fused_prompt", "params": {},
+         **measure(lambda: analysis.build_fused_prompt("loan_application", content), repeat)},
+        {"name": "parse_json_response", "params": {"wrapped": False},
+         **measure(lambda: analysis.parse_json_response(json.dumps(CLASSIFICATION_RESPONSE)), repeat)},
+        {"name": "parse_json_response", "params": {"wrapped": True},
+         **measure(lambda: analysis.parse_json_response(wrapped), repeat)},
+    ]
+
+
+def bench_persistence(repeat):
+    Base.metadata.drop_all(bind=get_engine())
+    Base.metadata.create_all(bind=get_engine())
+
+    text_size = 100_000
+    seed_counter = {"n": 0}
+
+    def seed():
+        seed_counter["n"] += 1
+        document_id = f"bench_{seed_counter['n']}"
+
+        def _insert(db):
+            db.add(Document(
+                document_id=document_id,
+                filename="bench.txt",
+                document_type=DocumentType.LOAN_APPLICATION,
+                status=DocumentStatus.UPLOADED,
+                extracted_text=generated_text(text_size),
+            ))
+        LOOP.run_until_complete(run_in_session(_insert))
+        return document_id
+
+    document_id = seed()
+    classification_json = json.dumps(CLASSIFICATION_RESPONSE)
+
+    # The same read-modify-write each step performs on its Document row
+    def classify_rmw(db):
+        document = db.query(Document).filter(Document.document_id == document_id).first()
+        document.classification = classification_json
+        document.status = DocumentStatus.PROCESSING
+
+    def summarize_rmw(db):
+        document = db.query(Document).filter(Document.document_id == document_id).first()
+        document.ai_summary = SUMMARY_RESPONSE
+
+    def risk_rmw(db):
+        document = db.query(Document).filter(Document.document_id == document_id).first()
+        analysis.apply_risk_decision(document, RISK_RESPONSE)
+
+    # The repository's targeted UPDATE ... RETURNING equivalents
+    def classify_update(db):
+        document_repository.save_classification(db, document_id, CLASSIFICATION_RESPONSE)
+
+    def summarize_update(db):
+        document_repository.save_summary(db, document_id, SUMMARY_RESPONSE)
+
+    def risk_update(db):
+        document_repository.save_analysis(db, document_id, RISK_RESPONSE)
+
+    results = [
+        {"name": "db_insert_document", "params": {"text_chars": text_size}, **measure(seed, repeat)},
+        {"name": "db_rmw_classify", "params": {}, **measure(run_async(lambda: run_in_session(classify_rmw)), repeat)},
+        {"name": "db_rmw_summarize", "params": {}, **measure(run_async(lambda: run_in_session(summarize_rmw)), repeat)},
+        {"name": "db_rmw_risk_score", "params": {}, **measure(run_async(lambda: run_in_session(risk_rmw)), repeat)},
+        {"name": "db_update_classify", "params": {},
+         **measure(run_async(lambda: run_in_session(classify_update)), repeat)},
+        {"name": "db_update_summarize", "params": {},
+         **measure(run_async(lambda: run_in_session(summarize_update)), repeat)},
+        {"name": "db_update_risk_score", "params": {},
+         **measure(run_async(lambda: run_in_session(risk_update)), repeat)},
+    ]
+    return results + bench_document_writes(repeat, text_size)
+
+
+def count_traffic(fn):
+    """Run fn() and count what it costs the database.
+
+    statements and transactions are round trips; blob_bytes_loaded is the
+    compressed document_blobs data materialised by the ORM (it is zero for
+    Core statements, which never read a blob back).
+    """
+    traffic = {"statements": 0, "transactions": 0, "blob_bytes_loaded": 0}
+
+    def on_execute(*args):
+        traffic["statements"] += 1
+
+    def on_commit(*args):
+        traffic["transactions"] += 1
+
+    def on_load(target, context):
+        traffic["blob_bytes_loaded"] += len(target.data or b"")
+
+    engine = get_engine()
+    event.listen(engine, "before_cursor_execute", on_execute)
+    event.listen(engine, "commit", on_commit)
+    event.listen(DocumentBlob, "load", on_load)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+        event.remove(engine, "commit", on_commit)
+        event.remove(DocumentBlob, "load", on_load)
+    return traffic
+
+
+def bench_document_writes(repeat, text_size):
+    """Every write one document's pipeline makes, per persistence strategy"""
+    text = generated_text(text_size)
+    counter = {"n": 0}
+
+    def insert(db, document_id):
+        document_repository.insert_document(db, {
+            "document_id": document_id,
+            "filename": "bench.txt",
+            "document_type": DocumentType.LOAN_APPLICATION,
+            "status": DocumentStatus.UPLOADED,
+        }, text)
+
+    def rmw(db, document_id, apply):
+        apply(db.query(Document).filter(Document.document_id == document_id).first())
+
+    def set_classification(document):
+        document.classification = json.dumps(CLASSIFICATION_RESPONSE)
+        document.status = DocumentStatus.PROCESSING
+
+    def set_summary(document):
+        document.ai_summary = SUMMARY_RESPONSE
+
+    def set_risk(document):
+        analysis.apply_risk_decision(document, RISK_RESPONSE)
+
+    strategies = {
+        "read_modify_write": [
+            (rmw, set_classification), (rmw, set_summary), (rmw, set_risk),
+        ],
+        "immediate": [
+            (document_repository.save_classification, CLASSIFICATION_RESPONSE),
+            (document_repository.save_summary, SUMMARY_RESPONSE),
+            (document_repository.save_analysis, RISK_RESPONSE),
+        ],
+        "write_behind": [
+            (document_repository.save_analysis, RISK_RESPONSE, CLASSIFICATION_RESPONSE, SUMMARY_RESPONSE),
+        ],
+    }
+
+    def pipeline(writes):
+        def run():
+            counter["n"] += 1
+            document_id = f"bench_writes_{counter['n']}"
+            LOOP.run_until_complete(run_in_session(insert, document_id))
+            for fn, *args in writes:
+                LOOP.run_until_complete(run_in_session(fn, document_id, *args))
+        return run
+
+    results = []
+    for strategy, writes in strategies.items():
+        run = pipeline(writes)
+        results.append({
+            "name": "db_document_writes",
+            "params": {"strategy": strategy, "text_chars": text_size},
+            **measure(run, repeat),
+            "traffic": count_traffic(run),
+        })
+    return results
+
+
+class _QuietLogger:
+    def info(self, message): pass
+    def warn(self, message): pass
+    def warning(self, message): pass
+    def error(self, message): raise RuntimeError(message)
+
+
+class _Context:
+    """Minimal Motia context: emitted events are captured, not dispatched"""
+    logger = _QuietLogger()
+
+    def __init__(self):
+        self.emitted = []
+
+    async def emit(self, event):
+        self.emitted.append(event)
+
+
+def bench_steps(repeat):
+    """Full step handlers (prompt + fake LLM round trip + DB write)"""
+    import classify_document_step
+    import summarize_document_step
+    import risk_score_document_step
+    from utils.content_store import put_content
+
+    Base.metadata.drop_all(bind=get_engine())
+    Base.metadata.create_all(bind=get_engine())
+    text = generated_text(20_000)
+    reference = put_content(text)
+
+    def _insert(db):
+        db.add(Document(document_id="bench_steps", filename="bench.txt",
+                        document_type=DocumentType.LOAN_APPLICATION,
+                        status=DocumentStatus.UPLOADED, extracted_text=text))
+    LOOP.run_until_complete(run_in_session(_insert))
+
+    base_event = {"document_id": "bench_steps", "document_type": "loan_application", **reference}
+    classified = {**base_event, "classification": dict(CLASSIFICATION_RESPONSE)}
+    summarized = {**classified, "summary": SUMMARY_RESPONSE}
+
+    return [
+        {"name": "step_classify", "params": {"llm": "fake"},
+         **measure(run_async(lambda: classify_document_step.handler(base_event, _Context())), repeat)},
+        {"name": "step_summarize", "params": {"llm": "fake"},
+         **measure(run_async(lambda: summarize_document_step.handler(classified, _Context())), repeat)},
+        {"name": "step_risk_score", "params": {"llm": "fake"},
+         **measure(run_async(lambda: risk_score_document_step.handler(summarized, _Context())), repeat)},
+    ]
+
+
+DASHBOARD_SIZES = [1_000, 10_000, 100_000]
+
+# What the dashboard had to run before document_stats existed
+DASHBOARD_SCAN = """
+    SELECT document_type, status, count(*), avg(risk_score),
+           avg((julianday(processed_at) - julianday(uploaded_at)) * 86400),
+           sum(CASE WHEN risk_score IS NULL THEN 1 ELSE 0 END)
+    FROM documents GROUP BY document_type, status
+"""
+
+
+def bench_dashboard(repeat):
+    """Dashboard from trigger-maintained counters vs a scan of documents, and what the triggers add per write"""
+    documents = Document.__table__
+    statuses = list(DocumentStatus)
+    types = list(DocumentType)
+    results = []
+
+    for size in DASHBOARD_SIZES:
+        Base.metadata.drop_all(bind=get_engine())
+        Base.metadata.create_all(bind=get_engine())
+        now = datetime.utcnow()
+        with get_engine().begin() as conn:
+            conn.execute(insert(documents), [{
+                "document_id": f"bench_{n}",
+                "filename": "bench.txt",
+                "document_type": types[n % len(types)],
+                "status": statuses[n % len(statuses)],
+                "risk_score": float(n % 101),
+                "uploaded_at": now - timedelta(seconds=n),
+                "processed_at": now - timedelta(seconds=n) + timedelta(seconds=n % 30),
+            } for n in range(size)])
+
+        def read_counters(db):
+            return dashboard.summary(db)
+
+        def scan(db):
+            return db.execute(sql_text(DASHBOARD_SCAN)).fetchall()
+
+        results.append({"name": "dashboard_counters", "params": {"documents": size},
+                        **measure(run_async(lambda: run_in_session(read_counters)), repeat)})
+        results.append({"name": "dashboard_scan", "params": {"documents": size},
+                        **measure(run_async(lambda: run_in_session(scan)), repeat)})
+
+    # A status change, as ReviewDocument makes it, with and without the counter triggers
+    flip = {"n": 0}
+
+    def change_status(db):
+        flip["n"] += 1
+        db.execute(update(documents).where(documents.c.document_id == "bench_1")
+                   .values(status=statuses[flip["n"] % len(statuses)]))
+
+    results.append({"name": "db_status_update", "params": {"triggers": True},
+                    **measure(run_async(lambda: run_in_session(change_status)), repeat)})
+    with get_engine().begin() as conn:
+        for trigger in ("document_stats_insert", "document_stats_update", "document_stats_delete"):
+            conn.execute(sql_text(f"DROP TRIGGER {trigger}"))
+    results.append({"name": "db_status_update", "params": {"triggers": False},
+                    **measure(run_async(lambda: run_in_session(change_status)), repeat)})
+    return results
+
+
+def bench_similarity(repeat):
+    """MinHash signature per document: repeated template text vs non-repetitive text"""
+    results = []
+    for kind, text in (("template", generated_text(similarity.SIMILARITY_MAX_CHARS)),
+                       ("varied", varied_text(similarity.SIMILARITY_MAX_CHARS))):
+        hashes = similarity.shingles(text)
+        params = {"text": kind, "chars": len(text), "shingles": len(hashes)}
+        results.append({"name": "shingles", "params": params,
+                        **measure(lambda: similarity.shingles(text), repeat)})
+        if similarity.np is not None:
+            results.append({"name": "minhash", "params": {**params, "numpy": True},
+                            **measure(lambda: similarity._minhash_numpy(hashes), repeat)})
+        results.append({"name": "minhash", "params": {**params, "numpy": False},
+                        **measure(lambda: similarity._minhash_python(hashes), repeat)})
+    return results
+
+
+# Step module -> first request it handles in the startup suite
+STARTUP_STEPS = {
+    "list_documents_step": {"queryParams": {"limit": "20"}},
+    "metrics_step": {"queryParams": {"format": "json"}},
+    "save_document_step": {"document_type": "loan_application", "filename": "bench.txt"},
+    "classify_document_step": {"document_type": "loan_application"},
+    "summarize_document_step": {"document_type": "loan_application",
+                                "classification": CLASSIFICATION_RESPONSE},
+    "risk_score_document_step": {"document_type": "loan_application",
+                                 "classification": CLASSIFICATION_RESPONSE, "summary": SUMMARY_RESPONSE},
+}
+
+# Loads a step file the way the Motia Python runner does, then handles one request
+STARTUP_PROBE = """
+import asyncio, importlib.util, json, sys, time
+started = time.perf_counter()
+spec = importlib.util.spec_from_file_location("step", sys.argv[1])
+step = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(step)
+imported = time.perf_counter()
+
+class Logger:
+    def info(self, message): pass
+    warn = warning = info
+    def error(self, message): raise RuntimeError(message)
+
+class Context:
+    logger = Logger()
+    async def emit(self, event): pass
+
+asyncio.run(step.handler(json.loads(sys.argv[2]), Context()))
+print(json.dumps({"import_ms": (imported - started) * 1000,
+                  "first_request_ms": (time.perf_counter() - imported) * 1000}))
+"""
+
+
+def bench_startup(repeat):
+    """Fresh interpreter per run: step module import time and first-request latency"""
+    from utils.content_store import put_content
+
+    Base.metadata.drop_all(bind=get_engine())
+    Base.metadata.create_all(bind=get_engine())
+    text = generated_text(2_000)
+    reference = put_content(text)
+
+    def _insert(db):
+        db.add(Document(document_id="bench_startup", filename="bench.txt",
+                        document_type=DocumentType.LOAN_APPLICATION,
+                        status=DocumentStatus.UPLOADED, extracted_text=text))
+    LOOP.run_until_complete(run_in_session(_insert))
+
+    results = []
+    for module, payload in STARTUP_STEPS.items():
+        path = os.path.join(ROOT, "src", "steps", f"{module}.py")
+        samples = {"process_ms": [], "import_ms": [], "first_request_ms": []}
+        for run in range(repeat):
+            if "queryParams" not in payload:
+                # SaveDocument inserts a fresh row each run; the AI steps update bench_startup
+                document_id = f"bench_startup_{run}" if module == "save_document_step" else "bench_startup"
+                payload = {**payload, "document_id": document_id, **reference}
+            started = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, "-c", STARTUP_PROBE, path, json.dumps(payload)],
+                capture_output=True, text=True, check=True, cwd=WORKDIR,
+            ).stdout
+            samples["process_ms"].append((time.perf_counter() - started) * 1000)
+            timings = json.loads(output.strip().splitlines()[-1])
+            samples["import_ms"].append(timings["import_ms"])
+            samples["first_request_ms"].append(timings["first_request_ms"])
+
+        for name, values in samples.items():
+            results.append({"name": f"startup_{name[:-3]}", "params": {"step": module}, **summarise(values)})
+    return results
+
+
+SUITES = {
+    "extraction": bench_extraction,
+    "prompts": bench_prompts,
+    "persistence": bench_persistence,
+    "steps": bench_steps,
+    "startup": bench_startup,
+    "dashboard": bench_dashboard,
+    "similarity": bench_similarity,
+}
+
+
+def result_key(result):
+    return f"{result['name']}{json.dumps(result['params'], sort_keys=True)}"
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+
+    print(f"\n{'benchmark':<60} {'baseline':>12} {'current':>12} {'change':>9}")
+    for result in current:
+        key = result_key(result)
+        old = baseline.get(key)
+        if old is None:
+            print(f"{key:<60} {'-':>12} {result['median_ms']:>10.3f}ms {'new':>9}")
+            continue
+        change = (result["median_ms"] - old["median_ms"]) / old["median_ms"] * 100 if old["median_ms"] else 0.0
+        flag = " ⚠️" if change > 10 else ""
+        print(f"{key:<60} {old['median_ms']:>10.3f}ms {result['median_ms']:>10.3f}ms {change:>+8.1f}%{flag}")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run DocFlow micro-benchmarks")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write JSON results")
+    parser.add_argument("--compare", help="Baseline JSON to compare medians against")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per benchmark")
+    parser.add_argument("--only", choices=sorted(SUITES), action="append", help="Run only these suites")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.only or SUITES:
+        print(f"⏱️  Running {name} benchmarks...")
+        for result in SUITES[name](args.repeat):
+            result["suite"] = name
+            results.append(result)
+            traffic = f"  {json.dumps(result['traffic'])}" if "traffic" in result else ""
+            print(f"   {result['name']:<32} {json.dumps(result['params']):<40} median {result['median_ms']:.3f} ms{traffic}")
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📊 Results saved to: {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+    fake_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Search latency at scale: SearchDocuments queries over up to 1M documents (PostgreSQL).
+
+Fills the database with synthetic documents (generated server-side with
+generate_series, search columns and blobs included), then times search()
+end to end, snippets included, and reports the plan each query used.
+Point it at a throwaway database; rows are only added, never removed:
+
+    python benchmarks/search_benchmark.py --database-url postgresql://localhost/docflow_bench
+    python benchmarks/search_benchmark.py --database-url ... --documents 100000 --repeat 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark document search")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="PostgreSQL database to fill")
+    parser.add_argument("--documents", type=int, default=1_000_000, help="Documents the table should hold")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="Documents generated per statement")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per query")
+    parser.add_argument("--output", default="search_bench.json", help="Where to write JSON results")
+    return parser.parse_args()
+
+
+ARGS = parse_args()
+# Configure the environment before any utils module reads it
+if ARGS.database_url:
+    os.environ["DATABASE_URL"] = ARGS.database_url
+
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from sqlalchemy import event, text
+
+from utils import search
+from utils.database import Base, SessionLocal, get_engine
+
+# Every 10th document names Acme Corp; amounts span $1k-$2M. The text and
+# summary go to document_blobs as well (uncompressed), where snippets read them
+GENERATE = """
+WITH docs AS (
+    SELECT n, type, status, risk, uploaded_at, company, person, amount,
+           initcap(replace(type::text, '_', ' ')) || ' submitted by ' || person || ' of ' || company
+               || ' requesting $' || to_char(amount, 'FM999,999,999') || '. ' || filler AS body,
+           initcap(replace(type::text, '_', ' ')) || ' from ' || company || ' for $'
+               || to_char(amount, 'FM999,999,999') || '. ' || verdict AS summary
+    FROM (
+        SELECT n,
+               (ARRAY['Acme Corp','Globex','Initech','Umbrella Holdings','Stark Industries','Wayne Enterprises',
+                      'Hooli','Vandelay Industries','Soylent Corp','Tyrell Corporation'])[1 + n % 10]
+                   || CASE WHEN n % 10 = 0 THEN '' ELSE ' ' || (n % 97) END AS company,
+               (ARRAY['John Smith','Jane Doe','Maria Garcia','Wei Chen','Amit Patel','Olga Ivanova'])[1 + n % 6]
+                   AS person,
+               round((1000 + (n * 7919) % 2000000)::numeric, 0) AS amount,
+               (ARRAY['LOAN_APPLICATION','LEGAL_CONTRACT','GRANT_APPLICATION','INSURANCE_CLAIM'])[1 + n % 4]::documenttype
+                   AS type,
+               (ARRAY['APPROVED','PENDING_REVIEW','REJECTED','APPROVED'])[1 + (n / 4) % 4]::documentstatus AS status,
+               (n * 37) % 100 AS risk,
+               now() - make_interval(secs => n) AS uploaded_at,
+               (ARRAY['Collateral is a commercial property appraised last quarter.',
+                      'Income verified from tax returns; debt to income ratio is moderate.',
+                      'The agreement includes an indemnification clause and a two year term.',
+                      'Claim relates to water damage reported after the storm in March.',
+                      'Grant funds a community health research program with matching funds.',
+                      'Credit history shows two late payments and one open collection account.'])[1 + (n / 7) % 6]
+                   || ' Reference number ' || n || '.' AS filler,
+               (ARRAY['Low risk, complete documentation.', 'Missing signatures, needs review.',
+                      'High exposure relative to stated income.', 'Standard terms, no red flags.'])[1 + (n / 3) % 4]
+                   AS verdict
+        FROM generate_series(CAST(:start AS bigint), :stop) AS n
+    ) AS params
+), inserted AS (
+    INSERT INTO documents (document_id, filename, document_type, status, file_path, risk_score,
+                           uploaded_at, pipeline_stage, search_vector, key_entities, max_amount)
+    SELECT 'bench_' || n, 'bench_' || n || '.pdf', type, status, '', risk, uploaded_at, 'scored',
+           setweight(to_tsvector(:config, body), 'B') || setweight(to_tsvector(:config, summary), 'A'),
+           jsonb_build_array(lower(company), lower(person), '$' || to_char(amount, 'FM999,999,999')),
+           amount
+    FROM docs
+)
+INSERT INTO document_blobs (document_id, field, codec, raw_size, stored_size, data)
+SELECT 'bench_' || n, field, 'none', octet_length(value), octet_length(value), convert_to(value, 'UTF8')
+FROM docs, LATERAL (VALUES ('extracted_text', body), ('ai_summary', summary)) AS blobs (field, value)
+"""
+
+QUERIES = [
+    # ~1 in 1,000 documents: one company's filings
+    ("full_text_rare", {"q": '"globex 13"'}),
+    # 10% and 25% of documents match: every match is ranked
+    ("full_text_broad", {"q": "acme"}),
+    ("full_text_common", {"q": "loan application"}),
+    ("full_text_phrase", {"q": '"water damage" -collateral'}),
+    ("entity", {"entities": ["acme corp"]}),
+    ("min_amount", {"min_amount": 1_990_000}),
+    ("type_and_text", {"q": "indemnification", "document_type": "legal_contract"}),
+    # The reviewers' case: loans mentioning Acme Corp over $500k
+    ("loans_acme_over_500k", {"q": "loan", "entities": ["acme corp"], "min_amount": 500_000}),
+    ("second_page", {"q": '"globex 13"', "offset": 20}),
+]
+
+
+def fill(target, batch_size):
+    """Generate synthetic documents until the table holds `target` rows"""
+    with get_engine().begin() as conn:
+        existing = conn.execute(text("SELECT count(*) FROM documents WHERE document_id LIKE 'bench\\_%'")).scalar()
+    started = time.perf_counter()
+    for start in range(existing + 1, target + 1, batch_size):
+        stop = min(start + batch_size - 1, target)
+        with get_engine().begin() as conn:
+            conn.execute(text(GENERATE), {"config": search.SEARCH_CONFIG, "start": start, "stop": stop})
+        print(f"   generated {stop:,} / {target:,} documents ({time.perf_counter() - started:.0f}s)")
+    if existing < target:
+        with get_engine().begin() as conn:
+            conn.execute(text("ANALYZE documents"))
+            conn.execute(text("ANALYZE document_blobs"))
+
+
+def plan(db, params):
+    """Index names in the plan of the documents query search() runs for these params"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(get_engine(), "before_cursor_execute", capture)
+    try:
+        search.search(db, limit=20, **params)
+    finally:
+        event.remove(get_engine(), "before_cursor_execute", capture)
+    # The first statement is the ranked documents query; the rest read snippet blobs
+    statement, parameters = statements[0]
+    explained = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    indexes = set()
+
+    def walk(node):
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(explained[0]["Plan"])
+    return sorted(indexes) or ["seq scan"]
+
+
+def bench_query(params, repeat):
+    db = SessionLocal()
+    try:
+        search.search(db, limit=20, **params)
+        samples, hits = [], 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            hits = len(search.search(db, limit=20, **params)["hits"])
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        return {
+            "median_ms": round(statistics.median(samples), 3),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+            "min_ms": round(samples[0], 3),
+            "hits": hits,
+            "indexes": plan(db, params),
+        }
+    finally:
+        db.close()
+
+
+def main():
+    db = SessionLocal()
+    try:
+        if not search.supported(db):
+            raise SystemExit("❌ The search benchmark needs PostgreSQL (--database-url)")
+    finally:
+        db.close()
+
+    Base.metadata.create_all(get_engine())
+    print(f"⏱️  Filling documents up to {ARGS.documents:,} rows...")
+    fill(ARGS.documents, ARGS.batch_size)
+
+    results = []
+    for name, params in QUERIES:
+        result = {"name": name, "params": params, "documents": ARGS.documents, **bench_query(params, ARGS.repeat)}
+        results.append(result)
+        print(f"   {name:<24} median {result['median_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+              f"{result['hits']:>2} hits  {', '.join(result['indexes'])}")
+
+    with open(ARGS.output, "w") as f:
+        json.dump({"documents": ARGS.documents, "repeat": ARGS.repeat, "results": results}, f, indent=2)
+    print(f"📊 Results saved to: {ARGS.output}")
+
+
+if __name__ == "__main__":
+    main()
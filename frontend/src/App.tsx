@@ -5,7 +5,7 @@ import { UploadForm } from './components/UploadForm';
 import { DocumentList } from './components/DocumentList';
 import { DocumentDetail } from './components/DocumentDetail';
 import { ReviewInterface } from './components/ReviewInterface';
-import { getPendingReviews } from './lib/api';
+import { getDashboard } from './lib/api';
 
 const queryClient = new QueryClient({
   defaultOptions: {
@@ -20,9 +20,10 @@ function AppContent() {
   const [activeTab, setActiveTab] = useState('upload');
   const [selectedDocId, setSelectedDocId] = useState<string | null>(null);
 
-  const { data: pendingData } = useQuery({
-    queryKey: ['pending-reviews'],
-    queryFn: getPendingReviews,
+  // Counters only: the badge doesn't need the pending documents themselves
+  const { data: dashboard } = useQuery({
+    queryKey: ['dashboard'],
+    queryFn: () => getDashboard(),
     refetchInterval: 10000,
   });
 
@@ -44,7 +45,7 @@ function AppContent() {
       <Navbar
         activeTab={activeTab}
         onTabChange={setActiveTab}
-        pendingCount={pendingData?.total || 0}
+        pendingCount={dashboard?.by_status.pending_review || 0}
       />
 
       <main className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-8">
@@ -39,6 +39,7 @@ export const ReviewInterface: React.FC = () => {
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['pending-reviews'] });
       queryClient.invalidateQueries({ queryKey: ['documents'] });
+      queryClient.invalidateQueries({ queryKey: ['dashboard'] });
       setSelectedDocId(null);
       setReviewerName('');
       setComments('');
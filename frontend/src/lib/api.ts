@@ -24,6 +24,17 @@ export interface PendingReview {
   total: number;
 }
 
+export interface DashboardStats {
+  total: number;
+  by_status: Record<string, number>;
+  by_document_type: Record<string, number>;
+  risk_histogram: { min: number; max: number; count: number }[];
+  unscored: number;
+  average_risk_score: number | null;
+  processed: number;
+  average_processing_seconds: number | null;
+}
+
 // API Functions
 export const uploadDocument = async (data: {
   filename: string;
@@ -59,6 +70,12 @@ export const getPendingReviews = async (): Promise<PendingReview> => {
   return response.data;
 };
 
+export const getDashboard = async (documentType?: string): Promise<DashboardStats> => {
+  const params = documentType ? { document_type: documentType } : {};
+  const response = await api.get('/dashboard', { params });
+  return response.data;
+};
+
 export const reviewDocument = async (
   documentId: string,
   data: {
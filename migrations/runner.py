@@ -0,0 +1,205 @@
+"""Ordered, versioned migration runner.
+
+Migrations live in migrations/versions/NNNN_description.py and define
+`upgrade(conn)` and `downgrade(conn)`. Applied versions are tracked in the
+`schema_migrations` table; each migration runs in its own transaction.
+
+Usage (from the project root):
+    python -m migrations.runner status
+    python -m migrations.runner upgrade [target_version]
+    python -m migrations.runner downgrade [target_version]   # default: undo the latest
+    python -m migrations.runner explain                      # check hot queries use their indexes
+"""
+
+import importlib.util
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.database import engine
+
+VERSIONS_DIR = os.path.join(os.path.dirname(__file__), "versions")
+VERSION_PATTERN = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+
+def load_migrations():
+    """Return [(version, name, module)] sorted by version"""
+    migrations = []
+    for filename in sorted(os.listdir(VERSIONS_DIR)):
+        match = VERSION_PATTERN.match(filename)
+        if not match:
+            continue
+        version, name = match.groups()
+        spec = importlib.util.spec_from_file_location(f"migration_{version}", os.path.join(VERSIONS_DIR, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        migrations.append((version, name, module))
+    return migrations
+
+
+def ensure_version_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(16) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP NOT NULL
+        )
+    """))
+
+
+def applied_versions():
+    with engine.begin() as conn:
+        ensure_version_table(conn)
+        rows = conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))
+        return {row.version for row in rows}
+
+
+def upgrade(target=None):
+    """Apply pending migrations up to and including `target`"""
+    applied = applied_versions()
+    pending = [m for m in load_migrations() if m[0] not in applied and (target is None or m[0] <= target)]
+
+    if not pending:
+        print("✅ Database is up to date")
+        return
+
+    for version, name, module in pending:
+        with engine.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": version, "name": name, "applied_at": datetime.utcnow()}
+            )
+        print(f"✅ Applied {version}_{name}")
+
+
+def downgrade(target=None):
+    """Revert applied migrations newer than `target` (default: only the latest)"""
+    applied = applied_versions()
+    migrations = [m for m in load_migrations() if m[0] in applied]
+
+    if not migrations:
+        print("✅ Nothing to roll back")
+        return
+
+    if target is None:
+        to_revert = migrations[-1:]
+    else:
+        to_revert = [m for m in migrations if m[0] > target]
+
+    for version, name, module in reversed(to_revert):
+        with engine.begin() as conn:
+            module.downgrade(conn)
+            conn.execute(text("DELETE FROM schema_migrations WHERE version = :version"), {"version": version})
+        print(f"✅ Reverted {version}_{name}")
+
+
+def status():
+    applied = applied_versions()
+    for version, name, _ in load_migrations():
+        marker = "✅" if version in applied else "⏳"
+        print(f"{marker} {version}_{name}")
+
+
+# Hot queries and the index each one is expected to use
+EXPLAIN_CHECKS = [
+    (
+        "ListDocuments (status filter)",
+        """SELECT id, document_id, filename, document_type, status, risk_score, uploaded_at
+           FROM documents WHERE status = 'APPROVED'
+           ORDER BY uploaded_at DESC, id DESC LIMIT 51""",
+        "ix_documents_status_uploaded_at",
+    ),
+    (
+        "ListDocuments (no filter)",
+        """SELECT id, document_id, filename, document_type, status, risk_score, uploaded_at
+           FROM documents ORDER BY uploaded_at DESC, id DESC LIMIT 51""",
+        "ix_documents_uploaded_at",
+    ),
+    (
+        "GetPendingReviews",
+        """SELECT d.document_id, d.filename, d.document_type, d.status, d.risk_score,
+                  d.ai_summary, s.data, s.codec, d.reviewer_comments, d.uploaded_at, d.processed_at
+           FROM documents d
+           LEFT JOIN document_blobs s ON s.document_id = d.document_id AND s.field = 'ai_summary'
+           WHERE d.status = 'PENDING_REVIEW'
+           ORDER BY d.uploaded_at DESC""",
+        "ix_documents_pending_review",
+    ),
+    (
+        "Filter by document_type",
+        "SELECT id FROM documents WHERE document_type = 'LOAN_APPLICATION'",
+        "ix_documents_document_type",
+    ),
+    (
+        "SearchDocuments (full text)",
+        """SELECT document_id, ts_rank_cd(search_vector, websearch_to_tsquery('english', 'acme corp'), 32) AS rank
+           FROM documents WHERE search_vector @@ websearch_to_tsquery('english', 'acme corp')
+           ORDER BY rank DESC, id DESC LIMIT 21""",
+        "ix_documents_search_vector",
+    ),
+    (
+        "SearchDocuments (entity filter)",
+        """SELECT document_id FROM documents WHERE key_entities @> '["acme corp"]'::jsonb""",
+        "ix_documents_key_entities",
+    ),
+]
+
+
+def _index_names(plan):
+    """Collect every index referenced anywhere in an EXPLAIN (FORMAT JSON) plan"""
+    names = set()
+    if isinstance(plan, dict):
+        if "Index Name" in plan:
+            names.add(plan["Index Name"])
+        for value in plan.values():
+            names |= _index_names(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            names |= _index_names(item)
+    return names
+
+
+def explain():
+    """Verify the planner can serve the hot queries from their indexes.
+
+    Sequential scans are disabled for the check so that small development
+    tables still show whether a usable index exists.
+    """
+    failures = 0
+    with engine.begin() as conn:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for label, sql, expected_index in EXPLAIN_CHECKS:
+            plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            used = _index_names(plan)
+            if expected_index in used:
+                print(f"✅ {label}: uses {expected_index}")
+            else:
+                failures += 1
+                print(f"❌ {label}: expected {expected_index}, plan uses {sorted(used) or 'no index'}")
+    return failures
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    target = sys.argv[2] if len(sys.argv) > 2 else None
+
+    if command == "upgrade":
+        upgrade(target)
+    elif command == "downgrade":
+        downgrade(target)
+    elif command == "status":
+        status()
+    elif command == "explain":
+        sys.exit(1 if explain() else 0)
+    else:
+        print("Usage: python -m migrations.runner [status|upgrade|downgrade|explain] [target_version]")
+        sys.exit(1)
@@ -0,0 +1,21 @@
+"""Add file metadata columns to documents table"""
+
+from sqlalchemy import text
+
+def upgrade(conn):
+    """Add file columns"""
+    conn.execute(text("""
+        ALTER TABLE documents 
+        ADD COLUMN IF NOT EXISTS file_path VARCHAR(500),
+        ADD COLUMN IF NOT EXISTS file_size INTEGER,
+        ADD COLUMN IF NOT EXISTS file_type VARCHAR(50);
+    """))
+
+def downgrade(conn):
+    """Remove file columns"""
+    conn.execute(text("""
+        ALTER TABLE documents 
+        DROP COLUMN IF EXISTS file_path,
+        DROP COLUMN IF EXISTS file_size,
+        DROP COLUMN IF EXISTS file_type;
+    """))
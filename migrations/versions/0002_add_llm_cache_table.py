@@ -0,0 +1,22 @@
+"""Add persistent LLM response cache table"""
+
+from sqlalchemy import text
+
+def upgrade(conn):
+    """Create llm_cache table"""
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            cache_key VARCHAR(64) PRIMARY KEY,
+            model VARCHAR NOT NULL,
+            response_text TEXT NOT NULL,
+            created_at TIMESTAMP,
+            expires_at TIMESTAMP,
+            hit_count INTEGER DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS ix_llm_cache_created_at ON llm_cache (created_at);
+        CREATE INDEX IF NOT EXISTS ix_llm_cache_expires_at ON llm_cache (expires_at);
+    """))
+
+def downgrade(conn):
+    """Drop llm_cache table"""
+    conn.execute(text("DROP TABLE IF EXISTS llm_cache;"))
@@ -0,0 +1,32 @@
+"""Add indexes for the document list and pending-review queries"""
+
+from sqlalchemy import text
+
+def upgrade(conn):
+    """Create status/uploaded_at, pending-review and document_type indexes"""
+    conn.execute(text("""
+        -- ListDocuments with a status filter: WHERE status = ? ORDER BY uploaded_at DESC, id DESC
+        CREATE INDEX IF NOT EXISTS ix_documents_status_uploaded_at
+            ON documents (status, uploaded_at DESC, id DESC);
+
+        -- ListDocuments without a filter (keyset on uploaded_at, id)
+        CREATE INDEX IF NOT EXISTS ix_documents_uploaded_at
+            ON documents (uploaded_at DESC, id DESC);
+
+        -- GetPendingReviews queue
+        CREATE INDEX IF NOT EXISTS ix_documents_pending_review
+            ON documents (uploaded_at DESC)
+            WHERE status = 'PENDING_REVIEW';
+
+        CREATE INDEX IF NOT EXISTS ix_documents_document_type
+            ON documents (document_type);
+    """))
+
+def downgrade(conn):
+    """Drop the query indexes"""
+    conn.execute(text("""
+        DROP INDEX IF EXISTS ix_documents_status_uploaded_at;
+        DROP INDEX IF EXISTS ix_documents_uploaded_at;
+        DROP INDEX IF EXISTS ix_documents_pending_review;
+        DROP INDEX IF EXISTS ix_documents_document_type;
+    """))
@@ -0,0 +1,33 @@
+"""Add compressed side table for bulky document text"""
+
+from sqlalchemy import text
+
+def upgrade(conn):
+    """Create document_blobs table
+
+    Existing inline values are moved by scripts/migrate_document_blobs.py,
+    which runs in batches outside this transaction.
+    """
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS document_blobs (
+            document_id VARCHAR NOT NULL REFERENCES documents (document_id) ON DELETE CASCADE,
+            field VARCHAR(32) NOT NULL,
+            codec VARCHAR(16) NOT NULL,
+            raw_size INTEGER NOT NULL,
+            stored_size INTEGER NOT NULL,
+            data BYTEA NOT NULL,
+            PRIMARY KEY (document_id, field)
+        );
+        -- Already compressed; skip TOAST's own pglz pass
+        ALTER TABLE document_blobs ALTER COLUMN data SET STORAGE EXTERNAL;
+    """))
+
+def downgrade(conn):
+    """Drop document_blobs once its contents have been moved back inline"""
+    remaining = conn.execute(text("SELECT count(*) FROM document_blobs")).scalar()
+    if remaining:
+        raise RuntimeError(
+            f"{remaining} blobs remain; run `python scripts/migrate_document_blobs.py --inline` "
+            "before downgrading"
+        )
+    conn.execute(text("DROP TABLE IF EXISTS document_blobs;"))
@@ -0,0 +1,36 @@
+"""Add MinHash signatures and LSH band buckets for near-duplicate detection"""
+
+from sqlalchemy import text
+
+def upgrade(conn):
+    """Create document_signatures and document_lsh_bands
+
+    Existing documents are indexed by scripts/backfill_signatures.py.
+    """
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS document_signatures (
+            document_id VARCHAR PRIMARY KEY REFERENCES documents (document_id) ON DELETE CASCADE,
+            document_type VARCHAR(32) NOT NULL,
+            minhash BYTEA NOT NULL,
+            created_at TIMESTAMP
+        );
+
+        -- Lookups probe (band, bucket) pairs; the primary key serves them
+        CREATE TABLE IF NOT EXISTS document_lsh_bands (
+            band INTEGER NOT NULL,
+            bucket BIGINT NOT NULL,
+            document_id VARCHAR NOT NULL REFERENCES documents (document_id) ON DELETE CASCADE,
+            PRIMARY KEY (band, bucket, document_id)
+        );
+
+        -- ON DELETE CASCADE from documents
+        CREATE INDEX IF NOT EXISTS ix_document_lsh_bands_document_id
+            ON document_lsh_bands (document_id);
+    """))
+
+def downgrade(conn):
+    """Drop the similarity index tables"""
+    conn.execute(text("""
+        DROP TABLE IF EXISTS document_lsh_bands;
+        DROP TABLE IF EXISTS document_signatures;
+    """))
@@ -0,0 +1,41 @@
+"""Add pipeline stage checkpoints to documents"""
+
+from sqlalchemy import text
+
+def upgrade(conn):
+    """Add pipeline_stage/stage_updated_at, backfill them and index resumable documents
+
+    Finished documents are marked 'scored'; unfinished ones get the last stage
+    whose result is already stored, so scripts/resume_documents.py can pick
+    them up where they stopped.
+    """
+    conn.execute(text("""
+        ALTER TABLE documents ADD COLUMN IF NOT EXISTS pipeline_stage VARCHAR(32);
+        ALTER TABLE documents ADD COLUMN IF NOT EXISTS stage_updated_at TIMESTAMP;
+
+        UPDATE documents d SET
+            pipeline_stage = CASE
+                WHEN d.status IN ('APPROVED', 'PENDING_REVIEW', 'REJECTED') THEN 'scored'
+                WHEN d.ai_summary IS NOT NULL OR EXISTS (
+                    SELECT 1 FROM document_blobs b WHERE b.document_id = d.document_id AND b.field = 'ai_summary'
+                ) THEN 'summarized'
+                WHEN d.classification IS NOT NULL OR EXISTS (
+                    SELECT 1 FROM document_blobs b WHERE b.document_id = d.document_id AND b.field = 'classification'
+                ) THEN 'classified'
+            END,
+            stage_updated_at = COALESCE(d.processed_at, d.uploaded_at)
+        WHERE d.pipeline_stage IS NULL;
+
+        -- Resume sweep: unfinished documents by last progress
+        CREATE INDEX IF NOT EXISTS ix_documents_resumable
+            ON documents (stage_updated_at)
+            WHERE status IN ('UPLOADED', 'PROCESSING', 'FAILED');
+    """))
+
+def downgrade(conn):
+    """Drop the checkpoint columns"""
+    conn.execute(text("""
+        DROP INDEX IF EXISTS ix_documents_resumable;
+        ALTER TABLE documents DROP COLUMN IF EXISTS stage_updated_at;
+        ALTER TABLE documents DROP COLUMN IF EXISTS pipeline_stage;
+    """))
@@ -0,0 +1,38 @@
+"""Add full-text search and entity filter columns to documents"""
+
+from sqlalchemy import text
+
+def upgrade(conn):
+    """Add search_vector/key_entities/max_amount with their indexes
+
+    The columns are filled on write by the application (the text is stored
+    compressed, out of reach of a generated column); existing documents are
+    indexed by scripts/backfill_search.py.
+    """
+    conn.execute(text("""
+        ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+        ALTER TABLE documents ADD COLUMN IF NOT EXISTS key_entities JSONB;
+        ALTER TABLE documents ADD COLUMN IF NOT EXISTS max_amount DOUBLE PRECISION;
+
+        -- SearchDocuments: search_vector @@ websearch_to_tsquery(...)
+        CREATE INDEX IF NOT EXISTS ix_documents_search_vector
+            ON documents USING gin (search_vector);
+
+        -- SearchDocuments entity filter: key_entities @> '["acme corp"]'
+        CREATE INDEX IF NOT EXISTS ix_documents_key_entities
+            ON documents USING gin (key_entities jsonb_path_ops);
+
+        CREATE INDEX IF NOT EXISTS ix_documents_max_amount
+            ON documents (max_amount);
+    """))
+
+def downgrade(conn):
+    """Drop the search columns"""
+    conn.execute(text("""
+        DROP INDEX IF EXISTS ix_documents_search_vector;
+        DROP INDEX IF EXISTS ix_documents_key_entities;
+        DROP INDEX IF EXISTS ix_documents_max_amount;
+        ALTER TABLE documents DROP COLUMN IF EXISTS search_vector;
+        ALTER TABLE documents DROP COLUMN IF EXISTS key_entities;
+        ALTER TABLE documents DROP COLUMN IF EXISTS max_amount;
+    """))
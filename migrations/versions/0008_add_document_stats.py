@@ -0,0 +1,117 @@
+"""Add trigger-maintained dashboard counters (document_stats)"""
+
+from sqlalchemy import text
+
+def upgrade(conn):
+    """Create document_stats, the triggers that maintain it, and count existing documents
+
+    CREATE TRIGGER waits for in-flight writes to documents and blocks new ones
+    until this migration commits, so the initial count below is exact.
+    """
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS document_stats (
+            document_type VARCHAR(32) NOT NULL,
+            status VARCHAR(32) NOT NULL,
+            risk_bucket SMALLINT NOT NULL,
+            shard SMALLINT NOT NULL,
+            document_count BIGINT NOT NULL DEFAULT 0,
+            risk_score_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            processed_count BIGINT NOT NULL DEFAULT 0,
+            processing_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+            PRIMARY KEY (document_type, status, risk_bucket, shard)
+        )
+    """))
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION document_stats_add(d documents, delta integer) RETURNS void AS $$
+        BEGIN
+            INSERT INTO document_stats AS s (document_type, status, risk_bucket, shard, document_count,
+                                             risk_score_sum, processed_count, processing_seconds)
+            VALUES (
+                coalesce(d.document_type::text, ''),
+                coalesce(d.status::text, ''),
+                CASE WHEN d.risk_score IS NULL THEN -1 ELSE least(floor(d.risk_score / 10), 9) END,
+                abs(mod(hashtext(d.document_id), 16)),
+                delta,
+                coalesce(d.risk_score, 0) * delta,
+                CASE WHEN d.processed_at IS NULL OR d.uploaded_at IS NULL THEN 0 ELSE delta END,
+                coalesce(extract(epoch FROM d.processed_at - d.uploaded_at), 0) * delta
+            )
+            ON CONFLICT (document_type, status, risk_bucket, shard) DO UPDATE SET
+                document_count = s.document_count + excluded.document_count,
+                risk_score_sum = s.risk_score_sum + excluded.risk_score_sum,
+                processed_count = s.processed_count + excluded.processed_count,
+                processing_seconds = s.processing_seconds + excluded.processing_seconds;
+        END
+        $$ LANGUAGE plpgsql
+    """))
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION document_stats_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM document_stats_add(NEW, 1);
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM document_stats_add(OLD, -1);
+            ELSIF (coalesce(OLD.document_type::text, ''), coalesce(OLD.status::text, ''), coalesce(OLD.risk_score, -1))
+                <= (coalesce(NEW.document_type::text, ''), coalesce(NEW.status::text, ''), coalesce(NEW.risk_score, -1)) THEN
+                PERFORM document_stats_add(OLD, -1);
+                PERFORM document_stats_add(NEW, 1);
+            ELSE
+                PERFORM document_stats_add(NEW, 1);
+                PERFORM document_stats_add(OLD, -1);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """))
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION document_stats_reset() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM document_stats;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """))
+    conn.execute(text("""
+        DROP TRIGGER IF EXISTS document_stats_insert_delete ON documents;
+        CREATE TRIGGER document_stats_insert_delete AFTER INSERT OR DELETE ON documents
+            FOR EACH ROW EXECUTE FUNCTION document_stats_trigger();
+
+        DROP TRIGGER IF EXISTS document_stats_update ON documents;
+        CREATE TRIGGER document_stats_update
+            AFTER UPDATE OF document_type, status, risk_score, uploaded_at, processed_at ON documents
+            FOR EACH ROW WHEN (
+                OLD.document_type IS DISTINCT FROM NEW.document_type OR OLD.status IS DISTINCT FROM NEW.status
+                OR OLD.risk_score IS DISTINCT FROM NEW.risk_score OR OLD.uploaded_at IS DISTINCT FROM NEW.uploaded_at
+                OR OLD.processed_at IS DISTINCT FROM NEW.processed_at
+            )
+            EXECUTE FUNCTION document_stats_trigger();
+
+        DROP TRIGGER IF EXISTS document_stats_truncate ON documents;
+        CREATE TRIGGER document_stats_truncate AFTER TRUNCATE ON documents
+            FOR EACH STATEMENT EXECUTE FUNCTION document_stats_reset();
+    """))
+    conn.execute(text("""
+        DELETE FROM document_stats;
+        INSERT INTO document_stats (document_type, status, risk_bucket, shard, document_count,
+                                    risk_score_sum, processed_count, processing_seconds)
+        SELECT coalesce(document_type::text, ''), coalesce(status::text, ''),
+               CASE WHEN risk_score IS NULL THEN -1 ELSE least(floor(risk_score / 10), 9) END,
+               abs(mod(hashtext(document_id), 16)),
+               count(*), coalesce(sum(risk_score), 0),
+               count(*) FILTER (WHERE processed_at IS NOT NULL AND uploaded_at IS NOT NULL),
+               coalesce(sum(extract(epoch FROM processed_at - uploaded_at)), 0)
+        FROM documents
+        GROUP BY 1, 2, 3, 4;
+    """))
+
+def downgrade(conn):
+    """Drop the triggers, their functions and document_stats"""
+    conn.execute(text("""
+        DROP TRIGGER IF EXISTS document_stats_insert_delete ON documents;
+        DROP TRIGGER IF EXISTS document_stats_update ON documents;
+        DROP TRIGGER IF EXISTS document_stats_truncate ON documents;
+        DROP FUNCTION IF EXISTS document_stats_trigger();
+        DROP FUNCTION IF EXISTS document_stats_reset();
+        DROP FUNCTION IF EXISTS document_stats_add(documents, integer);
+        DROP TABLE IF EXISTS document_stats;
+    """))
@@ -0,0 +1,15 @@
+"""Count resume attempts per document"""
+
+from sqlalchemy import text
+
+def upgrade(conn):
+    """Add resume_attempts; resumes stop at RESUME_MAX_ATTEMPTS (see utils/checkpoints.py)"""
+    conn.execute(text("""
+        ALTER TABLE documents ADD COLUMN IF NOT EXISTS resume_attempts INTEGER NOT NULL DEFAULT 0;
+    """))
+
+def downgrade(conn):
+    """Drop resume_attempts"""
+    conn.execute(text("""
+        ALTER TABLE documents DROP COLUMN IF EXISTS resume_attempts;
+    """))
@@ -9,11 +9,22 @@ export default {
     classifyDocument: './src/steps/classify_document_step.py',
     summarizeDocument: './src/steps/summarize_document_step.py',
     riskScoreDocument: './src/steps/risk_score_document_step.py',
+    analyzeDocument: './src/steps/analyze_document_step.py',
+    resumeDocument: './src/steps/resume_document_step.py',
     getDocument: './src/steps/get_document_step.py',
     listDocuments: './src/steps/list_documents_step.py',
+    searchDocuments: './src/steps/search_documents_step.py',
+    getDashboard: './src/steps/dashboard_step.py',
     getPendingReviews: './src/steps/get_pending_reviews_step.py',
     reviewDocument: './src/steps/review_document_step.py',
     deleteDocument: './src/steps/delete_document_step.py',
+    metrics: './src/steps/metrics_step.py',
+    purgeLLMCache: './src/steps/purge_llm_cache_step.py',
+    purgeContentStore: './src/steps/purge_content_store_step.py',
+  },
+  
+  streams: {
+    documentSummary: './src/steps/document_summary_stream.py',
   },
   
   flows: {
@@ -25,7 +36,9 @@ export default {
         'saveDocument',
         'classifyDocument',
         'summarizeDocument',
-        'riskScoreDocument'
+        'riskScoreDocument',
+        'analyzeDocument',
+        'resumeDocument'
       ]
     }
   },
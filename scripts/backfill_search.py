@@ -0,0 +1,78 @@
+"""Fill the search columns of documents stored before search existed.
+
+Walks documents in id order (one transaction per batch) and sets
+search_vector from extracted_text and ai_summary, and key_entities/max_amount
+from the classification. Needs PostgreSQL:
+
+    python scripts/backfill_search.py [--batch-size 500] [--rebuild]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sqlalchemy import update
+
+from utils import search
+from utils.database import SessionLocal, Document, read_text_field
+
+documents = Document.__table__
+
+
+def backfill(batch_size, rebuild=False):
+    indexed = 0
+    last_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            if not search.supported(db):
+                raise SystemExit("❌ Search needs PostgreSQL (DATABASE_URL)")
+            query = db.query(Document.id, Document.document_id).filter(Document.id > last_id)
+            if not rebuild:
+                query = query.filter(Document.search_vector.is_(None))
+            rows = query.order_by(Document.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            for row in rows:
+                values = {"search_vector": search.text_vector(read_text_field(db, row.document_id, "extracted_text"))}
+                classification = read_text_field(db, row.document_id, "classification")
+                if classification:
+                    try:
+                        values.update(search.entity_values(json.loads(classification)))
+                    except ValueError:
+                        pass
+                db.execute(update(documents).where(documents.c.id == row.id).values(values))
+                summary = read_text_field(db, row.document_id, "ai_summary")
+                if summary:
+                    # Second statement: with_summary() builds on the text vector just written
+                    db.execute(update(documents).where(documents.c.id == row.id)
+                               .values(search_vector=search.with_summary(summary)))
+                indexed += 1
+
+            last_id = rows[-1].id
+            db.commit()
+            print(f"🔎 Indexed {indexed} documents so far")
+        finally:
+            db.close()
+    return indexed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill document search columns")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Re-index every document (after changing SEARCH_CONFIG or SEARCH_MAX_CHARS)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    indexed = backfill(args.batch_size, args.rebuild)
+    print(f"✅ Indexed {indexed} documents in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Bulk-ingest a directory or manifest of documents.
+
+Extracts text in a process pool, dedupes against existing document_ids in
+one query per batch and inserts new rows with multi-row INSERTs:
+
+    python scripts/bulk_ingest.py ./incoming --document-type loan_application
+    python scripts/bulk_ingest.py --manifest batch.jsonl --workers 8 --batch-size 500
+    python scripts/bulk_ingest.py ./incoming --process --concurrency 4
+
+Manifest lines are JSON objects: {"path": "...", "document_type": "...", "document_id": "..."}
+(document_type and document_id are optional). Without an explicit id, the id is
+derived from the file's content hash, so re-running a batch never duplicates rows.
+
+Rows are inserted with status `uploaded` (and indexed for search on
+PostgreSQL). AI analysis runs separately, or with --process a document.uploaded
+event is started for every inserted document: handed to the queue workers when
+WORK_QUEUE_ENABLED=true, otherwise run in this process, --concurrency at a time.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sqlalchemy import insert
+
+from utils import search
+from utils.database import engine, Document, DocumentBlob, DocumentType, DocumentStatus, blob_values
+from utils.file_processor import process_uploaded_file
+from utils.work_queue import WORK_QUEUE_ENABLED, WORK_QUEUE_BACKEND, enqueue_document
+
+SUPPORTED_EXTENSIONS = {'pdf', 'docx', 'doc', 'txt'}
+
+
+def discover_directory(directory, document_type):
+    items = []
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.lower().split('.')[-1] in SUPPORTED_EXTENSIONS:
+                items.append({'path': os.path.join(root, filename), 'document_type': document_type})
+    return items
+
+
+def discover_manifest(manifest_path, document_type):
+    items = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entry.setdefault('document_type', document_type)
+                items.append(entry)
+    return items
+
+
+def extract_item(item):
+    """Process-pool worker: read and extract one file"""
+    path = item['path']
+    filename = item.get('filename') or os.path.basename(path)
+    try:
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        # One process per file already fills the cores; no nested page pool for PDFs
+        text, file_type = process_uploaded_file(path, filename, workers=1)
+    except Exception as e:
+        return {'path': path, 'error': str(e)}
+
+    return {
+        'path': path,
+        'document_id': item.get('document_id') or f"doc_{digest[:12]}",
+        'filename': filename,
+        'document_type': item['document_type'],
+        'file_type': file_type,
+        'file_size': os.path.getsize(path),
+        'extracted_text': text,
+    }
+
+
+def existing_document_ids(conn, document_ids):
+    """One round trip to find which ids are already stored"""
+    if not document_ids:
+        return set()
+    rows = conn.execute(
+        Document.__table__.select()
+        .with_only_columns(Document.__table__.c.document_id)
+        .where(Document.__table__.c.document_id.in_(document_ids))
+    )
+    return {row.document_id for row in rows}
+
+
+def uploaded_event(row, text):
+    """document.uploaded payload for an inserted row; the steps read the text from its blob"""
+    return {
+        'document_id': row['document_id'],
+        'document_type': row['document_type'].value,
+        'filename': row['filename'],
+        'content_length': len(text),
+    }
+
+
+async def start_processing(events, concurrency):
+    """Queue each document for the workers, or run its pipeline here"""
+    if WORK_QUEUE_ENABLED:
+        return sum([await enqueue_document(event) for event in events])
+
+    # Imported here: loads every AI step and the Groq client
+    from queue_worker import WorkerLogger, run_event
+    from utils.groq_client import close_clients
+    from utils.instrumentation import flush
+
+    logger = WorkerLogger("[ingest]")
+    pending = list(events)
+
+    async def worker():
+        while pending:
+            await run_event({'topic': 'document.uploaded', 'data': pending.pop(0)}, logger)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        await close_clients()
+        flush()
+    return len(events)
+
+
+def ingest(items, workers, batch_size):
+    timings = {'extract': 0.0, 'dedupe': 0.0, 'insert': 0.0}
+    stats = {'discovered': len(items), 'extracted': 0, 'failed': 0, 'duplicates': 0, 'inserted': 0, 'bytes': 0}
+    errors = []
+    inserted = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+
+            started = time.perf_counter()
+            results = list(pool.map(extract_item, batch, chunksize=max(1, len(batch) // (workers * 4))))
+            timings['extract'] += time.perf_counter() - started
+
+            rows = []
+            for result in results:
+                if 'error' in result:
+                    stats['failed'] += 1
+                    errors.append(result)
+                    continue
+                try:
+                    doc_type = DocumentType[result['document_type'].upper()]
+                except KeyError:
+                    stats['failed'] += 1
+                    errors.append({'path': result['path'], 'error': f"Invalid document type: {result['document_type']}"})
+                    continue
+                stats['extracted'] += 1
+                stats['bytes'] += result['file_size']
+                rows.append({
+                    'document_id': result['document_id'],
+                    'filename': result['filename'],
+                    'document_type': doc_type,
+                    'status': DocumentStatus.UPLOADED,
+                    'file_path': result['path'],
+                    'file_size': result['file_size'],
+                    'file_type': result['file_type'],
+                    'uploaded_at': datetime.utcnow(),
+                    '_text': result['extracted_text'],
+                })
+
+            with engine.begin() as conn:
+                started = time.perf_counter()
+                existing = existing_document_ids(conn, [row['document_id'] for row in rows])
+                # Also drop duplicates within the batch itself
+                seen = set(existing)
+                new_rows = []
+                for row in rows:
+                    if row['document_id'] not in seen:
+                        seen.add(row['document_id'])
+                        new_rows.append(row)
+                stats['duplicates'] += len(rows) - len(new_rows)
+                timings['dedupe'] += time.perf_counter() - started
+
+                started = time.perf_counter()
+                if new_rows:
+                    texts = [row.pop('_text') for row in new_rows]
+                    statement = insert(Document.__table__)
+                    if conn.dialect.name == 'postgresql':
+                        # search_vector is computed by the database from a per-row parameter
+                        statement = statement.values(search_vector=search.text_vector_param('search_text'))
+                        for row, text in zip(new_rows, texts):
+                            row['search_text'] = text[:search.SEARCH_MAX_CHARS]
+                    # Text goes to document_blobs (compressed), not the documents row
+                    blob_rows = [
+                        blob_values(row['document_id'], 'extracted_text', text)
+                        for row, text in zip(new_rows, texts)
+                    ]
+                    # executemany on an INSERT is sent as multi-row VALUES batches
+                    conn.execute(statement, new_rows)
+                    conn.execute(insert(DocumentBlob.__table__), blob_rows)
+                    inserted.extend(uploaded_event(row, text) for row, text in zip(new_rows, texts))
+                stats['inserted'] += len(new_rows)
+                timings['insert'] += time.perf_counter() - started
+
+            print(f"📦 Batch {start // batch_size + 1}: {len(new_rows)} inserted, "
+                  f"{len(rows) - len(new_rows)} duplicates, {len(batch) - len(rows)} failed")
+
+    return stats, timings, errors, inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest documents into DocFlow")
+    parser.add_argument("directory", nargs="?", help="Directory to scan for PDF/DOCX/TXT files")
+    parser.add_argument("--manifest", help="JSON-lines manifest of files to ingest")
+    parser.add_argument("--document-type", default="loan_application", help="Default document type")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Extraction processes")
+    parser.add_argument("--batch-size", type=int, default=200, help="Rows per dedupe/insert batch")
+    parser.add_argument("--process", action="store_true",
+                        help="Start AI analysis for inserted documents (queued with WORK_QUEUE_ENABLED=true)")
+    parser.add_argument("--concurrency", type=int, default=4, help="With --process and no queue, documents analysed at a time")
+    parser.add_argument("--report", help="Write the timing report as JSON to this path")
+    args = parser.parse_args()
+
+    if not args.directory and not args.manifest:
+        parser.error("Provide a directory or --manifest")
+    if args.process and WORK_QUEUE_ENABLED and WORK_QUEUE_BACKEND == "memory":
+        parser.error("the memory queue only exists inside one process; use the redis backend")
+
+    total_started = time.perf_counter()
+    started = time.perf_counter()
+    if args.manifest:
+        items = discover_manifest(args.manifest, args.document_type)
+    else:
+        items = discover_directory(args.directory, args.document_type)
+    discover_seconds = time.perf_counter() - started
+
+    print(f"🔎 Found {len(items)} files")
+    stats, timings, errors, inserted = ingest(items, args.workers, args.batch_size)
+    timings['discover'] = discover_seconds
+    total_seconds = time.perf_counter() - total_started
+
+    report = {
+        'stats': stats,
+        'timings_seconds': {stage: round(seconds, 4) for stage, seconds in timings.items()},
+        'total_seconds': round(total_seconds, 4),
+        'docs_per_second': round(stats['extracted'] / total_seconds, 2) if total_seconds else None,
+        'mb_per_second': round(stats['bytes'] / 1024 / 1024 / total_seconds, 3) if total_seconds else None,
+        'errors': errors,
+    }
+
+    for error in errors:
+        print(f"❌ {error['path']}: {error['error']}")
+    print(f"✅ Inserted {stats['inserted']} / {stats['discovered']} documents in {total_seconds:.2f}s "
+          f"({report['docs_per_second']} docs/s)")
+    for stage in ('discover', 'extract', 'dedupe', 'insert'):
+        print(f"   ⏱️  {stage:<8} {timings[stage]:.3f}s")
+
+    if args.process and inserted:
+        started = time.perf_counter()
+        started_count = asyncio.run(start_processing(inserted, args.concurrency))
+        verb = "Queued" if WORK_QUEUE_ENABLED else "Processed"
+        print(f"🚀 {verb} {started_count} documents in {time.perf_counter() - started:.1f}s")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📊 Report saved to: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""Create the database tables (and the SQLite/PostgreSQL dashboard triggers).
+
+Run once on a fresh database, before the migrations:
+
+    python scripts/create_tables.py
+    python -m migrations.runner upgrade
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.database import Base, get_engine
+
+
+def main():
+    Base.metadata.create_all(bind=get_engine())
+    print("✅ Database tables created successfully!")
+
+
+if __name__ == "__main__":
+    main()
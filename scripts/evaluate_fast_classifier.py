@@ -0,0 +1,128 @@
+"""Compare the local fast-path classifier against stored LLM classifications.
+
+Runs utils.fast_classifier over every document whose `classification` came
+from the LLM and reports category agreement, requires_review agreement and
+entity recall, plus the short-circuit rate and accuracy at a sweep of
+confidence thresholds so FAST_CLASSIFIER_THRESHOLD can be tuned:
+
+    python scripts/evaluate_fast_classifier.py
+    python scripts/evaluate_fast_classifier.py --document-type loan_application --limit 5000 --report eval.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.database import SessionLocal, Document, DocumentType
+from utils.fast_classifier import classify_text, FAST_CLASSIFIER_THRESHOLD, FAST_CLASSIFIER_MIN_COMPLETENESS
+
+THRESHOLDS = [0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95]
+
+
+def _normalise(entity):
+    return "".join(ch for ch in str(entity).lower() if ch.isalnum())
+
+
+def entity_recall(expected, found):
+    """Share of the LLM's entities that the fast path also found (substring match)"""
+    expected = [_normalise(e) for e in expected or [] if _normalise(e)]
+    if not expected:
+        return None
+    found = [_normalise(e) for e in found]
+    return sum(1 for e in expected if any(e in f or f in e for f in found if f)) / len(expected)
+
+
+def evaluate(document_type=None, limit=None, batch_size=500):
+    rows = []
+    db = SessionLocal()
+    try:
+        query = db.query(Document).filter(Document._classification.isnot(None) | Document.blobs.any(field='classification'))
+        if document_type:
+            query = query.filter(Document.document_type == DocumentType[document_type.upper()])
+        query = query.order_by(Document.id)
+        if limit:
+            query = query.limit(limit)
+
+        for document in query.yield_per(batch_size):
+            try:
+                expected = json.loads(document.classification)
+            except (TypeError, ValueError):
+                continue
+            # Only LLM output is ground truth
+            if expected.get("source") == "fast_path":
+                continue
+            result = classify_text(document.document_type.value, document.extracted_text or "")
+            if result is None:
+                continue
+            predicted = result["classification"]
+            rows.append({
+                "document_id": document.document_id,
+                "confidence": predicted["confidence"],
+                "complete": predicted["completeness_score"] >= FAST_CLASSIFIER_MIN_COMPLETENESS,
+                "category_match": predicted["document_category"] == expected.get("document_category"),
+                "review_match": predicted["requires_review"] == bool(expected.get("requires_review")),
+                "entity_recall": entity_recall(expected.get("key_entities"), predicted["key_entities"]),
+                "expected_category": expected.get("document_category"),
+                "predicted_category": predicted["document_category"],
+            })
+    finally:
+        db.close()
+    return rows
+
+
+def summarise(rows):
+    def rate(items, key):
+        return round(sum(1 for r in items if r[key]) / len(items), 3) if items else None
+
+    recalls = [r["entity_recall"] for r in rows if r["entity_recall"] is not None]
+    sweep = []
+    for threshold in THRESHOLDS:
+        # Same gate as fast_classify(): confident and complete enough
+        accepted = [r for r in rows if r["confidence"] >= threshold and r["complete"]]
+        sweep.append({
+            "threshold": threshold,
+            "short_circuit_rate": round(len(accepted) / len(rows), 3) if rows else None,
+            "category_accuracy": rate(accepted, "category_match"),
+            "review_accuracy": rate(accepted, "review_match"),
+        })
+
+    return {
+        "documents": len(rows),
+        "category_accuracy": rate(rows, "category_match"),
+        "review_accuracy": rate(rows, "review_match"),
+        "mean_entity_recall": round(sum(recalls) / len(recalls), 3) if recalls else None,
+        "threshold_sweep": sweep,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the fast-path classifier against stored LLM results")
+    parser.add_argument("--document-type", help="Only evaluate this document type")
+    parser.add_argument("--limit", type=int, help="Evaluate at most this many documents")
+    parser.add_argument("--report", help="Write the summary and per-document rows as JSON to this path")
+    args = parser.parse_args()
+
+    rows = evaluate(args.document_type, args.limit)
+    summary = summarise(rows)
+
+    print(f"🔎 Evaluated {summary['documents']} documents with LLM classifications")
+    print(f"   Category accuracy:      {summary['category_accuracy']}")
+    print(f"   requires_review match:  {summary['review_accuracy']}")
+    print(f"   Mean entity recall:     {summary['mean_entity_recall']}")
+    print(f"\n   {'threshold':>9} {'short-circuit':>14} {'category acc':>13} {'review acc':>11}")
+    for entry in summary["threshold_sweep"]:
+        marker = "  ← current" if entry["threshold"] == FAST_CLASSIFIER_THRESHOLD else ""
+        print(f"   {entry['threshold']:>9} {str(entry['short_circuit_rate']):>14} "
+              f"{str(entry['category_accuracy']):>13} {str(entry['review_accuracy']):>11}{marker}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"summary": summary, "documents": rows}, f, indent=2)
+        print(f"📊 Report saved to: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Local stand-in for the Groq chat completions API.
+
+Serves POST /openai/v1/chat/completions with deterministic responses shaped
+like the real API (including "stream": true as server-sent events), so the
+shared client, limiter and steps can be exercised offline:
+
+    python scripts/fake_groq_server.py --port 8089
+    GROQ_BASE_URL=http://127.0.0.1:8089 GROQ_API_KEY=fake motia dev
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CLASSIFICATION_RESPONSE = {
+    "confidence": 0.92,
+    "key_entities": ["John Smith", "$50,000", "2025-01-15", "Springfield"],
+    "document_category": "personal_loan",
+    "requires_review": False,
+    "completeness_score": 0.85
+}
+
+RISK_RESPONSE = {
+    "total_score": 35,
+    "risk_level": "low",
+    "factors": {"completeness": 5, "compliance": 10, "financial_viability": 10, "red_flags": 10},
+    "concerns": ["Employment history not verified"],
+    "recommendations": ["Verify employer"]
+}
+
+CHUNK_RESPONSE = {
+    "section_summary": "Loan terms: $50,000 over 60 months at 7.5% for home renovation.",
+    "key_entities": ["John Smith", "$50,000", "60 months"],
+    "document_category": "personal_loan",
+    "confidence": 0.9,
+    "completeness_score": 0.6,
+    "requires_review": False,
+    "red_flags": []
+}
+
+SUMMARY_RESPONSE = """**Overview**: Personal loan application for $50,000.
+
+**Key Details**:
+- Applicant: John Smith
+- Amount: $50,000
+
+**Action Items**: Verify income.
+
+**Red Flags**: None identified."""
+
+
+def fake_completion_text(prompt: str) -> str:
+    """Pick a canned response based on which step wrote the prompt"""
+    if "In a single pass" in prompt:
+        return json.dumps({
+            "classification": CLASSIFICATION_RESPONSE,
+            "summary": SUMMARY_RESPONSE,
+            "risk": RISK_RESPONSE
+        })
+    if "reading part" in prompt:
+        return json.dumps(CHUNK_RESPONSE)
+    if "risk assessment" in prompt:
+        return json.dumps(RISK_RESPONSE)
+    if "classification AI" in prompt:
+        return json.dumps(CLASSIFICATION_RESPONSE)
+    return SUMMARY_RESPONSE
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    latency_ms = 0
+    error_rate = 0.0
+    # Tail latency: this fraction of requests takes slow_ms instead of latency_ms
+    slow_rate = 0.0
+    slow_ms = 0
+    # Delay between chunks of a streamed ("stream": true) response
+    token_ms = 0
+    request_count = 0
+    _lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (timeout or cancelled hedge)
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        with self._lock:
+            type(self).request_count += 1
+            request_id = type(self).request_count
+
+        if self.slow_rate and random.random() < self.slow_rate:
+            time.sleep(self.slow_ms / 1000.0)
+        elif self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+        if self.error_rate and random.random() < self.error_rate:
+            self._send_json(503, {"error": {"message": "Injected failure", "type": "server_error"}})
+            return
+
+        prompt = " ".join(m.get("content", "") for m in request.get("messages", []))
+        text = fake_completion_text(prompt)
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(text) // 4)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+        if request.get("stream"):
+            self._send_stream(request_id, request.get("model", "fake-model"), text, usage)
+            return
+
+        self._send_json(200, {
+            "id": f"chatcmpl-fake-{request_id}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        })
+
+    def _send_stream(self, request_id, model, text, usage):
+        """Server-sent events in the chat.completion.chunk format, one word per chunk"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def chunk(delta, finish_reason=None, x_groq=None):
+            payload = {
+                "id": f"chatcmpl-fake-{request_id}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if x_groq:
+                payload["x_groq"] = x_groq
+            return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+        words = text.split(" ")
+        try:
+            self.wfile.write(chunk({"role": "assistant", "content": ""}))
+            for i, word in enumerate(words):
+                if self.token_ms:
+                    time.sleep(self.token_ms / 1000.0)
+                self.wfile.write(chunk({"content": word if i == 0 else " " + word}))
+                self.wfile.flush()
+            # Groq reports usage on the final chunk under x_groq
+            self.wfile.write(chunk({}, "stop", {"id": f"req_fake_{request_id}", "usage": usage}))
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+
+def start_server(host="127.0.0.1", port=0, latency_ms=0, error_rate=0.0, slow_rate=0.0, slow_ms=0, token_ms=0):
+    """Start the fake server on a background thread and return it.
+
+    The knobs live on `server.RequestHandlerClass`, so a running server can be
+    degraded and restored (e.g. set error_rate = 1.0 to simulate an outage).
+    """
+    handler = type("ConfiguredFakeGroqHandler", (FakeGroqHandler,), {
+        "latency_ms": latency_ms,
+        "error_rate": error_rate,
+        "slow_rate": slow_rate,
+        "slow_ms": slow_ms,
+        "token_ms": token_ms,
+        "request_count": 0,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake Groq API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=int, default=0, help="Delay added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of requests that take --slow-ms")
+    parser.add_argument("--slow-ms", type=int, default=0, help="Delay for the slow (tail) requests")
+    parser.add_argument("--token-ms", type=int, default=0, help="Delay between chunks of streamed responses")
+    args = parser.parse_args()
+
+    server = start_server(args.host, args.port, args.latency_ms, args.error_rate, args.slow_rate, args.slow_ms,
+                          args.token_ms)
+    print(f"🧪 Fake Groq API listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
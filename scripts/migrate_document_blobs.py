@@ -0,0 +1,128 @@
+"""Move bulky document text into the compressed document_blobs table.
+
+Processes documents in batches (one transaction per batch) so it can run
+against a live database, and reports the storage saved:
+
+    python scripts/migrate_document_blobs.py [--batch-size 500]
+    python scripts/migrate_document_blobs.py --inline     # reverse, before downgrading 0004
+
+Run VACUUM (FULL) documents afterwards to hand the freed space back to the OS.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sqlalchemy import text
+
+from utils.database import engine, SessionLocal, Document, DocumentBlob, BLOB_FIELDS, decompress_text
+
+
+def storage_report():
+    """Table sizes and average documents row width (Postgres only)"""
+    if engine.dialect.name != "postgresql":
+        return {}
+    with engine.connect() as conn:
+        row = conn.execute(text("""
+            SELECT pg_total_relation_size('documents') AS documents_bytes,
+                   COALESCE(pg_total_relation_size(to_regclass('document_blobs')), 0) AS blobs_bytes,
+                   (SELECT COALESCE(avg(pg_column_size(d.*)), 0) FROM documents d) AS avg_row_width
+        """)).one()
+    return dict(row._mapping)
+
+
+def move_to_blobs(batch_size):
+    moved = {"documents": 0, "raw_bytes": 0, "stored_bytes": 0}
+    last_id = 0
+
+    while True:
+        db = SessionLocal()
+        try:
+            inline_filter = [getattr(Document, f"_{field}").isnot(None) for field in BLOB_FIELDS]
+            documents = (
+                db.query(Document)
+                .filter(Document.id > last_id)
+                .filter(inline_filter[0] | inline_filter[1] | inline_filter[2])
+                .order_by(Document.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not documents:
+                break
+
+            for document in documents:
+                for field in BLOB_FIELDS:
+                    value = getattr(document, f"_{field}")
+                    if value is not None:
+                        # The property setter writes the blob and clears the inline column
+                        setattr(document, field, value)
+                        blob = document.blobs[field]
+                        moved["raw_bytes"] += blob.raw_size
+                        moved["stored_bytes"] += blob.stored_size
+                moved["documents"] += 1
+
+            last_id = documents[-1].id
+            db.commit()
+            print(f"📦 Moved {moved['documents']} documents so far")
+        finally:
+            db.close()
+
+    return moved
+
+
+def move_inline(batch_size):
+    moved = {"documents": 0}
+    while True:
+        db = SessionLocal()
+        try:
+            blobs = db.query(DocumentBlob).order_by(DocumentBlob.document_id).limit(batch_size).all()
+            if not blobs:
+                break
+            for blob in blobs:
+                db.query(Document).filter(Document.document_id == blob.document_id).update(
+                    {getattr(Document, f"_{blob.field}"): decompress_text(blob.codec, blob.data)},
+                    synchronize_session=False
+                )
+                db.delete(blob)
+            moved["documents"] += len({blob.document_id for blob in blobs})
+            db.commit()
+        finally:
+            db.close()
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move document text into compressed split storage")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--inline", action="store_true", help="Move blobs back into the inline columns")
+    args = parser.parse_args()
+
+    before = storage_report()
+    started = time.perf_counter()
+
+    if args.inline:
+        result = move_inline(args.batch_size)
+        print(f"✅ Restored inline text for {result['documents']} documents")
+        return
+
+    result = move_to_blobs(args.batch_size)
+    elapsed = time.perf_counter() - started
+    after = storage_report()
+
+    ratio = (result["stored_bytes"] / result["raw_bytes"]) if result["raw_bytes"] else 1.0
+    print(f"✅ Moved {result['documents']} documents in {elapsed:.1f}s")
+    print(f"   📉 Text: {result['raw_bytes']:,} bytes -> {result['stored_bytes']:,} bytes compressed "
+          f"({ratio:.1%} of original)")
+    if before and after:
+        print(f"   🗄️  documents table: {before['documents_bytes']:,} -> {after['documents_bytes']:,} bytes "
+              f"(run VACUUM FULL documents to reclaim)")
+        print(f"   🗄️  document_blobs table: {after['blobs_bytes']:,} bytes")
+        print(f"   📏 Avg documents row width: {float(before['avg_row_width']):.0f} -> "
+              f"{float(after['avg_row_width']):.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Queue worker: runs the AI pipeline for documents queued by SaveDocument.
+
+Only used with WORK_QUEUE_ENABLED=true (see src/utils/work_queue.py). Each
+worker process runs --concurrency jobs at a time; start as many processes,
+on as many hosts, as Groq and the database can take. They share the Redis
+queue configured by REDIS_HOST/REDIS_PORT:
+
+    python scripts/queue_worker.py --concurrency 8
+    python scripts/queue_worker.py --processes 4 --concurrency 8
+    python scripts/queue_worker.py --drain     # exit once the queue is empty
+    python scripts/queue_worker.py --stats     # lane depths, leased and dead jobs
+    python scripts/queue_worker.py --replay-dead [--limit 100]   # retry dead-lettered jobs
+    python scripts/queue_worker.py --purge-dead                  # drop them
+
+A job runs ClassifyDocument (or AnalyzeDocument in fused mode), or the first
+unfinished stage of a resumed document, and then the steps its events lead
+to, in this process. The job is acked once the pipeline has run (failing steps
+park the document as FAILED for scripts/resume_documents.py), released back
+to its lane if the worker hits an error, and re-delivered by any worker if
+this one dies and its lease expires. A job queued before the document was
+claimed by a resume is acked without running (the resume's own job runs it).
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'steps'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.checkpoints import superseded
+from utils.database import run_in_session
+from utils.groq_client import close_clients
+from utils.instrumentation import flush, inc
+from utils.work_queue import get_queue, replay_dead, WORK_QUEUE_BACKEND, WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS
+
+import analyze_document_step
+import classify_document_step
+import risk_score_document_step
+import summarize_document_step
+
+WORK_QUEUE_CONCURRENCY = int(os.getenv("WORK_QUEUE_CONCURRENCY", "4"))
+WORK_QUEUE_POLL_SECONDS = float(os.getenv("WORK_QUEUE_POLL_SECONDS", "0.5"))
+
+# Topic -> steps that handle it. The steps make their own PIPELINE_MODE
+# checks and skip events flagged `fused`
+STEPS = {
+    'document.uploaded': (classify_document_step.handler, analyze_document_step.handler),
+    'document.classified': (summarize_document_step.handler,),
+    'document.summarized': (risk_score_document_step.handler,),
+}
+
+
+class WorkerLogger:
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    def info(self, message):
+        print(f"{self.prefix} {message}", flush=True)
+
+    warn = warning = error = info
+
+
+class PipelineContext:
+    """Motia-like context whose emits run the next step in this worker"""
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.pending = []
+
+    async def emit(self, event):
+        self.pending.append(event)
+
+
+async def run_event(event: dict, logger):
+    """Run the steps for `event`, then for every event they emit, in this process"""
+    context = PipelineContext(logger)
+    context.pending.append(event)
+    while context.pending:
+        event = context.pending.pop(0)
+        for handler in STEPS.get(event['topic'], ()):
+            await handler(event['data'], context)
+
+
+async def run_pipeline(job: dict, logger) -> bool:
+    """Run the job's pipeline; False if a later resume of the document already took it over"""
+    payload = job['payload']
+    if await run_in_session(superseded, payload['document_id'], payload.get('resume_attempt', 0)):
+        logger.info(f"⏭️  Job {job['id']} skipped: {payload['document_id']} was resumed after it was queued")
+        return False
+    # Resumed documents start at their first unfinished stage
+    topic = payload.get('resume_topic', 'document.uploaded')
+    await run_event({'topic': topic, 'data': {**payload, 'queue_job': job['id']}}, logger)
+    return True
+
+
+async def _sleep(stop: asyncio.Event, seconds: float):
+    try:
+        await asyncio.wait_for(stop.wait(), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def keep_leased(queue, job: dict):
+    """Extend the job's lease while the pipeline is still running"""
+    while True:
+        await asyncio.sleep(WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS / 3)
+        await queue.extend(job)
+
+
+async def reap_expired(queue, stop: asyncio.Event, logger):
+    """Put jobs whose worker died back in their lanes"""
+    interval = min(30.0, WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS / 2)
+    while not stop.is_set():
+        released = await queue.requeue_expired()
+        if released:
+            logger.info(f"♻️  Re-delivering {released} expired job(s)")
+        await _sleep(stop, interval)
+
+
+async def work(queue, stop: asyncio.Event, drain: bool, logger, counts: dict):
+    while not stop.is_set():
+        job = await queue.dequeue()
+        if job is None:
+            if drain:
+                return
+            await _sleep(stop, WORK_QUEUE_POLL_SECONDS)
+            continue
+
+        started = time.perf_counter()
+        lease = asyncio.create_task(keep_leased(queue, job))
+        try:
+            ran = await run_pipeline(job, logger)
+        except Exception as e:
+            outcome = await queue.release(job) or "expired"
+            logger.error(f"❌ Job {job['id']} failed (attempt {job['attempts']}, {outcome}): {str(e)}")
+        else:
+            await queue.ack(job)
+            outcome = "acked" if ran else "superseded"
+            if ran:
+                logger.info(f"📤 Job {job['id']} done in {time.perf_counter() - started:.2f}s ({job['lane']})")
+        finally:
+            lease.cancel()
+        counts[outcome] = counts.get(outcome, 0) + 1
+        inc("docflow_queue_jobs_total", lane=job['lane'], outcome=outcome)
+
+
+async def serve(concurrency: int = WORK_QUEUE_CONCURRENCY, drain: bool = False, logger=None) -> dict:
+    """Run `concurrency` jobs at a time until stopped (or, with drain, until the queue is empty)"""
+    logger = logger or WorkerLogger(f"[worker {os.getpid()}]")
+    queue = get_queue()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            # Finish the jobs in hand, then exit
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    counts = {}
+    reaper = asyncio.create_task(reap_expired(queue, stop, logger))
+    logger.info(f"👷 Worker started: {concurrency} concurrent jobs ({WORK_QUEUE_BACKEND} queue)")
+    try:
+        await asyncio.gather(*(work(queue, stop, drain, logger, counts) for _ in range(concurrency)))
+    finally:
+        stop.set()
+        await reaper
+        await close_clients()
+        flush()
+    logger.info(f"👋 Worker stopped: {json.dumps(counts)}")
+    return counts
+
+
+def run_process(concurrency: int, drain: bool):
+    asyncio.run(serve(concurrency, drain))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued documents")
+    parser.add_argument("--concurrency", type=int, default=WORK_QUEUE_CONCURRENCY, help="Jobs in flight per process")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to start on this host")
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    parser.add_argument("--stats", action="store_true", help="Print queue depths and exit")
+    parser.add_argument("--replay-dead", action="store_true", help="Put dead-lettered jobs back in their lanes and exit")
+    parser.add_argument("--purge-dead", action="store_true", help="Delete dead-lettered jobs and exit")
+    parser.add_argument("--limit", type=int, help="With --replay-dead: at most this many jobs")
+    args = parser.parse_args()
+
+    if WORK_QUEUE_BACKEND == "memory":
+        parser.error("the memory queue only exists inside one process; import serve() from this module instead")
+
+    if args.stats:
+        print(json.dumps(asyncio.run(get_queue().stats()), indent=2))
+        return
+
+    if args.replay_dead:
+        counts = asyncio.run(replay_dead(args.limit))
+        print(f"♻️  Replayed {counts['replayed']} dead job(s), {counts['duplicate']} already queued again")
+        return
+
+    if args.purge_dead:
+        print(f"🧹 Purged {asyncio.run(get_queue().purge_dead())} dead job(s)")
+        return
+
+    if args.processes == 1:
+        run_process(args.concurrency, args.drain)
+        return
+
+    processes = [multiprocessing.Process(target=run_process, args=(args.concurrency, args.drain))
+                 for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Children received the same SIGINT and are finishing their jobs
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Recount the dashboard counters (document_stats) from documents.
+
+The triggers keep the counters exact on their own; rebuild after restoring a
+backup or loading documents with triggers disabled, or when --check reports
+drift:
+
+    python scripts/rebuild_dashboard_stats.py --check   # exit 1 if counters disagree
+    python scripts/rebuild_dashboard_stats.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils import dashboard
+from utils.database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild dashboard counters")
+    parser.add_argument("--check", action="store_true", help="Compare counters with documents without changing them")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        if args.check:
+            mismatches = dashboard.drift(db)
+            for document_type, status, counted, actual in mismatches:
+                print(f"❌ {document_type or '-'} / {status or '-'}: counted {counted}, documents {actual}")
+            if mismatches:
+                sys.exit(1)
+            print("✅ Dashboard counters match documents")
+            return
+
+        total = dashboard.rebuild(db)
+        db.commit()
+        print(f"✅ Recounted {total} documents in {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
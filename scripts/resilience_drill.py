@@ -0,0 +1,175 @@
+"""Drive the resilient Groq wrapper against the fake server under injected faults.
+
+Each scenario reconfigures the fake (latency, error rate, slow tail) and
+fires concurrent completions through utils.analysis.cached_completion, then
+reports success rate, latency percentiles and what the wrapper did
+(retries, hedges, breaker rejections). The last two scenarios check that the
+breaker closes again after an outage and after a probe that fails with a
+non-retryable error:
+
+    python scripts/resilience_drill.py
+    python scripts/resilience_drill.py --requests 400 --concurrency 16 --report drill.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'drill.db')}")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+os.environ["GROQ_API_KEY"] = "fake"
+os.environ["GROQ_REQUESTS_PER_MINUTE"] = "1000000"
+os.environ["GROQ_TOKENS_PER_MINUTE"] = "1000000000"
+os.environ["GROQ_MAX_CONCURRENCY"] = "64"
+
+sys.path.insert(0, os.path.dirname(__file__))
+from fake_groq_server import start_server
+
+server = start_server()
+os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils import resilience
+from utils.analysis import cached_completion
+from utils.groq_client import provider_latencies, close_clients
+
+SCENARIOS = [
+    # name, fake server knobs, hedging
+    ("baseline", {"latency_ms": 20}, False),
+    ("flaky_20pct_503", {"latency_ms": 20, "error_rate": 0.2}, False),
+    ("slow_tail_no_hedge", {"latency_ms": 20, "slow_rate": 0.05, "slow_ms": 1500}, False),
+    ("slow_tail_hedged", {"latency_ms": 20, "slow_rate": 0.05, "slow_ms": 1500}, True),
+    ("outage", {"latency_ms": 20, "error_rate": 1.0}, False),
+]
+
+
+def configure(knobs: dict, hedge: bool):
+    handler = server.RequestHandlerClass
+    handler.latency_ms = knobs.get("latency_ms", 0)
+    handler.error_rate = knobs.get("error_rate", 0.0)
+    handler.slow_rate = knobs.get("slow_rate", 0.0)
+    handler.slow_ms = knobs.get("slow_ms", 0)
+    # Fresh wrapper state per scenario
+    resilience.budget = resilience.RetryBudget()
+    resilience.breaker = resilience.CircuitBreaker()
+    resilience.LLM_HEDGE_ENABLED = hedge
+    resilience.LLM_HEDGE_MIN_DELAY_SECONDS = 0.05
+    for key in resilience._stats:
+        resilience._stats[key] = 0
+    provider_latencies.clear()
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))] * 1000, 1)
+
+
+async def run_scenario(name, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, outcomes = [], {"ok": 0, "provider_unavailable": 0, "error": 0}
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await cached_completion(f"{name} drill request {i}: classification AI", step="drill", bypass=True)
+                outcomes["ok"] += 1
+            except resilience.ProviderUnavailable:
+                outcomes["provider_unavailable"] += 1
+            except Exception:
+                outcomes["error"] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return {
+        "scenario": name,
+        "seconds": round(time.perf_counter() - started, 2),
+        **outcomes,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": percentile(latencies, 1.0),
+        **{k: v for k, v in resilience.stats().items() if k != "hedge_delays"},
+    }
+
+
+async def main_async(args):
+    results = []
+    # Connection setup and lazy imports would otherwise land in the first scenario's tail
+    configure({}, False)
+    await run_scenario("warmup", 10, 1)
+
+    for name, knobs, hedge in SCENARIOS:
+        configure(knobs, hedge)
+        if hedge:
+            # Warm up the latency window so the hedge delay has a p95 to work from
+            await run_scenario(f"{name}_warmup", resilience.LLM_HEDGE_MIN_SAMPLES * 2, args.concurrency)
+            for key in resilience._stats:
+                resilience._stats[key] = 0
+        result = await run_scenario(name, args.requests, args.concurrency)
+        results.append(result)
+        print(f"🧪 {name:<20} ok {result['ok']:>4}  parked {result['provider_unavailable']:>4}  "
+              f"p50 {result['p50_ms']}ms  p99 {result['p99_ms']}ms  retries {result['retries']}  "
+              f"hedges {result['hedges']} (won {result['hedge_wins']})  "
+              f"fast-fail {result['rejected_open']}  breaker {result['breaker_state']}")
+
+    # Recovery: once the provider is healthy again a half-open probe closes the breaker
+    configure({"latency_ms": 20, "error_rate": 1.0}, False)
+    resilience.breaker.reset_seconds = 0.5
+    await run_scenario("outage_again", 20, args.concurrency)
+    server.RequestHandlerClass.error_rate = 0.0
+    await asyncio.sleep(0.6)
+    # Sequential, so requests after the probe see the closed breaker
+    recovery = await run_scenario("recovery", 20, 1)
+    results.append(recovery)
+    print(f"🧪 {'recovery':<20} ok {recovery['ok']:>4}  breaker {recovery['breaker_state']}")
+
+    # A half-open probe that dies with an error the wrapper does not retry
+    # (our own bug, a cancelled caller) must free the probe slot, or the
+    # breaker would reject every call until restart
+    configure({"latency_ms": 20}, False)
+    resilience.breaker.reset_seconds = 0.0
+    for _ in range(resilience.breaker.failure_threshold):
+        resilience.breaker.record_failure()
+
+    async def broken_probe(timeout):
+        raise RuntimeError("probe failed outside the provider")
+
+    try:
+        await resilience.resilient_call(broken_probe, "drill")
+    except RuntimeError:
+        pass
+    probe_error = await run_scenario("probe_error", 20, 1)
+    results.append(probe_error)
+    print(f"🧪 {'probe_error':<20} ok {probe_error['ok']:>4}  breaker {probe_error['breaker_state']}")
+
+    await close_clients()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fault-injection drill for the resilient Groq wrapper")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent requests")
+    parser.add_argument("--report", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📊 Report saved to: {args.report}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Resume documents that failed or got stuck mid-pipeline, from their last checkpoint.
+
+Each document restarts at its first unfinished stage (see src/utils/checkpoints.py),
+so classification or summary calls that already succeeded are not repeated:
+
+    python scripts/resume_documents.py doc_abc123 doc_def456
+    python scripts/resume_documents.py --all --concurrency 4 [--limit 500] [--stuck-minutes 30]
+    python scripts/resume_documents.py --all --dry-run
+    python scripts/resume_documents.py doc_abc123 --force    # re-score a finished document
+
+Documents run in this process, at most --concurrency at a time. With
+WORK_QUEUE_ENABLED=true they are handed to the queue workers instead.
+A document is resumed at most RESUME_MAX_ATTEMPTS times; after that it stays
+FAILED until it is resumed with --force.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from queue_worker import WorkerLogger, run_event
+from utils.checkpoints import find_resumable, resume_event, enqueue_resume, RESUME_STUCK_MINUTES
+from utils.database import run_in_session, SessionLocal, Document
+from utils.groq_client import close_clients
+from utils.instrumentation import flush
+from utils.work_queue import WORK_QUEUE_ENABLED, WORK_QUEUE_BACKEND
+
+
+async def resume_all(document_ids, concurrency, stuck_minutes, force):
+    logger = WorkerLogger("[resume]")
+    pending = list(document_ids)
+    started_from = Counter()
+
+    async def worker():
+        while pending:
+            document_id = pending.pop(0)
+            event = await run_in_session(resume_event, document_id, stuck_minutes, force)
+            if event is None:
+                started_from["skipped"] += 1
+                continue
+            started_from[event['data']['resumed_from'] or 'start'] += 1
+            if WORK_QUEUE_ENABLED:
+                await enqueue_resume(event)
+            else:
+                await run_event(event, logger)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        await close_clients()
+        flush()
+    return started_from
+
+
+def final_statuses(document_ids):
+    db = SessionLocal()
+    try:
+        rows = db.query(Document.status).filter(Document.document_id.in_(document_ids)).all()
+        return Counter(row.status.value for row in rows)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume unfinished documents from their last checkpoint")
+    parser.add_argument("document_ids", nargs="*", help="Documents to resume")
+    parser.add_argument("--all", action="store_true", help="Sweep every failed or stuck document")
+    parser.add_argument("--limit", type=int, help="With --all, resume at most this many")
+    parser.add_argument("--stuck-minutes", type=int, default=RESUME_STUCK_MINUTES,
+                        help="UPLOADED/PROCESSING documents count as stuck after this long without progress")
+    parser.add_argument("--concurrency", type=int, default=4, help="Documents processed at a time")
+    parser.add_argument("--force", action="store_true", help="Also re-run finished documents (risk score only) and ones out of resume attempts")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be resumed")
+    args = parser.parse_args()
+
+    if not args.document_ids and not args.all:
+        parser.error("pass document ids or --all")
+    if WORK_QUEUE_ENABLED and WORK_QUEUE_BACKEND == "memory":
+        parser.error("the memory queue only exists inside one process; use the redis backend")
+
+    document_ids = list(args.document_ids)
+    if args.all:
+        db = SessionLocal()
+        try:
+            rows = find_resumable(db, args.limit, args.stuck_minutes)
+        finally:
+            db.close()
+        if args.dry_run:
+            for row in rows:
+                print(f"{row.document_id}  {row.status.value:<10} last stage: {row.pipeline_stage or '-'}"
+                      f"  attempts: {row.resume_attempts}")
+        document_ids += [row.document_id for row in rows]
+
+    print(f"🔁 {len(document_ids)} document(s) to resume")
+    if args.dry_run or not document_ids:
+        return
+
+    started = time.perf_counter()
+    started_from = asyncio.run(resume_all(document_ids, args.concurrency, args.stuck_minutes, args.force))
+    print(f"✅ Done in {time.perf_counter() - started:.1f}s; resumed from: {dict(started_from)}")
+    if not WORK_QUEUE_ENABLED:
+        print(f"   Statuses now: {dict(final_statuses(document_ids))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,8 @@ export const config: FlowConfig = {
     'ClassifyDocument',        // AI classification
     'SummarizeDocument',       // AI summary
     'RiskScoreDocument',       // Risk assessment + conditional routing
+    'AnalyzeDocument',         // Fused classify + summarize + risk (PIPELINE_MODE=fused)
+    'ResumeDocument',          // Restart unfinished documents at their last checkpoint
     'GetPendingReviews',       // Get documents needing review
     'ReviewDocument',          // Human review decision
     'NotifyReview'             // Send notifications
@@ -0,0 +1,136 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.analysis import (
+    build_fused_prompt, parse_json_response,
+    is_fused_mode, DEFAULT_RISK_RESULT, PROMPT_CONTENT_CHARS
+)
+from utils.llm_cache import llm_cache
+from utils.model_router import routed_completion, stats as model_stats
+from utils.content_store import aresolve_content, content_reference
+from utils.chunking import needs_chunking, map_reduce, format_report, CHUNK_DIGEST_CHARS
+from utils.document_repository import save_analysis, save_when_present, DocumentMissing
+from utils.instrumentation import instrumented_step, stage
+from utils.resilience import ProviderUnavailable, park_document
+from utils.work_queue import deferred_to_queue
+
+config = {
+    'name': 'AnalyzeDocument',
+    'type': 'event',
+    'description': 'Fused mode: classifies, summarizes and risk-scores a document in one AI call',
+    'subscribes': ['document.uploaded'],
+    'emits': ['document.classified', 'document.summarized'],
+    'flows': ['document-processing-flow']
+}
+
+@instrumented_step('AnalyzeDocument')
+async def handler(input_data, context):
+    """Run classification, summary and risk scoring as a single Groq request"""
+    
+    # Only active when PIPELINE_MODE=fused; otherwise the sequential steps run
+    if not is_fused_mode():
+        return
+    
+    # In queue mode a queue worker runs this step (scripts/queue_worker.py)
+    if deferred_to_queue(input_data):
+        return
+    
+    try:
+        document_id = input_data.get('document_id')
+        document_type = input_data.get('document_type')
+        # Long documents are read in full and analysed chunk by chunk; otherwise
+        # only the prefix the fused prompt uses is loaded
+        load_full = needs_chunking(input_data.get('content_length'))
+        with stage('load_content'):
+            content = await aresolve_content(input_data, limit=None if load_full else PROMPT_CONTENT_CHARS)
+        
+        context.logger.info(f"⚡ Running fused analysis for: {document_id}")
+        
+        chunk_result = None
+        if needs_chunking(len(content)):
+            chunk_result = await map_reduce(document_type, content, bypass=input_data.get('cache_bypass', False))
+            context.logger.info(f"🧩 Chunked analysis for {document_id}: {format_report(chunk_result['report'])}")
+        
+        if chunk_result and chunk_result['digest']:
+            prompt = build_fused_prompt(document_type, chunk_result['digest'], content_limit=CHUNK_DIGEST_CHARS)
+        else:
+            prompt = build_fused_prompt(document_type, content)
+        
+        # One call returns all three results, so it needs a larger completion budget
+        result_text = await routed_completion(
+            prompt, step='fused', document_type=document_type,
+            content_length=input_data.get('content_length') or len(content),
+            max_tokens=1200, bypass=input_data.get('cache_bypass', False)
+        )
+        
+        context.logger.info(f"🗄️  LLM cache stats (fused): {llm_cache.stats('fused')}")
+        context.logger.info(f"🧭 Model tiering (fused): {model_stats()['steps'].get('fused')}")
+        
+        analysis = parse_json_response(result_text)
+        # The map-reduced classification saw every part, not just the digest
+        classification_result = (chunk_result and chunk_result['classification']) or analysis.get('classification') or {}
+        summary = analysis.get('summary') or ''
+        risk_result = analysis.get('risk') or dict(DEFAULT_RISK_RESULT)
+        
+        total_score = risk_result.get('total_score', 50)
+        risk_level = risk_result.get('risk_level', 'medium')
+        
+        context.logger.info(
+            f"✅ Fused analysis complete: {classification_result.get('document_category', 'unknown')}, "
+            f"summary {len(summary)} chars, risk {total_score}/100 ({risk_level})"
+        )
+        
+        # Write all three results in a single transaction
+        high_risk = await save_when_present(
+            save_analysis, document_id, risk_result, classification_result, summary, missing=None
+        )
+        if high_risk is None:
+            raise DocumentMissing(f"document {document_id} not found when saving the analysis")
+        
+        if high_risk:
+            context.logger.warn(f"⚠️  HIGH RISK DETECTED! Document {document_id} routed to manual review")
+        else:
+            context.logger.info(f"✅ LOW RISK - Document {document_id} auto-approved")
+        
+        reference = content_reference(input_data)
+        
+        # Keep the existing topics flowing for downstream consumers; the
+        # `fused` flag tells SummarizeDocument/RiskScoreDocument to skip
+        await context.emit({
+            'topic': 'document.classified',
+            'data': {
+                'document_id': document_id,
+                'document_type': document_type,
+                **reference,
+                'classification': classification_result,
+                'fused': True
+            }
+        })
+        
+        await context.emit({
+            'topic': 'document.summarized',
+            'data': {
+                'document_id': document_id,
+                'document_type': document_type,
+                **reference,
+                'classification': classification_result,
+                'summary': summary,
+                'risk': risk_result,
+                'fused': True
+            }
+        })
+        
+        context.logger.info(f"🎯 Fused processing complete for: {document_id}")
+        
+    except ProviderUnavailable as e:
+        # Provider degraded: park the document for a later retry instead of dropping it
+        context.logger.warn(f"⏸️  Fused analysis parked for {input_data.get('document_id')}: {str(e)}")
+        await park_document(input_data.get('document_id'), 'fused', str(e))
+        
+    except Exception as e:
+        import traceback
+        context.logger.error(f"❌ Fused analysis failed: {traceback.format_exc()}")
+        # Keep the stages already done; scripts/resume_documents.py restarts from here
+        await park_document(input_data.get('document_id'), 'fused', f"{type(e).__name__}: {e}")
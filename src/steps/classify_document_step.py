@@ -1,14 +1,19 @@
 import os
 import sys
-import json
-from dotenv import load_dotenv
-from groq import Groq
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils.database import SessionLocal, Document, DocumentStatus
-
-load_dotenv(".env")
+from utils.analysis import build_classification_prompt, parse_json_response, is_fused_mode
+from utils.model_router import routed_completion, stats as model_stats
+from utils.llm_cache import llm_cache
+from utils.content_store import aresolve_content, content_reference
+from utils.chunking import needs_chunking, map_reduce, format_report
+from utils.fast_classifier import fast_classify, stats as fast_path_stats
+from utils import similarity
+from utils.document_repository import save_classification, is_write_behind, save_when_present, DocumentMissing
+from utils.instrumentation import instrumented_step, stage
+from utils.resilience import ProviderUnavailable, park_document
+from utils.work_queue import deferred_to_queue
 
 config = {
     'name': 'ClassifyDocument',
@@ -19,68 +24,90 @@ config = {
     'flows': ['document-processing-flow']
 }
 
+@instrumented_step('ClassifyDocument')
 async def handler(input_data, context):
     """Classify document using Groq AI"""
     
+    # In fused mode AnalyzeDocument handles classification, summary and risk in one call
+    if is_fused_mode():
+        return
+    
+    # In queue mode a queue worker runs this step (scripts/queue_worker.py)
+    if deferred_to_queue(input_data):
+        return
+    
     try:
         document_id = input_data.get('document_id')
         document_type = input_data.get('document_type')
-        content = input_data.get('content', '')
+        # Long documents are read in full and analysed chunk by chunk; otherwise
+        # only the prefix the classification prompt uses is loaded, or the
+        # prefix the near-duplicate signature covers if that is longer
+        if needs_chunking(input_data.get('content_length')):
+            limit = None
+        elif similarity.SIMILARITY_ENABLED:
+            limit = max(2000, similarity.SIMILARITY_MAX_CHARS)
+        else:
+            limit = 2000
+        with stage('load_content'):
+            content = await aresolve_content(input_data, limit=limit)
         
         context.logger.info(f"🔍 Classifying document: {document_id}")
         
-        # Get Groq client
-        groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
-        
-        # Classification prompt
-        prompt = f"""You are a document classification AI. Analyze the following {document_type} document and extract key information.
-
-Document Content:
-{content[:2000]}
-
-Extract the following in JSON format:
-- confidence: (float 0-1) Confidence this is a valid {document_type}
-- key_entities: List of important entities (names, dates, amounts, locations)
-- document_category: Specific subcategory (e.g., "personal_loan", "business_loan", "mortgage")
-- requires_review: (boolean) Does this need human review?
-- completeness_score: (float 0-1) How complete is the information?
-
-Return ONLY valid JSON, no markdown formatting."""
-        
-        # Call Groq API
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",  # CHANGED from llama-3.1-70b-versatile
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
-            max_tokens=500
-        )
-        
-        result_text = response.choices[0].message.content
+        chunk_result = None
+        with stage('similarity_lookup'):
+            signature, neighbour = await similarity.lookup(document_id, document_type, content)
+        reuse = None
+        # Fast path first: a confident heuristic result needs no map phase either,
+        # and the summary then reads the document prefix instead of a digest
+        fast_result, short_circuit = fast_classify(document_type, content)
+        if not needs_chunking(len(content)):
+            reuse = similarity.decide(neighbour)
+        elif not short_circuit:
+            chunk_result = await map_reduce(document_type, content, bypass=input_data.get('cache_bypass', False))
+            context.logger.info(f"🧩 Chunked analysis for {document_id}: {format_report(chunk_result['report'])}")
         
-        # Parse JSON response
-        try:
-            classification_result = json.loads(result_text)
-        except json.JSONDecodeError:
-            # Try to extract JSON from markdown code blocks
-            import re
-            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-            if json_match:
-                classification_result = json.loads(json_match.group())
-            else:
-                raise ValueError("Could not parse JSON from AI response")
+        if reuse == 'reuse':
+            # Templated near-duplicate of a finished document: patch its LLM classification
+            classification_result = similarity.patch_classification(neighbour, content)
+            context.logger.info(
+                f"🪞 Near-duplicate of {neighbour['document_id']} (similarity {neighbour['similarity']}), "
+                f"classification reused. Stats: {similarity.stats()}"
+            )
+        elif short_circuit:
+            classification_result = fast_result['classification']
+            context.logger.info(
+                f"⚡ Fast-path classification (confidence {classification_result['confidence']}), "
+                f"LLM skipped. Stats: {fast_path_stats()}"
+            )
+        elif chunk_result and chunk_result['classification']:
+            classification_result = chunk_result['classification']
+        else:
+            # Classification prompt, seeded with a similar document's result when there is one
+            prompt = build_classification_prompt(document_type, content, reference=neighbour if reuse == 'seed' else None)
+            if reuse == 'seed':
+                context.logger.info(
+                    f"🪞 Seeding prompt with {neighbour['document_id']} (similarity {neighbour['similarity']})"
+                )
+            
+            # Call Groq API
+            result_text = await routed_completion(
+                prompt, step='classify', document_type=document_type,
+                content_length=input_data.get('content_length') or len(content),
+                bypass=input_data.get('cache_bypass', False)
+            )
+            
+            context.logger.info(f"🗄️  LLM cache stats (classify): {llm_cache.stats('classify')}")
+            context.logger.info(f"🧭 Model tiering (classify): {model_stats()['steps'].get('classify')}")
+            
+            # Parse JSON response
+            classification_result = parse_json_response(result_text)
         
         context.logger.info(f"✅ Classification complete: {classification_result.get('document_category', 'unknown')}")
         
-        # Update database
-        db = SessionLocal()
-        document = db.query(Document).filter(Document.document_id == document_id).first()
-        
-        if document:
-            document.classification = json.dumps(classification_result)
-            document.status = DocumentStatus.PROCESSING
-            db.commit()
-        
-        db.close()
+        # Update database (in write-behind mode RiskScoreDocument writes it with the rest)
+        if not is_write_behind():
+            if not await save_when_present(save_classification, document_id, classification_result, signature):
+                raise DocumentMissing(f"document {document_id} not found when saving the classification")
         
         # Emit event for next step
         await context.emit({
@@ -88,13 +115,27 @@ Return ONLY valid JSON, no markdown formatting."""
             'data': {
                 'document_id': document_id,
                 'document_type': document_type,
-                'content': content,
-                'classification': classification_result
+                **content_reference(input_data),
+                'classification': classification_result,
+                # Per-part notes stand in for the full text in the summary prompt
+                'chunk_digest': chunk_result['digest'] if chunk_result else None,
+                'chunking': chunk_result['report'] if chunk_result else None,
+                # Heuristic risk; RiskScoreDocument only uses it to escalate to review
+                'risk_prescreen': fast_result['risk'] if fast_result else None,
+                'similarity_signature': signature if is_write_behind() else None,
+                'cache_bypass': input_data.get('cache_bypass', False)
             }
         })
         
         context.logger.info(f"🚀 Classification event emitted for: {document_id}")
         
+    except ProviderUnavailable as e:
+        # Provider degraded: park the document for a later retry instead of dropping it
+        context.logger.warn(f"⏸️  Classification parked for {input_data.get('document_id')}: {str(e)}")
+        await park_document(input_data.get('document_id'), 'classify', str(e))
+        
     except Exception as e:
         import traceback
         context.logger.error(f"❌ Classification failed: {traceback.format_exc()}")
+        # Keep the stages already done; scripts/resume_documents.py restarts from here
+        await park_document(input_data.get('document_id'), 'classify', f"{type(e).__name__}: {e}")
@@ -0,0 +1,42 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.database import run_in_session
+from utils import dashboard
+
+config = {
+    'name': 'GetDashboard',
+    'type': 'api',
+    'path': '/api/v1/dashboard',
+    'method': 'GET',
+    'emits': []
+}
+
+async def handler(req, ctx):
+    """Counts by status and type, risk histogram and averages, read from trigger-maintained counters"""
+
+    try:
+        document_type = (req.get('queryParams') or {}).get('document_type')
+
+        try:
+            stats = await run_in_session(dashboard.summary, document_type)
+        except ValueError as e:
+            return {
+                'status': 400,
+                'body': {'error': f'Invalid document_type: {str(e)}'}
+            }
+
+        return {
+            'status': 200,
+            'body': stats
+        }
+
+    except Exception as e:
+        import traceback
+        ctx.logger.error(f"❌ Error loading dashboard: {traceback.format_exc()}")
+        return {
+            'status': 500,
+            'body': {'error': f'Failed to load dashboard: {str(e)}'}
+        }
@@ -0,0 +1,14 @@
+config = {
+    'name': 'documentSummary',
+    'schema': {
+        'type': 'object',
+        'properties': {
+            'document_id': {'type': 'string'},
+            'status': {'type': 'string', 'enum': ['streaming', 'complete', 'failed']},
+            'text': {'type': 'string'},
+            'updated_at': {'type': 'string'}
+        },
+        'required': ['document_id', 'status', 'text', 'updated_at']
+    },
+    'baseConfig': {'storageType': 'default'}
+}
@@ -1,6 +1,7 @@
 import type { ApiRouteConfig } from 'motia';
 import { z } from 'zod';
 import { Pool } from 'pg';
+import { blobJoin, decodeBlob } from '../utils/document_blobs';
 
 // PostgreSQL connection
 const pool = new Pool({
@@ -49,7 +50,13 @@ export const handler = async (req: any, { logger }: any) => {
     
     // Query database
     const result = await pool.query(
-      'SELECT * FROM documents WHERE document_id = $1',
+      `SELECT d.*,
+              t.data AS extracted_text_data, t.codec AS extracted_text_codec,
+              s.data AS ai_summary_data, s.codec AS ai_summary_codec
+       FROM documents d
+       ${blobJoin('extracted_text', 't')}
+       ${blobJoin('ai_summary', 's')}
+       WHERE d.document_id = $1`,
       [documentId]
     );
     
@@ -62,6 +69,8 @@ export const handler = async (req: any, { logger }: any) => {
     }
     
     const doc = result.rows[0];
+    const extractedText = decodeBlob(doc.extracted_text_data, doc.extracted_text_codec, doc.extracted_text);
+    const aiSummary = decodeBlob(doc.ai_summary_data, doc.ai_summary_codec, doc.ai_summary);
     
     logger.info(`📊 Retrieved document: ${documentId}`);
     
@@ -72,10 +81,10 @@ export const handler = async (req: any, { logger }: any) => {
         filename: doc.filename,
         document_type: doc.document_type,
         status: doc.status,
-        extracted_text: doc.extracted_text ? 
-          (doc.extracted_text.length > 200 ? doc.extracted_text.substring(0, 200) + '...' : doc.extracted_text) 
+        extracted_text: extractedText ? 
+          (extractedText.length > 200 ? extractedText.substring(0, 200) + '...' : extractedText) 
           : null,
-        ai_summary: doc.ai_summary,
+        ai_summary: aiSummary,
         risk_score: doc.risk_score,
         uploaded_at: doc.uploaded_at?.toISOString() || new Date().toISOString(),
         processed_at: doc.processed_at?.toISOString() || null,
@@ -1,6 +1,7 @@
 import type { ApiRouteConfig } from 'motia';
 import { z } from 'zod';
 import { Pool } from 'pg';
+import { blobJoin, decodeBlob } from '../utils/document_blobs';
 
 const pool = new Pool({
   user: 'docflow',
@@ -38,11 +39,13 @@ export const handler = async (req: any, { logger }: any) => {
   try {
     // Query for documents with status = PENDING_REVIEW
     const result = await pool.query(
-      `SELECT document_id, filename, document_type, status, risk_score, 
-              ai_summary, reviewer_comments, uploaded_at, processed_at
-       FROM documents 
-       WHERE status = 'PENDING_REVIEW'
-       ORDER BY uploaded_at DESC`,
+      `SELECT d.document_id, d.filename, d.document_type, d.status, d.risk_score, 
+              d.ai_summary, s.data AS ai_summary_data, s.codec AS ai_summary_codec,
+              d.reviewer_comments, d.uploaded_at, d.processed_at
+       FROM documents d
+       ${blobJoin('ai_summary', 's')}
+       WHERE d.status = 'PENDING_REVIEW'
+       ORDER BY d.uploaded_at DESC`,
       []
     );
     
@@ -56,7 +59,7 @@ export const handler = async (req: any, { logger }: any) => {
           filename: doc.filename,
           document_type: doc.document_type,
           risk_score: doc.risk_score,
-          ai_summary: doc.ai_summary,
+          ai_summary: decodeBlob(doc.ai_summary_data, doc.ai_summary_codec, doc.ai_summary),
           reviewer_comments: doc.reviewer_comments,
           uploaded_at: doc.uploaded_at?.toISOString() || new Date().toISOString(),
           processed_at: doc.processed_at?.toISOString() || null
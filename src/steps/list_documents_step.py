@@ -1,9 +1,13 @@
 import sys
 import os
+import json
+import base64
+from datetime import datetime
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils.database import SessionLocal, Document, DocumentStatus
+from sqlalchemy import and_, or_, tuple_
+from utils.database import run_in_session, Document, DocumentStatus
 
 config = {
     'name': 'ListDocuments',
@@ -13,28 +17,86 @@ config = {
     'emits': []
 }
 
+MAX_LIMIT = 500
+
+def encode_cursor(uploaded_at, row_id):
+    """Opaque keyset cursor for the last row of a page"""
+    payload = json.dumps([uploaded_at.isoformat() if uploaded_at else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    uploaded_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return (datetime.fromisoformat(uploaded_at) if uploaded_at is not None else None), int(row_id)
+
+def seek_after(uploaded_at, row_id):
+    """Rows that sort after the cursor row
+
+    Documents without uploaded_at come first (NULLS FIRST, PostgreSQL's order
+    for the descending uploaded_at indexes), newest id first among themselves.
+    """
+    if uploaded_at is None:
+        return or_(
+            and_(Document.uploaded_at.is_(None), Document.id < row_id),
+            Document.uploaded_at.isnot(None)
+        )
+    return tuple_(Document.uploaded_at, Document.id) < tuple_(uploaded_at, row_id)
+
 async def handler(req, ctx):
-    """List all documents with optional status filter"""
+    """List documents with optional status filter, newest first, using keyset pagination"""
     
     try:
         # FIXED: Use correct key names
         status_filter = req['queryParams'].get('status')
-        limit = int(req['queryParams'].get('limit', 50))
+        try:
+            limit = min(max(int(req['queryParams'].get('limit', 50)), 1), MAX_LIMIT)
+        except (ValueError, TypeError):
+            return {
+                'status': 400,
+                'body': {'error': 'limit must be a number'}
+            }
+        cursor = req['queryParams'].get('cursor')
         
-        db = SessionLocal()
-        query = db.query(Document)
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except (ValueError, TypeError):
+            return {
+                'status': 400,
+                'body': {'error': 'Invalid cursor'}
+            }
         
-        # Apply status filter if provided
-        if status_filter:
-            try:
-                status_enum = DocumentStatus[status_filter.upper()]
-                query = query.filter(Document.status == status_enum)
-            except KeyError:
-                pass  # Invalid status, ignore filter
+        def _list(db):
+            # Only the columns the response needs; the large text columns are never read
+            query = db.query(
+                Document.id,
+                Document.document_id,
+                Document.filename,
+                Document.document_type,
+                Document.status,
+                Document.risk_score,
+                Document.uploaded_at
+            )
+            
+            # Apply status filter if provided
+            if status_filter:
+                try:
+                    status_enum = DocumentStatus[status_filter.upper()]
+                    query = query.filter(Document.status == status_enum)
+                except KeyError:
+                    pass  # Invalid status, ignore filter
+            
+            # Seek past the previous page instead of OFFSET scanning
+            if after:
+                query = query.filter(seek_after(*after))
+            
+            # Fetch one extra row to know whether another page exists
+            return query.order_by(Document.uploaded_at.desc().nulls_first(), Document.id.desc()).limit(limit + 1).all()
         
-        # Get documents
-        documents = query.order_by(Document.uploaded_at.desc()).limit(limit).all()
-        db.close()
+        rows = await run_in_session(_list)
+        documents = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = documents[-1]
+            next_cursor = encode_cursor(last.uploaded_at, last.id)
         
         ctx.logger.info(f"📋 Listed {len(documents)} documents")
         
@@ -53,6 +115,7 @@ async def handler(req, ctx):
                     for doc in documents
                 ],
                 'total': len(documents),
+                'next_cursor': next_cursor,
                 'filters_applied': {'status': status_filter} if status_filter else {}
             }
         }
@@ -0,0 +1,54 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.instrumentation import collect, render_prometheus
+
+config = {
+    'name': 'Metrics',
+    'type': 'api',
+    'path': '/api/v1/metrics',
+    'method': 'GET',
+    'emits': []
+}
+
+async def handler(req, ctx):
+    """Prometheus metrics, or per-document stage timings with ?format=json"""
+
+    try:
+        params = req.get('queryParams') or {}
+        merged = collect()
+
+        if params.get('format') != 'json':
+            return {
+                'status': 200,
+                'headers': {'Content-Type': 'text/plain; version=0.0.4'},
+                'body': render_prometheus(merged)
+            }
+
+        try:
+            limit = max(int(params.get('limit', 50)), 1)
+        except ValueError:
+            return {
+                'status': 400,
+                'body': {'error': 'limit must be a number'}
+            }
+
+        recent = merged['recent']
+        document_id = params.get('document_id')
+        if document_id:
+            recent = [entry for entry in recent if entry['document_id'] == document_id]
+
+        return {
+            'status': 200,
+            'body': {'recent': recent[-limit:]}
+        }
+
+    except Exception as e:
+        import traceback
+        ctx.logger.error(f"❌ Error collecting metrics: {traceback.format_exc()}")
+        return {
+            'status': 500,
+            'body': {'error': f'Failed to collect metrics: {str(e)}'}
+        }
@@ -0,0 +1,26 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.content_store import apurge_content, CONTENT_STORE_MAX_AGE_HOURS
+
+config = {
+    'name': 'PurgeContentStore',
+    'type': 'cron',
+    'description': 'Deletes content store blobs older than CONTENT_STORE_MAX_AGE_HOURS',
+    'cron': os.getenv('CONTENT_STORE_PURGE_CRON', '43 * * * *'),
+    'emits': [],
+    'flows': ['document-processing-flow']
+}
+
+async def handler(context):
+    """Delete blobs no document in flight still needs"""
+
+    try:
+        removed = await apurge_content()
+        context.logger.info(f"🧹 Purged {removed} content blobs older than {CONTENT_STORE_MAX_AGE_HOURS:g}h")
+
+    except Exception:
+        import traceback
+        context.logger.error(f"❌ Content store purge failed: {traceback.format_exc()}")
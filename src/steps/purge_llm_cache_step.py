@@ -0,0 +1,29 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.llm_cache import llm_cache, LLM_CACHE_PERSISTENT
+
+config = {
+    'name': 'PurgeLLMCache',
+    'type': 'cron',
+    'description': 'Deletes expired rows from the persistent LLM response cache',
+    'cron': os.getenv('LLM_CACHE_PURGE_CRON', '17 * * * *'),
+    'emits': [],
+    'flows': ['document-processing-flow']
+}
+
+async def handler(context):
+    """Delete llm_cache rows past their expires_at"""
+
+    if not LLM_CACHE_PERSISTENT:
+        return
+
+    try:
+        removed = await llm_cache.apurge_expired()
+        context.logger.info(f"🧹 Purged {removed} expired LLM cache entries")
+
+    except Exception:
+        import traceback
+        context.logger.error(f"❌ LLM cache purge failed: {traceback.format_exc()}")
@@ -0,0 +1,51 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.checkpoints import find_resumable, resume_event, enqueue_resume, RESUME_BATCH_SIZE
+from utils.database import run_in_session
+from utils.instrumentation import instrumented_step
+from utils.work_queue import WORK_QUEUE_ENABLED
+
+config = {
+    'name': 'ResumeDocument',
+    'type': 'event',
+    'description': 'Restarts unfinished documents at their first incomplete stage',
+    'subscribes': ['document.resume'],
+    'emits': ['document.uploaded', 'document.classified', 'document.summarized'],
+    'flows': ['document-processing-flow']
+}
+
+@instrumented_step('ResumeDocument')
+async def handler(input_data, context):
+    """Resume one document ({document_id}) or sweep up to `limit` resumable ones ({limit})"""
+    
+    try:
+        force = bool(input_data.get('force'))
+        if input_data.get('document_id'):
+            document_ids = [input_data['document_id']]
+        else:
+            limit = int(input_data.get('limit') or RESUME_BATCH_SIZE)
+            document_ids = [row.document_id for row in await run_in_session(find_resumable, limit)]
+        
+        resumed = 0
+        for document_id in document_ids:
+            event = await run_in_session(resume_event, document_id, force=force)
+            if event is None:
+                context.logger.info(f"⏭️  Nothing to resume for {document_id}")
+                continue
+            
+            # Restart at the first unfinished stage; earlier results come from the database
+            if WORK_QUEUE_ENABLED:
+                await enqueue_resume(event)
+            else:
+                await context.emit(event)
+            resumed += 1
+            context.logger.info(f"🔁 Resuming {document_id} from {event['data']['resumed_from'] or 'the start'} ({event['topic']})")
+        
+        context.logger.info(f"✅ Resumed {resumed}/{len(document_ids)} documents")
+        
+    except Exception as e:
+        import traceback
+        context.logger.error(f"❌ Resume failed: {traceback.format_exc()}")
@@ -1,16 +1,15 @@
 import os
 import sys
-import json
-import re
-from datetime import datetime
-from dotenv import load_dotenv
-from groq import Groq
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils.database import SessionLocal, Document, DocumentStatus
-
-load_dotenv(".env")
+from utils.analysis import build_risk_prompt, parse_json_response, DEFAULT_RISK_RESULT
+from utils.model_router import routed_completion, stats as model_stats
+from utils.llm_cache import llm_cache
+from utils.fast_classifier import should_escalate
+from utils.document_repository import save_analysis, pending_state, save_when_present, DocumentMissing
+from utils.instrumentation import instrumented_step
+from utils.resilience import ProviderUnavailable, park_document
 
 config = {
     'name': 'RiskScoreDocument',
@@ -21,110 +20,75 @@ config = {
     'flows': ['document-processing-flow']
 }
 
+@instrumented_step('RiskScoreDocument')
 async def handler(input_data, context):
     """Calculate risk score and conditionally route"""
     
+    # Fused events were already scored and routed by AnalyzeDocument
+    if input_data.get('fused'):
+        return
+    
     try:
         document_id = input_data.get('document_id')
         document_type = input_data.get('document_type')
-        content = input_data.get('content', '')
         classification = input_data.get('classification', {})
         summary = input_data.get('summary', '')
         
         context.logger.info(f"⚖️  Calculating risk score for: {document_id}")
         
-        # Get Groq client
-        groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
-        
-        # Risk scoring prompt
-        prompt = f"""You are a risk assessment AI for {document_type} documents. Analyze the following and assign a risk score.
-
-Document Summary:
-{summary[:1000]}
-
-Classification Info:
-{json.dumps(classification, indent=2)}
-
-Evaluate risk factors:
-1. **Completeness**: Is all required information present? (0-25 points)
-2. **Compliance**: Does it meet regulatory standards? (0-25 points)
-3. **Financial Viability**: Are amounts/terms reasonable? (0-25 points)
-4. **Red Flags**: Any suspicious or concerning items? (0-25 points)
-
-Return ONLY a JSON object with this exact structure:
-{{
-  "total_score": <0-100>,
-  "risk_level": "low|medium|high|critical",
-  "factors": {{
-    "completeness": <0-25>,
-    "compliance": <0-25>,
-    "financial_viability": <0-25>,
-    "red_flags": <0-25>
-  }},
-  "concerns": ["list of specific concerns"],
-  "recommendations": ["list of recommendations"]
-}}
-
-Higher score = HIGHER risk (0 = safe, 100 = dangerous). Return ONLY valid JSON."""
-        
-        # Call Groq API
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",  # CHANGED from llama-3.1-70b-versatile
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
-            max_tokens=500
-        )
-        
-        result_text = response.choices[0].message.content
-        
-        # Parse JSON response
-        try:
-            risk_result = json.loads(result_text)
-        except json.JSONDecodeError:
-            # Try to extract JSON from markdown code blocks
-            json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-            if json_match:
-                risk_result = json.loads(json_match.group())
-            else:
+        risk_prescreen = input_data.get('risk_prescreen')
+        if should_escalate(risk_prescreen):
+            # Obvious red flags: send to human review without spending an LLM call
+            risk_result = risk_prescreen
+            context.logger.info(f"⚡ Fast-path risk pre-screen escalated: {', '.join(risk_prescreen.get('concerns', []))}")
+        else:
+            # Risk scoring prompt
+            prompt = build_risk_prompt(document_type, summary, classification)
+            
+            # Call Groq API
+            # Scores near the review threshold are re-scored by the large model
+            result_text = await routed_completion(
+                prompt, step='risk_score', document_type=document_type,
+                content_length=input_data.get('content_length'), bypass=input_data.get('cache_bypass', False)
+            )
+            
+            context.logger.info(f"🗄️  LLM cache stats (risk_score): {llm_cache.stats('risk_score')}")
+            context.logger.info(f"🧭 Model tiering (risk_score): {model_stats()['steps'].get('risk_score')}")
+            
+            # Parse JSON response
+            try:
+                risk_result = parse_json_response(result_text)
+            except ValueError:
                 # Fallback default score
-                risk_result = {
-                    "total_score": 50,
-                    "risk_level": "medium",
-                    "factors": {"completeness": 12, "compliance": 12, "financial_viability": 13, "red_flags": 13},
-                    "concerns": ["Automated scoring failed"],
-                    "recommendations": ["Manual review required"]
-                }
+                risk_result = dict(DEFAULT_RISK_RESULT)
         
         total_score = risk_result.get('total_score', 50)
         risk_level = risk_result.get('risk_level', 'medium')
         
         context.logger.info(f"📊 Risk Score: {total_score}/100 ({risk_level})")
         
-        # Update database with conditional routing
-        db = SessionLocal()
-        document = db.query(Document).filter(Document.document_id == document_id).first()
-        
-        if document:
-            document.risk_score = float(total_score)
-            document.processed_at = datetime.utcnow()
-            
-            # Conditional routing based on risk level
-            if total_score >= 70:  # High risk if score >= 70
-                document.status = DocumentStatus.PENDING_REVIEW
-                document.reviewer_comments = f"⚠️ High risk detected (Score: {total_score}/100, Level: {risk_level}). {', '.join(risk_result.get('concerns', []))}"
-                context.logger.warn(f"⚠️  HIGH RISK DETECTED! Document {document_id} routed to manual review")
-            else:
-                document.status = DocumentStatus.APPROVED
-                document.approved_at = datetime.utcnow()
-                document.reviewer_comments = f"✅ Auto-approved (Risk Score: {total_score}/100, Level: {risk_level}). Lower score = lower risk."
-                context.logger.info(f"✅ LOW RISK - Document {document_id} auto-approved")
-            
-            db.commit()
+        # Update database with conditional routing; in write-behind mode the
+        # classification and summary carried by the event go in the same transaction
+        high_risk = await save_when_present(
+            save_analysis, document_id, risk_result, missing=None, **pending_state(input_data)
+        )
+        if high_risk is None:
+            raise DocumentMissing(f"document {document_id} not found when saving the risk decision")
         
-        db.close()
+        if high_risk:
+            context.logger.warn(f"⚠️  HIGH RISK DETECTED! Document {document_id} routed to manual review")
+        else:
+            context.logger.info(f"✅ LOW RISK - Document {document_id} auto-approved")
         
         context.logger.info(f"🎯 Processing complete for: {document_id}")
         
+    except ProviderUnavailable as e:
+        # Provider degraded: park the document for a later retry instead of dropping it
+        context.logger.warn(f"⏸️  Risk scoring parked for {input_data.get('document_id')}: {str(e)}")
+        await park_document(input_data.get('document_id'), 'risk_score', str(e), **pending_state(input_data))
+        
     except Exception as e:
         import traceback
         context.logger.error(f"❌ Risk scoring failed: {traceback.format_exc()}")
+        # Keep the stages already done; scripts/resume_documents.py restarts from here
+        await park_document(input_data.get('document_id'), 'risk_score', f"{type(e).__name__}: {e}", **pending_state(input_data))
@@ -3,7 +3,11 @@ import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils.database import SessionLocal, Document, DocumentType, DocumentStatus
+from utils.content_store import aresolve_content
+from utils.database import run_in_session, DocumentType, DocumentStatus
+from utils.document_repository import insert_document
+from utils.instrumentation import instrumented_step, stage
+from utils.work_queue import WORK_QUEUE_ENABLED, enqueue_document
 from datetime import datetime
 
 config = {
@@ -15,6 +19,7 @@ config = {
     'flows': ['document-processing-flow']
 }
 
+@instrumented_step('SaveDocument')
 async def handler(input_data, context):
     """Save document metadata to database"""
     
@@ -23,51 +28,39 @@ async def handler(input_data, context):
         filename = input_data.get('filename')
         document_type = input_data.get('document_type')
         file_path = input_data.get('file_path', '')
-        content = input_data.get('content', '')
+        with stage('load_content'):
+            content = await aresolve_content(input_data)
         
         context.logger.info(f"💾 Saving document to database: {document_id}")
         
-        # Save to database
-        db = SessionLocal()
-        
         try:
             doc_type = DocumentType[document_type.upper()]
         except KeyError:
             context.logger.error(f"Invalid document type: {document_type}")
-            db.close()
             return
         
-        # Check if document already exists
-        existing_doc = db.query(Document).filter(Document.document_id == document_id).first()
+        # Save to database (single INSERT ... ON CONFLICT DO NOTHING plus the text blob)
+        values = {
+            'document_id': document_id,
+            'filename': filename,
+            'document_type': doc_type,
+            'status': DocumentStatus.UPLOADED,
+            'file_path': file_path,
+            'uploaded_at': datetime.utcnow(),
+            'file_size': input_data.get('file_size'),
+            'file_type': input_data.get('file_type')
+        }
         
-        if existing_doc:
+        if not await run_in_session(insert_document, values, content):
             context.logger.warning(f"Document {document_id} already exists, skipping save")
-            db.close()
             return
         
-        # Create new document record
-        db_document = Document(
-            document_id=document_id,
-            filename=filename,
-            document_type=doc_type,
-            status=DocumentStatus.UPLOADED,
-            file_path=file_path,
-            uploaded_at=datetime.utcnow(),
-            file_size=input_data.get('file_size'),
-            file_type=input_data.get('file_type') 
-        )
-        
-        # If content was passed, store it as extracted_text for now
-        if content:
-            db_document.extracted_text = content
-        
-        db.add(db_document)
-        db.commit()
-        db.refresh(db_document)
-        db.close()
-        
         context.logger.info(f"✅ Document saved to database: {document_id}")
         
+        # In queue mode the AI steps run on the queue workers once the row exists
+        if WORK_QUEUE_ENABLED and await enqueue_document(input_data):
+            context.logger.info(f"📥 Queued for processing: {document_id}")
+        
     except Exception as e:
         import traceback
         context.logger.error(f"❌ Failed to save document: {traceback.format_exc()}")
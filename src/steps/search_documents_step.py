@@ -0,0 +1,87 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.database import run_in_session
+from utils import search
+
+config = {
+    'name': 'SearchDocuments',
+    'type': 'api',
+    'path': '/api/v1/documents/search',
+    'method': 'GET',
+    'emits': []
+}
+
+MAX_LIMIT = 100
+
+async def handler(req, ctx):
+    """Full-text search over extracted text and summaries with entity/amount filters, best match first"""
+
+    try:
+        params = req.get('queryParams') or {}
+        q = (params.get('q') or '').strip() or None
+        # ?entity=Acme Corp, repeated or comma-separated; all must be present
+        entity_param = params.get('entity') or []
+        entities = [e.strip() for value in (entity_param if isinstance(entity_param, list) else [entity_param])
+                    for e in value.split(',') if e.strip()]
+
+        try:
+            limit = min(max(int(params.get('limit', 20)), 1), MAX_LIMIT)
+            offset = max(int(params.get('offset', 0)), 0)
+            min_amount = float(params['min_amount']) if params.get('min_amount') else None
+        except ValueError:
+            return {
+                'status': 400,
+                'body': {'error': 'limit, offset and min_amount must be numbers'}
+            }
+
+        if not (q or entities or min_amount is not None):
+            return {
+                'status': 400,
+                'body': {'error': 'Provide q, entity or min_amount'}
+            }
+
+        def _search(db):
+            if not search.supported(db):
+                return None
+            return search.search(
+                db, q=q, entities=entities, document_type=params.get('document_type'),
+                status=params.get('status'), min_amount=min_amount, limit=limit, offset=offset
+            )
+
+        try:
+            result = await run_in_session(_search)
+        except ValueError as e:
+            return {
+                'status': 400,
+                'body': {'error': f'Invalid filter: {str(e)}'}
+            }
+
+        if result is None:
+            return {
+                'status': 501,
+                'body': {'error': 'Search requires PostgreSQL'}
+            }
+
+        ctx.logger.info(f"🔎 Search '{q or ''}' {entities or ''} returned {len(result['hits'])} hits")
+
+        return {
+            'status': 200,
+            'body': {
+                'hits': result['hits'],
+                'returned': len(result['hits']),
+                'limit': limit,
+                'offset': offset,
+                'next_offset': offset + limit if result['has_more'] else None
+            }
+        }
+
+    except Exception as e:
+        import traceback
+        ctx.logger.error(f"❌ Error searching documents: {traceback.format_exc()}")
+        return {
+            'status': 500,
+            'body': {'error': f'Failed to search documents: {str(e)}'}
+        }
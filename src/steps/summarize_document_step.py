@@ -1,13 +1,17 @@
 import os
 import sys
-from dotenv import load_dotenv
-from groq import Groq
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from utils.database import SessionLocal, Document
-
-load_dotenv(".env")
+from utils.analysis import build_summary_prompt, PROMPT_CONTENT_CHARS
+from utils.model_router import routed_completion, stats as model_stats
+from utils.llm_cache import llm_cache
+from utils.content_store import aresolve_content, content_reference
+from utils.chunking import CHUNK_DIGEST_CHARS
+from utils.document_repository import save_summary, is_write_behind, pending_state, save_when_present, DocumentMissing
+from utils.instrumentation import instrumented_step, stage
+from utils.resilience import ProviderUnavailable, park_document
+from utils.summary_stream import SummaryPublisher, SUMMARY_STREAMING_ENABLED
 
 config = {
     'name': 'SummarizeDocument',
@@ -18,62 +22,54 @@ config = {
     'flows': ['document-processing-flow']
 }
 
+@instrumented_step('SummarizeDocument')
 async def handler(input_data, context):
     """Generate AI summary using Groq"""
     
+    # Fused events already carry the summary and were persisted by AnalyzeDocument
+    if input_data.get('fused'):
+        return
+    
+    publisher = SummaryPublisher(context, input_data.get('document_id')) if SUMMARY_STREAMING_ENABLED else None
+    
     try:
         document_id = input_data.get('document_id')
         document_type = input_data.get('document_type')
-        content = input_data.get('content', '')
         classification = input_data.get('classification', {})
+        chunk_digest = input_data.get('chunk_digest')
         
         context.logger.info(f"📝 Generating summary for: {document_id}")
         
-        # Get Groq client
-        groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
+        if chunk_digest:
+            # Long document: summarize the per-part notes covering the whole text
+            prompt = build_summary_prompt(document_type, chunk_digest, classification, content_limit=CHUNK_DIGEST_CHARS)
+        else:
+            # Only the prefix the summary prompt uses is loaded
+            with stage('load_content'):
+                content = await aresolve_content(input_data, limit=PROMPT_CONTENT_CHARS)
+            
+            # Summarization prompt
+            prompt = build_summary_prompt(document_type, content, classification)
         
-        # Get key entities from classification
-        key_entities = classification.get('key_entities', [])
-        entities_text = "\n".join([f"- {entity}" for entity in key_entities])
-        
-        # Summarization prompt
-        prompt = f"""You are a financial document analyst. Create a concise, professional summary of this {document_type}.
-
-Document Content:
-{content[:3000]}
-
-Key Entities Already Identified:
-{entities_text}
-
-Provide a structured summary with:
-1. **Overview** (2-3 sentences): What is this document about?
-2. **Key Details**: Most important information (amounts, dates, parties involved)
-3. **Action Items**: What decisions need to be made?
-4. **Red Flags**: Any concerns or unusual items?
-
-Keep the summary under 300 words. Use bullet points for clarity. Be professional and concise."""
-        
-        # Call Groq API
-        response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",  # CHANGED from llama-3.1-70b-versatile
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
-            max_tokens=500
+        # Call Groq API, streaming partial text to subscribed clients as it is generated
+        summary = await routed_completion(
+            prompt, step='summarize', document_type=document_type,
+            content_length=input_data.get('content_length'), bypass=input_data.get('cache_bypass', False),
+            on_delta=publisher.on_delta if publisher and publisher.enabled else None
         )
         
-        summary = response.choices[0].message.content
+        context.logger.info(f"🗄️  LLM cache stats (summarize): {llm_cache.stats('summarize')}")
+        context.logger.info(f"🧭 Model tiering (summarize): {model_stats()['steps'].get('summarize')}")
         
         context.logger.info(f"✅ Summary generated ({len(summary)} chars)")
         
-        # Update database
-        db = SessionLocal()
-        document = db.query(Document).filter(Document.document_id == document_id).first()
+        # Update database (in write-behind mode RiskScoreDocument writes it with the rest)
+        if not is_write_behind():
+            if not await save_when_present(save_summary, document_id, summary):
+                raise DocumentMissing(f"document {document_id} not found when saving the summary")
         
-        if document:
-            document.ai_summary = summary
-            db.commit()
-        
-        db.close()
+        if publisher:
+            await publisher.finish(summary)
         
         # Emit event for risk scoring
         await context.emit({
@@ -81,14 +77,28 @@ Keep the summary under 300 words. Use bullet points for clarity. Be professional
             'data': {
                 'document_id': document_id,
                 'document_type': document_type,
-                'content': content,
+                **content_reference(input_data),
                 'classification': classification,
-                'summary': summary
+                'summary': summary,
+                'risk_prescreen': input_data.get('risk_prescreen'),
+                'similarity_signature': input_data.get('similarity_signature'),
+                'cache_bypass': input_data.get('cache_bypass', False)
             }
         })
         
         context.logger.info(f"🚀 Summary event emitted for: {document_id}")
         
+    except ProviderUnavailable as e:
+        # Provider degraded: park the document for a later retry instead of dropping it
+        context.logger.warn(f"⏸️  Summarization parked for {input_data.get('document_id')}: {str(e)}")
+        await park_document(input_data.get('document_id'), 'summarize', str(e), **pending_state(input_data))
+        if publisher:
+            await publisher.finish(status='failed')
+        
     except Exception as e:
         import traceback
         context.logger.error(f"❌ Summarization failed: {traceback.format_exc()}")
+        # Keep the stages already done; scripts/resume_documents.py restarts from here
+        await park_document(input_data.get('document_id'), 'summarize', f"{type(e).__name__}: {e}", **pending_state(input_data))
+        if publisher:
+            await publisher.finish(status='failed')
@@ -1,6 +1,8 @@
 import type { ApiRouteConfig, Handlers } from 'motia';
 import { z } from 'zod';
 import { randomBytes } from 'crypto';
+import { putContent } from '../utils/content_store';
+import { backpressureResponse } from '../utils/work_queue';
 
 export const config: ApiRouteConfig = {
   name: 'UploadDocument',
@@ -21,6 +23,11 @@ export const config: ApiRouteConfig = {
     }),
     500: z.object({
       error: z.string()
+    }),
+    503: z.object({
+      error: z.string(),
+      queue_depth: z.number(),
+      retry_after: z.number()
     })
   }
 };
@@ -41,10 +48,21 @@ export const handler: Handlers['UploadDocument'] = async (req, { emit, logger })
       };
     }
 
+    // Shed load before storing anything when the processing queue is full
+    const rejected = await backpressureResponse(logger);
+    if (rejected) {
+      return rejected;
+    }
+
     // Generate document ID
     const documentId = `doc_${randomBytes(6).toString('hex')}`;
     logger.info(`📄 Document uploaded: ${documentId} (${filename})`);
 
+    // Store the text once; the event only carries a reference to it
+    const contentReference = content
+      ? putContent(content)
+      : { content_ref: null, content_length: 0 };
+
     // Emit event for processing
     await emit({
       topic: 'document.uploaded',
@@ -52,7 +70,7 @@ export const handler: Handlers['UploadDocument'] = async (req, { emit, logger })
         document_id: documentId,
         document_type: documentType,
         filename: filename,
-        content: content || ''
+        ...contentReference
       }
     });
 
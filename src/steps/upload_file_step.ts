@@ -3,6 +3,8 @@ import { z } from 'zod';
 import { randomBytes } from 'crypto';
 import { writeFileSync, mkdirSync, existsSync, readFileSync } from 'fs';
 import { join } from 'path';
+import { putContent } from '../utils/content_store';
+import { backpressureResponse } from '../utils/work_queue';
 
 export const config: ApiRouteConfig = {
   name: 'UploadFile',
@@ -25,6 +27,11 @@ export const config: ApiRouteConfig = {
     }),
     500: z.object({
       error: z.string()
+    }),
+    503: z.object({
+      error: z.string(),
+      queue_depth: z.number(),
+      retry_after: z.number()
     })
   }
 };
@@ -78,6 +85,12 @@ export const handler = async (req: any, { emit, logger }: any) => {
       };
     }
 
+    // Shed load before writing the file when the processing queue is full
+    const rejected = await backpressureResponse(logger);
+    if (rejected) {
+      return rejected;
+    }
+
     // Create directories
     // ✅ Use /tmp in production, ./uploads in development
     const UPLOAD_DIR = process.env.NODE_ENV === 'production' 
@@ -133,7 +146,7 @@ export const handler = async (req: any, { emit, logger }: any) => {
         document_id: documentId,
         document_type: documentType,
         filename: filename,
-        content: extractedText,
+        ...putContent(extractedText),
         file_path: filePath,
         file_size: fileSize,
         file_type: fileExtension
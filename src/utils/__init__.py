@@ -0,0 +1,14 @@
+"""Shared runtime for the Python steps.
+
+Configuration is loaded from .env once, here, before any utils module reads
+os.environ. Everything expensive is created on first use and then shared by
+every step in the process: the SQLAlchemy engine and session factory
+(utils.database.get_engine / SessionLocal), the Groq client and SDK
+(utils.groq_client.get_async_client), and the groq exception types used by
+utils.resilience. Importing a step therefore costs only what its module
+actually needs; measure it with `python benchmarks/run_benchmarks.py --only startup`.
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
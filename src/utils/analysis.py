@@ -0,0 +1,226 @@
+"""Prompt construction, LLM calls and result handling shared by the AI steps"""
+
+import json
+import os
+import re
+from datetime import datetime
+from typing import Callable, Optional
+
+from utils.database import DocumentStatus
+from utils.groq_client import chat_completion, stream_chat_completion
+from utils.llm_cache import llm_cache, make_cache_key
+from utils.resilience import resilient_call
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"  # CHANGED from llama-3.1-70b-versatile
+
+# "sequential" runs classify -> summarize -> risk score as three Groq calls,
+# "fused" runs one structured call (see analyze_document_step.py)
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "sequential").lower()
+# Document text the summary and fused prompts include (~2000 tokens); longer
+# documents are map-reduced instead (CHUNK_THRESHOLD_CHARS)
+PROMPT_CONTENT_CHARS = int(os.getenv("PROMPT_CONTENT_CHARS", "8000"))
+
+# Documents scoring at or above this are routed to manual review
+HIGH_RISK_THRESHOLD = 70
+
+DEFAULT_RISK_RESULT = {
+    "total_score": 50,
+    "risk_level": "medium",
+    "factors": {"completeness": 12, "compliance": 12, "financial_viability": 13, "red_flags": 13},
+    "concerns": ["Automated scoring failed"],
+    "recommendations": ["Manual review required"]
+}
+
+
+def is_fused_mode() -> bool:
+    return PIPELINE_MODE == "fused"
+
+
+def build_classification_prompt(document_type: str, content: str, reference: Optional[dict] = None) -> str:
+    """`reference` is a near-duplicate's {classification, similarity} used as a starting point"""
+    reference_text = ""
+    if reference:
+        reference_text = f"""
+A near-identical {document_type} ({reference['similarity']:.0%} text similarity) was previously classified as:
+{json.dumps(reference['classification'], indent=2)}
+Use it as a starting point, but check every field against this document: names, amounts and dates may differ.
+"""
+
+    return f"""You are a document classification AI. Analyze the following {document_type} document and extract key information.
+
+Document Content:
+{content[:2000]}
+{reference_text}
+Extract the following in JSON format:
+- confidence: (float 0-1) Confidence this is a valid {document_type}
+- key_entities: List of important entities (names, dates, amounts, locations)
+- document_category: Specific subcategory (e.g., "personal_loan", "business_loan", "mortgage")
+- requires_review: (boolean) Does this need human review?
+- completeness_score: (float 0-1) How complete is the information?
+
+Return ONLY valid JSON, no markdown formatting."""
+
+
+def build_summary_prompt(document_type: str, content: str, classification: dict,
+                         content_limit: int = PROMPT_CONTENT_CHARS) -> str:
+    key_entities = classification.get('key_entities', [])
+    entities_text = "\n".join([f"- {entity}" for entity in key_entities])
+
+    return f"""You are a financial document analyst. Create a concise, professional summary of this {document_type}.
+
+Document Content:
+{content[:content_limit]}
+
+Key Entities Already Identified:
+{entities_text}
+
+Provide a structured summary with:
+1. **Overview** (2-3 sentences): What is this document about?
+2. **Key Details**: Most important information (amounts, dates, parties involved)
+3. **Action Items**: What decisions need to be made?
+4. **Red Flags**: Any concerns or unusual items?
+
+Keep the summary under 300 words. Use bullet points for clarity. Be professional and concise."""
+
+
+def build_risk_prompt(document_type: str, summary: str, classification: dict) -> str:
+    return f"""You are a risk assessment AI for {document_type} documents. Analyze the following and assign a risk score.
+
+Document Summary:
+{summary[:2000]}
+
+Classification Info:
+{json.dumps(classification, indent=2)}
+
+Evaluate risk factors:
+1. **Completeness**: Is all required information present? (0-25 points)
+2. **Compliance**: Does it meet regulatory standards? (0-25 points)
+3. **Financial Viability**: Are amounts/terms reasonable? (0-25 points)
+4. **Red Flags**: Any suspicious or concerning items? (0-25 points)
+
+Return ONLY a JSON object with this exact structure:
+{{
+  "total_score": <0-100>,
+  "risk_level": "low|medium|high|critical",
+  "factors": {{
+    "completeness": <0-25>,
+    "compliance": <0-25>,
+    "financial_viability": <0-25>,
+    "red_flags": <0-25>
+  }},
+  "concerns": ["list of specific concerns"],
+  "recommendations": ["list of recommendations"]
+}}
+
+Higher score = HIGHER risk (0 = safe, 100 = dangerous). Return ONLY valid JSON."""
+
+
+def build_fused_prompt(document_type: str, content: str, content_limit: int = PROMPT_CONTENT_CHARS) -> str:
+    return f"""You are a document analysis AI for {document_type} documents. In a single pass, classify the document, summarize it and assess its risk.
+
+Document Content:
+{content[:content_limit]}
+
+Return ONLY a JSON object with this exact structure:
+{{
+  "classification": {{
+    "confidence": <float 0-1, confidence this is a valid {document_type}>,
+    "key_entities": ["important entities (names, dates, amounts, locations)"],
+    "document_category": "specific subcategory (e.g. personal_loan, business_loan, mortgage)",
+    "requires_review": <boolean>,
+    "completeness_score": <float 0-1>
+  }},
+  "summary": "Professional summary under 300 words with **Overview**, **Key Details**, **Action Items** and **Red Flags** sections, using bullet points",
+  "risk": {{
+    "total_score": <0-100>,
+    "risk_level": "low|medium|high|critical",
+    "factors": {{
+      "completeness": <0-25>,
+      "compliance": <0-25>,
+      "financial_viability": <0-25>,
+      "red_flags": <0-25>
+    }},
+    "concerns": ["list of specific concerns"],
+    "recommendations": ["list of recommendations"]
+  }}
+}}
+
+Risk factors are scored 0-25 each: completeness of required information, regulatory compliance, financial viability of amounts/terms, and red flags.
+Higher score = HIGHER risk (0 = safe, 100 = dangerous). Return ONLY valid JSON, no markdown formatting."""
+
+
+def parse_json_response(result_text: str) -> dict:
+    """Parse a JSON object from a model response, tolerating markdown wrappers"""
+    try:
+        return json.loads(result_text)
+    except json.JSONDecodeError:
+        # Try to extract JSON from markdown code blocks
+        json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group())
+        raise ValueError("Could not parse JSON from AI response")
+
+
+async def cached_completion(prompt: str, step: str, model: str = DEFAULT_MODEL,
+                            temperature: float = 0.1, max_tokens: int = 500,
+                            bypass: bool = False, on_delta: Optional[Callable[[str], None]] = None,
+                            cacheable: Optional[Callable[[str], bool]] = None) -> str:
+    """Return completion text, served from the response cache when the prompt was seen before.
+
+    With `on_delta`, a cache miss is streamed and `on_delta(text_so_far)` is
+    called as tokens arrive (a retry starts the text over); a cache hit is
+    passed to it once, whole. A fresh response is only cached when
+    `cacheable(text)` is true, so a malformed answer is asked for again next
+    time instead of being served from the cache.
+    """
+    cache_key = make_cache_key(model, prompt, temperature, max_tokens)
+    result_text = await llm_cache.aget(cache_key, step=step, bypass=bypass)
+
+    if result_text is None and on_delta is not None:
+        result_text = await resilient_call(
+            lambda timeout: stream_chat_completion(model, prompt, on_delta, temperature=temperature,
+                                                   max_tokens=max_tokens, timeout=timeout),
+            model, hedge=False
+        )
+        if cacheable is None or cacheable(result_text):
+            await llm_cache.aset(cache_key, model, result_text)
+    elif result_text is None:
+        response = await resilient_call(
+            lambda timeout: chat_completion(model, prompt, temperature=temperature, max_tokens=max_tokens, timeout=timeout),
+            model
+        )
+        result_text = response.choices[0].message.content
+        if cacheable is None or cacheable(result_text):
+            await llm_cache.aset(cache_key, model, result_text)
+    elif on_delta is not None:
+        on_delta(result_text)
+
+    return result_text
+
+
+def risk_decision(risk_result: dict) -> tuple:
+    """(column values, high_risk) for a risk result: score, status and reviewer comments"""
+    total_score = risk_result.get('total_score', 50)
+    risk_level = risk_result.get('risk_level', 'medium')
+    now = datetime.utcnow()
+
+    values = {'risk_score': float(total_score), 'processed_at': now}
+
+    # Conditional routing based on risk level
+    if total_score >= HIGH_RISK_THRESHOLD:
+        values['status'] = DocumentStatus.PENDING_REVIEW
+        values['reviewer_comments'] = f"⚠️ High risk detected (Score: {total_score}/100, Level: {risk_level}). {', '.join(risk_result.get('concerns', []))}"
+        return values, True
+
+    values['status'] = DocumentStatus.APPROVED
+    values['approved_at'] = now
+    values['reviewer_comments'] = f"✅ Auto-approved (Risk Score: {total_score}/100, Level: {risk_level}). Lower score = lower risk."
+    return values, False
+
+
+def apply_risk_decision(document, risk_result: dict) -> bool:
+    """Set risk score, status and reviewer comments on a Document; returns True if high risk"""
+    values, high_risk = risk_decision(risk_result)
+    for column, value in values.items():
+        setattr(document, column, value)
+    return high_risk
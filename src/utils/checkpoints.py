@@ -0,0 +1,141 @@
+"""Resume documents that did not finish the pipeline from their last checkpoint.
+
+Each step's database write also records `pipeline_stage`, the last stage
+whose result is stored: "classified", "summarized" or "scored" (finished).
+A document is resumable when it is FAILED (parked by a step), or when it has
+been UPLOADED/PROCESSING without progress for RESUME_STUCK_MINUTES, e.g.
+because the worker running it died.
+
+Resuming claims the document (status back to PROCESSING, so concurrent
+sweeps skip it) and re-emits the event that starts its first unfinished
+stage, rebuilt from the stored results:
+
+    no checkpoint -> document.uploaded    (ClassifyDocument / AnalyzeDocument)
+    classified    -> document.classified  (SummarizeDocument)
+    summarized    -> document.summarized  (RiskScoreDocument)
+
+so the LLM calls that already succeeded are not paid for again. Every claim
+counts towards `resume_attempts`; after RESUME_MAX_ATTEMPTS a document is no
+longer resumed (it stays FAILED) unless forced. A queued job from before the
+latest claim is skipped by the queue workers (superseded()). Entry points
+are scripts/resume_documents.py and the document.resume event
+(src/steps/resume_document_step.py).
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, func, or_, update
+
+from utils.content_store import put_content
+from utils.database import Document, DocumentStatus, read_text_field
+from utils.work_queue import enqueue_document
+
+RESUME_STUCK_MINUTES = int(os.getenv("RESUME_STUCK_MINUTES", "30"))
+# Documents one document.resume sweep event restarts
+RESUME_BATCH_SIZE = int(os.getenv("RESUME_BATCH_SIZE", "20"))
+# Resumes per document before it is left FAILED for a person to look at
+RESUME_MAX_ATTEMPTS = int(os.getenv("RESUME_MAX_ATTEMPTS", "3"))
+
+RESUME_TOPICS = {
+    None: "document.uploaded",
+    "classified": "document.classified",
+    "summarized": "document.summarized",
+}
+
+documents = Document.__table__
+
+
+def resumable(stuck_minutes: int = RESUME_STUCK_MINUTES):
+    """SQL condition for documents a resume may claim"""
+    cutoff = datetime.utcnow() - timedelta(minutes=stuck_minutes)
+    return and_(
+        or_(
+            documents.c.status == DocumentStatus.FAILED,
+            and_(
+                documents.c.status.in_([DocumentStatus.UPLOADED, DocumentStatus.PROCESSING]),
+                func.coalesce(documents.c.stage_updated_at, documents.c.uploaded_at) < cutoff,
+            ),
+        ),
+        documents.c.resume_attempts < RESUME_MAX_ATTEMPTS,
+    )
+
+
+def find_resumable(db, limit: Optional[int] = None, stuck_minutes: int = RESUME_STUCK_MINUTES) -> list:
+    """[(document_id, status, pipeline_stage, resume_attempts)] of resumable documents, oldest progress first"""
+    query = (
+        db.query(Document.document_id, Document.status, Document.pipeline_stage, Document.resume_attempts)
+        .filter(resumable(stuck_minutes), or_(Document.pipeline_stage.is_(None), Document.pipeline_stage != "scored"))
+        .order_by(func.coalesce(Document.stage_updated_at, Document.uploaded_at))
+    )
+    return query.limit(limit).all() if limit else query.all()
+
+
+def claim(db, document_id: str, stuck_minutes: int = RESUME_STUCK_MINUTES, force: bool = False):
+    """Mark one resumable document PROCESSING and count the attempt; returns its
+    (document_type, filename, pipeline_stage, resume_attempts) row, or None if it finished, ran
+    out of attempts or someone else claimed it"""
+    condition = documents.c.document_id == document_id
+    if not force:
+        condition = and_(condition, resumable(stuck_minutes))
+    return db.execute(
+        update(documents).where(condition)
+        .values(status=DocumentStatus.PROCESSING, stage_updated_at=datetime.utcnow(),
+                resume_attempts=documents.c.resume_attempts + 1)
+        .returning(documents.c.document_type, documents.c.filename, documents.c.pipeline_stage,
+                   documents.c.resume_attempts)
+    ).first()
+
+
+def resume_event(db, document_id: str, stuck_minutes: int = RESUME_STUCK_MINUTES,
+                 force: bool = False) -> Optional[dict]:
+    """Claim a document and build the event that restarts it, or None if there is nothing to resume.
+
+    With force, a finished document is re-run from its last stage too (its risk
+    score is recomputed from the stored classification and summary).
+    """
+    row = claim(db, document_id, stuck_minutes, force)
+    if row is None:
+        return None
+    # Only a forced resume reaches a finished document: re-run its risk score
+    stage = "summarized" if row.pipeline_stage == "scored" else row.pipeline_stage
+
+    data = {
+        "document_id": document_id,
+        "document_type": row.document_type.value,
+        "filename": row.filename,
+        "resumed_from": stage,
+        # Queue workers drop jobs from before this claim (see superseded())
+        "resume_attempt": row.resume_attempts,
+    }
+    if stage in (None, "classified"):
+        data.update(put_content(read_text_field(db, document_id, "extracted_text") or ""))
+    if stage is not None:
+        data["classification"] = json.loads(read_text_field(db, document_id, "classification") or "{}")
+    if stage == "summarized":
+        data["summary"] = read_text_field(db, document_id, "ai_summary") or ""
+
+    return {"topic": RESUME_TOPICS[stage], "data": data}
+
+
+def superseded(db, document_id: str, resume_attempt: int = 0) -> bool:
+    """True when a resume claimed the document after this job was queued.
+
+    A document waiting in the queue looks stuck to resumable() once
+    RESUME_STUCK_MINUTES pass, so a sweep can queue a second job for it; the
+    older job must then not run the pipeline as well.
+    """
+    row = db.query(Document.resume_attempts).filter(Document.document_id == document_id).first()
+    return row is not None and row.resume_attempts > resume_attempt
+
+
+async def enqueue_resume(event: dict) -> bool:
+    """Hand a resume event to the queue workers (WORK_QUEUE_ENABLED) instead of the event bus"""
+    data = event["data"]
+    # A fresh job id: the document's original job may still be queued or leased
+    # (the worker drops it as superseded)
+    job_id = f"{data['document_id']}:resume:{int(time.time() * 1000)}"
+    return await enqueue_document({**data, "resume_topic": event["topic"]}, job_id=job_id)
@@ -0,0 +1,254 @@
+"""Map-reduce analysis for documents longer than a single prompt window.
+
+Instead of truncating long documents to their first page, the text is split
+on structural boundaries (headings, numbered clauses, paragraphs, then
+sentences) into chunks that fit CHUNK_MAX_TOKENS. Each chunk gets a small
+extraction call, run concurrently under a bounded fan-out; the partial
+results are reduced into the existing classification schema plus a compact
+per-part digest that the summary / fused prompts read instead of the raw
+text.
+
+Per-document token and wall-time budgets cap the cost: chunks beyond the
+token budget are sampled evenly across the document, and chunks still
+running when the time budget expires are cancelled. Both are reported.
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections import Counter
+from typing import List, Optional
+
+from utils.analysis import parse_json_response, PROMPT_CONTENT_CHARS
+from utils.groq_client import estimate_tokens
+from utils.instrumentation import stage
+from utils.model_router import routed_completion
+
+CHUNKING_ENABLED = os.getenv("CHUNKING_ENABLED", "true").lower() == "true"
+# Documents longer than the single-prompt window (PROMPT_CONTENT_CHARS) are chunked
+CHUNK_THRESHOLD_CHARS = int(os.getenv("CHUNK_THRESHOLD_CHARS", str(PROMPT_CONTENT_CHARS)))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "1500"))
+CHUNK_MAP_MAX_TOKENS = int(os.getenv("CHUNK_MAP_MAX_TOKENS", "400"))
+CHUNK_MAX_CONCURRENCY = int(os.getenv("CHUNK_MAX_CONCURRENCY", "4"))
+CHUNK_TOKEN_BUDGET = int(os.getenv("CHUNK_TOKEN_BUDGET", "40000"))
+CHUNK_TIME_BUDGET_SECONDS = float(os.getenv("CHUNK_TIME_BUDGET_SECONDS", "90"))
+CHUNK_DIGEST_CHARS = int(os.getenv("CHUNK_DIGEST_CHARS", "6000"))
+
+MAX_KEY_ENTITIES = 25
+
+# Lines that open a new section: "ARTICLE 4", "Section 2.1", "3. Term", "12.4) ...", "PAYMENT TERMS"
+_HEADING = re.compile(
+    r"^[ \t]*(?:(?:ARTICLE|Article|SECTION|Section|SCHEDULE|Schedule|EXHIBIT|Exhibit|PART|Part)\b"
+    r"|\d+(?:\.\d+)*[.)][ \t]+\S"
+    r"|[A-Z][A-Z0-9 ,&/'-]{3,}[ \t]*$)",
+    re.MULTILINE,
+)
+_PARAGRAPH = re.compile(r"\n[ \t]*\n")
+_SENTENCE = re.compile(r"(?<=[.!?;])\s+")
+
+
+def needs_chunking(content_length: Optional[int]) -> bool:
+    """Whether a document of this length gets map-reduce analysis (unknown length: maybe)"""
+    if content_length is None:
+        return CHUNKING_ENABLED
+    return CHUNKING_ENABLED and content_length > CHUNK_THRESHOLD_CHARS
+
+
+def _sections(text: str) -> List[str]:
+    starts = [m.start() for m in _HEADING.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return [text[a:b] for a, b in zip(starts, starts[1:] + [len(text)]) if text[a:b].strip()]
+
+
+def _split_unit(unit: str, max_tokens: int) -> List[str]:
+    """Break an oversized paragraph on sentences, then hard-cut whatever is still too big"""
+    if estimate_tokens(unit) <= max_tokens:
+        return [unit]
+    max_chars = max_tokens * 4
+    pieces = []
+    for sentence in _SENTENCE.split(unit):
+        pieces.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+    return pieces
+
+
+def split_into_chunks(text: str, max_tokens: int = CHUNK_MAX_TOKENS) -> List[str]:
+    """Split text into chunks of at most `max_tokens`, preferring structural boundaries"""
+    chunks = []
+    current, current_tokens = [], 0
+
+    def close():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n\n".join(current).strip())
+        current, current_tokens = [], 0
+
+    for section in _sections(text):
+        # Start a section on a fresh chunk unless the current one is still small
+        if current_tokens > max_tokens // 2:
+            close()
+        for paragraph in _PARAGRAPH.split(section):
+            if not paragraph.strip():
+                continue
+            for piece in _split_unit(paragraph.strip(), max_tokens):
+                tokens = estimate_tokens(piece)
+                if current_tokens + tokens > max_tokens:
+                    close()
+                current.append(piece)
+                current_tokens += tokens
+    close()
+    return [chunk for chunk in chunks if chunk]
+
+
+def build_chunk_prompt(document_type: str, chunk: str, index: int, total: int) -> str:
+    return f"""You are a document analysis AI reading part {index} of {total} of a {document_type} document. Extract information from this part only.
+
+Document Part:
+{chunk}
+
+Return ONLY a JSON object with this exact structure:
+{{
+  "section_summary": "2-3 sentences on what this part covers (amounts, dates, parties, obligations)",
+  "key_entities": ["important entities in this part (names, dates, amounts, locations)"],
+  "document_category": "specific subcategory (e.g. personal_loan, business_loan, mortgage)",
+  "confidence": <float 0-1, confidence this is a valid {document_type}>,
+  "completeness_score": <float 0-1, how much of the required information appears in this part>,
+  "requires_review": <boolean>,
+  "red_flags": ["concerning or unusual items in this part"]
+}}
+
+Return ONLY valid JSON, no markdown formatting."""
+
+
+def select_chunks(costs: List[int], token_budget: int) -> List[int]:
+    """Indexes of the chunks to analyse: all if they fit, else an even sample incl. first and last"""
+    if sum(costs) <= token_budget:
+        return list(range(len(costs)))
+    average = sum(costs) / len(costs)
+    count = max(1, min(len(costs), int(token_budget // average)))
+    if count == 1:
+        return [0]
+    step = (len(costs) - 1) / (count - 1)
+    return sorted({round(i * step) for i in range(count)})
+
+
+def reduce_classification(partials: List[dict]) -> dict:
+    """Merge per-chunk extractions into the classification schema"""
+    entities, seen = [], set()
+    for partial in partials:
+        for entity in partial.get("key_entities") or []:
+            key = str(entity).strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                entities.append(entity)
+
+    votes = Counter()
+    for partial in partials:
+        if partial.get("document_category"):
+            votes[partial["document_category"]] += float(partial.get("confidence") or 0.5)
+
+    confidences = [float(p["confidence"]) for p in partials if p.get("confidence") is not None]
+    completeness = [float(p["completeness_score"]) for p in partials if p.get("completeness_score") is not None]
+
+    return {
+        "confidence": round(sum(confidences) / len(confidences), 3) if confidences else 0.5,
+        "key_entities": entities[:MAX_KEY_ENTITIES],
+        "document_category": votes.most_common(1)[0][0] if votes else "unknown",
+        "requires_review": any(p.get("requires_review") for p in partials),
+        # Required fields are spread across parts; the best-covered part is the closest proxy
+        "completeness_score": max(completeness) if completeness else 0.5,
+    }
+
+
+def build_digest(partials: List[tuple], total: int) -> str:
+    """Compact per-part notes used in place of the raw text by the summary/fused prompts"""
+    lines = []
+    for index, partial in partials:
+        line = f"[Part {index}/{total}] {partial.get('section_summary', '').strip()}"
+        flags = [str(flag) for flag in partial.get("red_flags") or [] if flag]
+        if flags:
+            line += f"\n  Red flags: {'; '.join(flags)}"
+        lines.append(line)
+    return "\n".join(lines)[:CHUNK_DIGEST_CHARS]
+
+
+async def map_reduce(document_type: str, text: str, bypass: bool = False,
+                     token_budget: int = CHUNK_TOKEN_BUDGET,
+                     time_budget: float = CHUNK_TIME_BUDGET_SECONDS) -> dict:
+    """Analyse every chunk concurrently and reduce.
+
+    Returns {"classification", "digest", "report"}; classification and digest
+    are None when no chunk produced a usable result, or when the text fits in
+    one chunk (a map call would only add a round trip), and callers then fall
+    back to the single-prompt path.
+    Token figures are estimates (~4 chars/token); cache hits still count.
+    """
+    started = time.perf_counter()
+    chunks = split_into_chunks(text)
+    if len(chunks) <= 1:
+        report = {"chunks": len(chunks), "analysed": 0, "skipped_for_budget": 0, "timed_out": 0, "failed": 0,
+                  "estimated_tokens": 0, "seconds": round(time.perf_counter() - started, 3)}
+        return {"classification": None, "digest": None, "report": report}
+    prompts = [build_chunk_prompt(document_type, chunk, i + 1, len(chunks)) for i, chunk in enumerate(chunks)]
+    costs = [estimate_tokens(prompt) + CHUNK_MAP_MAX_TOKENS for prompt in prompts]
+    selected = select_chunks(costs, token_budget)
+
+    semaphore = asyncio.Semaphore(CHUNK_MAX_CONCURRENCY)
+    completion_tokens = {}
+
+    async def analyse(index):
+        async with semaphore:
+            result_text = await routed_completion(
+                prompts[index], step='chunk_map', document_type=document_type,
+                content_length=len(chunks[index]), max_tokens=CHUNK_MAP_MAX_TOKENS, bypass=bypass
+            )
+        completion_tokens[index] = estimate_tokens(result_text)
+        return index, parse_json_response(result_text)
+
+    with stage('chunk_map'):
+        tasks = [asyncio.create_task(analyse(index)) for index in selected]
+        done, pending = await asyncio.wait(tasks, timeout=time_budget)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    partials, failed = [], 0
+    for task in done:
+        if task.exception() is not None:
+            failed += 1
+        else:
+            partials.append(task.result())
+    partials.sort(key=lambda item: item[0])
+
+    report = {
+        "chunks": len(chunks),
+        "analysed": len(partials),
+        "skipped_for_budget": len(chunks) - len(selected),
+        "timed_out": len(pending),
+        "failed": failed,
+        "estimated_tokens": sum(
+            estimate_tokens(prompts[i]) + completion_tokens[i] for i, _ in partials
+        ),
+        "seconds": None,
+    }
+
+    if not partials:
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        return {"classification": None, "digest": None, "report": report}
+
+    with stage('chunk_reduce'):
+        classification = reduce_classification([partial for _, partial in partials])
+        digest = build_digest([(i + 1, partial) for i, partial in partials], len(chunks))
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return {"classification": classification, "digest": digest, "report": report}
+
+
+def format_report(report: dict) -> str:
+    return (
+        f"{report['analysed']}/{report['chunks']} parts "
+        f"({report['skipped_for_budget']} skipped for budget, {report['timed_out']} timed out, "
+        f"{report['failed']} failed), ~{report['estimated_tokens']} tokens, {report['seconds']}s"
+    )
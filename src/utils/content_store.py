@@ -0,0 +1,145 @@
+"""Content-addressed blob store for extracted document text.
+
+Upload endpoints write the text once and events carry only a small
+reference (`content_ref`) plus `content_length`, instead of serializing the
+full document through every hop of the event bus. Steps then read just the
+prefix their prompt needs.
+
+Blobs live under CONTENT_STORE_DIR as <sha256[:2]>/<sha256>.txt; the layout
+is shared with src/utils/content_store.ts.
+
+A blob is only needed while its document moves through the pipeline; after
+that, reads fall back to `documents.extracted_text`. Identical texts share a
+blob, so blobs are not removed with their document; instead the
+PurgeContentStore cron step deletes those not written for
+CONTENT_STORE_MAX_AGE_HOURS (writing an existing blob again refreshes it).
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from typing import Optional
+
+from utils.database import SessionLocal, db_executor, read_text_field
+
+REF_PREFIX = "sha256:"
+
+CONTENT_STORE_DIR = os.getenv("CONTENT_STORE_DIR") or (
+    "/tmp/uploads/content" if os.getenv("NODE_ENV") == "production"
+    else os.path.join(os.getcwd(), "uploads", "content")
+)
+CONTENT_STORE_MAX_AGE_HOURS = float(os.getenv("CONTENT_STORE_MAX_AGE_HOURS", "24"))
+
+
+def _blob_path(content_ref: str) -> str:
+    if not content_ref.startswith(REF_PREFIX):
+        raise ValueError(f"Invalid content reference: {content_ref}")
+    digest = content_ref[len(REF_PREFIX):]
+    if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+        raise ValueError(f"Invalid content reference: {content_ref}")
+    return os.path.join(CONTENT_STORE_DIR, digest[:2], f"{digest}.txt")
+
+
+def put_content(text: str) -> dict:
+    """Store text (idempotently) and return the reference metadata for events"""
+    data = text.encode("utf-8")
+    content_ref = REF_PREFIX + hashlib.sha256(data).hexdigest()
+    path = _blob_path(content_ref)
+
+    try:
+        # Already stored: refresh the age purge_content() goes by
+        os.utime(path)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    return {"content_ref": content_ref, "content_length": len(text)}
+
+
+def purge_content(max_age_hours: float = CONTENT_STORE_MAX_AGE_HOURS) -> int:
+    """Delete blobs (and abandoned temp files) not written for `max_age_hours`; returns how many"""
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for directory, _, filenames in os.walk(CONTENT_STORE_DIR):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+async def apurge_content(max_age_hours: float = CONTENT_STORE_MAX_AGE_HOURS) -> int:
+    """Async purge_content() on the DB executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, purge_content, max_age_hours)
+
+
+def load_content(content_ref: str, limit: Optional[int] = None) -> str:
+    """Read a stored blob, or only its first `limit` characters"""
+    with open(_blob_path(content_ref), "r", encoding="utf-8") as f:
+        return f.read(limit) if limit is not None else f.read()
+
+
+def _load_from_database(document_id: str, limit: Optional[int]) -> str:
+    db = SessionLocal()
+    try:
+        text = read_text_field(db, document_id, "extracted_text") or ""
+        return text[:limit] if limit is not None else text
+    finally:
+        db.close()
+
+
+def resolve_content(input_data: dict, limit: Optional[int] = None) -> str:
+    """Return the document text for an event, loading at most `limit` characters.
+
+    Accepts inline `content` from older producers, falls back to the stored
+    blob, then to `documents.extracted_text`.
+    """
+    content = input_data.get("content")
+    if content:
+        return content[:limit] if limit is not None else content
+
+    content_ref = input_data.get("content_ref")
+    if content_ref:
+        try:
+            return load_content(content_ref, limit)
+        except FileNotFoundError:
+            pass
+
+    document_id = input_data.get("document_id")
+    if document_id:
+        return _load_from_database(document_id, limit)
+    return ""
+
+
+async def aresolve_content(input_data: dict, limit: Optional[int] = None) -> str:
+    """Async resolve_content(); file and DB reads run on the DB executor"""
+    if input_data.get("content"):
+        return resolve_content(input_data, limit)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, resolve_content, input_data, limit)
+
+
+def content_reference(input_data: dict) -> dict:
+    """Reference metadata to forward on the next event.
+
+    Inline content from a legacy producer is moved into the store, so
+    downstream events never carry the full text.
+    """
+    content_ref = input_data.get("content_ref")
+    if content_ref:
+        return {"content_ref": content_ref, "content_length": input_data.get("content_length")}
+
+    content = input_data.get("content")
+    if content:
+        return put_content(content)
+
+    return {"content_ref": None, "content_length": 0}
@@ -0,0 +1,36 @@
+import { createHash } from 'crypto';
+import { mkdirSync, renameSync, utimesSync, writeFileSync } from 'fs';
+import { dirname, join } from 'path';
+
+// Content-addressed blob store shared with src/utils/content_store.py.
+// Upload endpoints write extracted text here once and emit only a reference,
+// so the full document is not copied through every event payload.
+export const CONTENT_STORE_DIR = process.env.CONTENT_STORE_DIR || (
+  process.env.NODE_ENV === 'production'
+    ? '/tmp/uploads/content'
+    : join(process.cwd(), 'uploads', 'content')
+);
+
+export interface ContentReference {
+  content_ref: string;
+  content_length: number;
+}
+
+export const putContent = (text: string): ContentReference => {
+  const data = Buffer.from(text, 'utf-8');
+  const digest = createHash('sha256').update(data).digest('hex');
+  const blobPath = join(CONTENT_STORE_DIR, digest.substring(0, 2), `${digest}.txt`);
+
+  try {
+    // Already stored: refresh the age the PurgeContentStore sweep goes by
+    const now = new Date();
+    utimesSync(blobPath, now, now);
+  } catch {
+    mkdirSync(dirname(blobPath), { recursive: true });
+    const tmpPath = `${blobPath}.${process.pid}.tmp`;
+    writeFileSync(tmpPath, data);
+    renameSync(tmpPath, blobPath);
+  }
+
+  return { content_ref: `sha256:${digest}`, content_length: text.length };
+};
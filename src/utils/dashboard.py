@@ -0,0 +1,145 @@
+"""Dashboard aggregates read from counters instead of scanning documents.
+
+Triggers on documents (installed by create_all and migration 0008) update
+document_stats in the same transaction as every insert, delete, and change of
+document_type, status, risk_score, uploaded_at or processed_at, whoever makes
+it: the Python steps, the TypeScript review/delete steps or a script. A
+document_stats row holds, for one (document_type, status, risk bucket), the
+document count, the sum of their risk scores, and the count and total
+processing time (processed_at - uploaded_at) of the processed ones. On
+PostgreSQL each group is split over 16 shards picked by document_id, so
+concurrent writers seldom queue on one counter row; readers sum the shards.
+
+summary() therefore reads at most types x statuses x 11 buckets x 16 shards
+rows, however many documents there are. rebuild() recounts the table from
+documents (after a restore or bulk load with triggers disabled) and drift()
+compares the two; scripts/rebuild_dashboard_stats.py runs either.
+"""
+
+from typing import Optional
+
+from sqlalchemy import delete, func, text
+
+from utils.database import Document, DocumentStat, DocumentStatus, DocumentType
+
+RISK_BUCKETS = 10
+
+_REBUILD = {
+    "postgresql": """
+        INSERT INTO document_stats (document_type, status, risk_bucket, shard, document_count,
+                                    risk_score_sum, processed_count, processing_seconds)
+        SELECT coalesce(document_type::text, ''), coalesce(status::text, ''),
+               CASE WHEN risk_score IS NULL THEN -1 ELSE least(floor(risk_score / 10), 9) END,
+               abs(mod(hashtext(document_id), 16)),
+               count(*), coalesce(sum(risk_score), 0),
+               count(*) FILTER (WHERE processed_at IS NOT NULL AND uploaded_at IS NOT NULL),
+               coalesce(sum(extract(epoch FROM processed_at - uploaded_at)), 0)
+        FROM documents
+        GROUP BY 1, 2, 3, 4
+    """,
+    "sqlite": """
+        INSERT INTO document_stats (document_type, status, risk_bucket, shard, document_count,
+                                    risk_score_sum, processed_count, processing_seconds)
+        SELECT coalesce(document_type, ''), coalesce(status, ''),
+               CASE WHEN risk_score IS NULL THEN -1 WHEN risk_score >= 90 THEN 9
+                    ELSE CAST(risk_score / 10 AS INTEGER) END,
+               0,
+               count(*), coalesce(sum(risk_score), 0),
+               count(CASE WHEN processed_at IS NOT NULL AND uploaded_at IS NOT NULL THEN 1 END),
+               coalesce(sum((julianday(processed_at) - julianday(uploaded_at)) * 86400), 0)
+        FROM documents
+        GROUP BY 1, 2, 3, 4
+    """,
+}
+
+
+def _label(enum_class, name: str) -> str:
+    """API value for an enum name stored in document_stats"""
+    return enum_class[name].value if name in enum_class.__members__ else "unknown"
+
+
+def summary(db, document_type: Optional[str] = None) -> dict:
+    """Counts by status and type, risk histogram and averages for the dashboard.
+
+    Raises ValueError for an unknown document_type.
+    """
+    query = db.query(
+        DocumentStat.document_type, DocumentStat.status, DocumentStat.risk_bucket,
+        func.sum(DocumentStat.document_count).label("documents"),
+        func.sum(DocumentStat.risk_score_sum).label("risk_score_sum"),
+        func.sum(DocumentStat.processed_count).label("processed"),
+        func.sum(DocumentStat.processing_seconds).label("processing_seconds"),
+    ).group_by(DocumentStat.document_type, DocumentStat.status, DocumentStat.risk_bucket)
+    if document_type:
+        query = query.filter(DocumentStat.document_type == DocumentType(document_type.lower()).name)
+
+    by_status = {status.value: 0 for status in DocumentStatus}
+    by_type = {doc_type.value: 0 for doc_type in DocumentType} if not document_type else {document_type.lower(): 0}
+    histogram = [0] * RISK_BUCKETS
+    total = unscored = processed = 0
+    risk_sum = processing_seconds = 0.0
+
+    for row in query:
+        count = int(row.documents or 0)
+        if not count:
+            continue
+        total += count
+        status = _label(DocumentStatus, row.status)
+        doc_type = _label(DocumentType, row.document_type)
+        by_status[status] = by_status.get(status, 0) + count
+        by_type[doc_type] = by_type.get(doc_type, 0) + count
+        if row.risk_bucket < 0:
+            unscored += count
+        else:
+            histogram[row.risk_bucket] += count
+            risk_sum += row.risk_score_sum or 0
+        processed += int(row.processed or 0)
+        processing_seconds += row.processing_seconds or 0
+
+    scored = total - unscored
+    return {
+        "total": total,
+        "by_status": by_status,
+        "by_document_type": by_type,
+        "risk_histogram": [
+            {"min": bucket * 10, "max": 100 if bucket == RISK_BUCKETS - 1 else bucket * 10 + 9, "count": count}
+            for bucket, count in enumerate(histogram)
+        ],
+        "unscored": unscored,
+        "average_risk_score": round(risk_sum / scored, 2) if scored else None,
+        "processed": processed,
+        "average_processing_seconds": round(processing_seconds / processed, 2) if processed else None,
+    }
+
+
+def rebuild(db) -> int:
+    """Recount document_stats from documents in the caller's transaction; returns the document count.
+
+    On PostgreSQL document writes wait until the transaction commits, so none is missed or counted twice.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        db.execute(text("LOCK TABLE documents IN SHARE MODE"))
+    db.execute(delete(DocumentStat))
+    db.execute(text(_REBUILD[dialect]))
+    return int(db.query(func.coalesce(func.sum(DocumentStat.document_count), 0)).scalar())
+
+
+def drift(db) -> list:
+    """[(document_type, status, counted, actual)] for groups whose counter disagrees with documents"""
+    counted = {
+        (row.document_type, row.status): int(row.documents)
+        for row in db.query(DocumentStat.document_type, DocumentStat.status,
+                            func.sum(DocumentStat.document_count).label("documents"))
+        .group_by(DocumentStat.document_type, DocumentStat.status)
+    }
+    actual = {
+        (row.document_type.name if row.document_type else "", row.status.name if row.status else ""): row.documents
+        for row in db.query(Document.document_type, Document.status, func.count().label("documents"))
+        .group_by(Document.document_type, Document.status)
+    }
+    return sorted(
+        (document_type, status, counted.get((document_type, status), 0), actual.get((document_type, status), 0))
+        for document_type, status in set(counted) | set(actual)
+        if counted.get((document_type, status), 0) != actual.get((document_type, status), 0)
+    )
@@ -0,0 +1,21 @@
+import { inflateSync } from 'zlib';
+
+// Bulky document text (extracted_text, ai_summary, classification) is stored
+// compressed in document_blobs; see BLOB_FIELDS in src/utils/database.py.
+// Rows written before the split still have the text in the inline column.
+
+export const blobJoin = (field: string, alias: string) =>
+  `LEFT JOIN document_blobs ${alias} ON ${alias}.document_id = d.document_id AND ${alias}.field = '${field}'`;
+
+export const decodeBlob = (data: Buffer | null, codec: string | null, inlineValue: string | null = null): string | null => {
+  if (!data) {
+    return inlineValue;
+  }
+  if (codec === 'zlib') {
+    return inflateSync(data).toString('utf-8');
+  }
+  if (codec === 'none') {
+    return data.toString('utf-8');
+  }
+  throw new Error(`Unknown blob codec: ${codec}`);
+};
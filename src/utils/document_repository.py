@@ -0,0 +1,229 @@
+"""Targeted writes of document state, without loading Document rows.
+
+The AI steps used to load the full row (and its blobs collection) only to
+change one or two attributes. Each operation here is a single
+`UPDATE documents ... WHERE document_id = :id RETURNING ...` plus, for the
+bulky fields, an upsert into document_blobs. Nothing is read back except the
+returned key.
+
+DOCUMENT_WRITE_MODE picks when the AI results are written:
+
+- "immediate" (default): each step writes its own result as soon as it has it;
+- "write_behind": ClassifyDocument and SummarizeDocument only pass their
+  results along in the event, and RiskScoreDocument writes classification,
+  summary, signature and risk decision in one transaction at the end of the
+  pipeline. A document keeps its UPLOADED status until then; parked documents
+  still get whatever results were produced before the failure.
+
+Every write also records the pipeline stage it completes (pipeline_stage,
+stage_updated_at) so unfinished documents can be resumed from there (see
+utils/checkpoints.py), and keeps the search columns in step with the text it
+stores (see utils/search.py).
+
+All functions take a session and are meant to be called through run_in_session,
+except save_when_present(), which does that itself.
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import update
+
+from utils import search
+from utils.analysis import risk_decision
+from utils.database import run_in_session, Document, DocumentBlob, DocumentStatus, blob_values
+from utils.similarity import index_signature
+
+DOCUMENT_WRITE_MODE = os.getenv("DOCUMENT_WRITE_MODE", "immediate").lower()
+# A result write that finds no row is retried this many times, waiting
+# SAVE_RETRY_DELAY_SECONDS longer each time, before the step gives up
+SAVE_RETRY_ATTEMPTS = int(os.getenv("SAVE_RETRY_ATTEMPTS", "5"))
+SAVE_RETRY_DELAY_SECONDS = float(os.getenv("SAVE_RETRY_DELAY_SECONDS", "0.5"))
+
+documents = Document.__table__
+blobs = DocumentBlob.__table__
+
+
+def is_write_behind() -> bool:
+    return DOCUMENT_WRITE_MODE == "write_behind"
+
+
+def pending_state(input_data: dict) -> dict:
+    """Results carried by a write-behind event that are not in the database yet"""
+    if not is_write_behind():
+        return {}
+    return {
+        "classification": input_data.get("classification"),
+        "summary": input_data.get("summary"),
+        "signature": input_data.get("similarity_signature"),
+    }
+
+
+def _dialect_insert(db):
+    """INSERT construct with ON CONFLICT support for the bound dialect, or None"""
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def upsert_blobs(db, document_id: str, fields: dict):
+    """Write compressed blob rows for {field: text} in one statement"""
+    rows = [blob_values(document_id, field, value) for field, value in fields.items() if value is not None]
+    if not rows:
+        return
+    insert = _dialect_insert(db)
+    if insert is None:
+        for row in rows:
+            db.merge(DocumentBlob(**row))
+        return
+    statement = insert(blobs).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[blobs.c.document_id, blobs.c.field],
+        set_={column: statement.excluded[column] for column in ("codec", "raw_size", "stored_size", "data")},
+    ))
+
+
+def update_document(db, document_id: str, values: dict, blob_fields: Optional[dict] = None):
+    """Set columns (and blob-backed fields) on one document.
+
+    Returns the (id, document_type) row from RETURNING, or None if the
+    document does not exist.
+    """
+    blob_fields = {field: value for field, value in (blob_fields or {}).items() if value is not None}
+    # The blob wins over the legacy inline column, so clear it in the same statement
+    values = {**values, **{field: None for field in blob_fields}}
+    if not values:
+        return None
+    row = db.execute(
+        update(documents).where(documents.c.document_id == document_id).values(values)
+        .returning(documents.c.id, documents.c.document_type)
+    ).first()
+    if row is not None:
+        upsert_blobs(db, document_id, blob_fields)
+    return row
+
+
+def checkpoint(stage: Optional[str]) -> dict:
+    """Column values marking `stage` as the last completed one (nothing for None)"""
+    return {"pipeline_stage": stage, "stage_updated_at": datetime.utcnow()} if stage else {}
+
+
+def _stage_reached(classification: Optional[dict], summary: Optional[str]) -> Optional[str]:
+    if summary:
+        return "summarized"
+    return "classified" if classification is not None else None
+
+
+def _search_values(db, classification: Optional[dict], summary: Optional[str]) -> dict:
+    """Search column values derived from a classification and/or summary being written"""
+    values = search.entity_values(classification) if classification is not None else {}
+    if summary and search.supported(db):
+        values["search_vector"] = search.with_summary(summary)
+    return values
+
+
+def _index(db, document_id: str, row, signature: Optional[list]):
+    if row is not None and signature:
+        index_signature(db, document_id, row.document_type.value, signature)
+
+
+def insert_document(db, values: dict, extracted_text: Optional[str] = None) -> bool:
+    """Insert a new document (and its text blob); False if the document_id already exists"""
+    if search.supported(db):
+        values = {**values, "search_vector": search.text_vector(extracted_text)}
+    insert = _dialect_insert(db)
+    if insert is None:
+        if db.query(Document.id).filter(Document.document_id == values["document_id"]).first():
+            return False
+        db.execute(documents.insert().values(values))
+    else:
+        row = db.execute(
+            insert(documents).values(values).on_conflict_do_nothing(index_elements=[documents.c.document_id])
+            .returning(documents.c.id)
+        ).first()
+        if row is None:
+            return False
+    if extracted_text:
+        upsert_blobs(db, values["document_id"], {"extracted_text": extracted_text})
+    return True
+
+
+def save_classification(db, document_id: str, classification: dict, signature: Optional[list] = None) -> bool:
+    row = update_document(
+        db, document_id,
+        {"status": DocumentStatus.PROCESSING, **checkpoint("classified"), **_search_values(db, classification, None)},
+        {"classification": json.dumps(classification)},
+    )
+    _index(db, document_id, row, signature)
+    return row is not None
+
+
+def save_summary(db, document_id: str, summary: str) -> bool:
+    values = {**checkpoint("summarized"), **_search_values(db, None, summary)}
+    return update_document(db, document_id, values, {"ai_summary": summary}) is not None
+
+
+def save_analysis(db, document_id: str, risk_result: dict, classification: Optional[dict] = None,
+                  summary: Optional[str] = None, signature: Optional[list] = None) -> Optional[bool]:
+    """Risk decision plus any not-yet-written results in one go; returns high_risk, or None if missing"""
+    values, high_risk = risk_decision(risk_result)
+    blob_fields = {
+        "classification": json.dumps(classification) if classification is not None else None,
+        "ai_summary": summary or None,
+    }
+    values = {**values, **checkpoint("scored"), **_search_values(db, classification, summary)}
+    row = update_document(db, document_id, values, blob_fields)
+    if row is None:
+        return None
+    _index(db, document_id, row, signature)
+    return high_risk
+
+
+async def save_when_present(save, document_id: str, *args, missing=False, **kwargs):
+    """Run save(db, document_id, *args, **kwargs), retrying while it reports no row.
+
+    SaveDocument and the first AI step both handle document.uploaded, so a
+    result can be ready before the row is inserted. `missing` is what `save`
+    returns for an absent row (None for save_analysis); it is returned if the
+    row never appears, and the caller should treat the document as failed.
+    """
+    for attempt in range(SAVE_RETRY_ATTEMPTS):
+        result = await run_in_session(save, document_id, *args, **kwargs)
+        if result is not missing:
+            return result
+        if attempt + 1 < SAVE_RETRY_ATTEMPTS:
+            await asyncio.sleep(SAVE_RETRY_DELAY_SECONDS * (attempt + 1))
+    return missing
+
+
+class DocumentMissing(Exception):
+    """A step's result could not be written because the document row does not exist"""
+
+
+def park(db, document_id: str, step: str, reason: str, classification: Optional[dict] = None,
+         summary: Optional[str] = None, signature: Optional[list] = None) -> bool:
+    """Mark a document FAILED with a comment, keeping any results produced before the failure"""
+    row = update_document(
+        db, document_id,
+        {
+            "status": DocumentStatus.FAILED,
+            "processed_at": datetime.utcnow(),
+            "reviewer_comments": f"⏸️ Parked at {step}: {reason}",
+            **checkpoint(_stage_reached(classification, summary)),
+            **_search_values(db, classification, summary),
+        },
+        {
+            "classification": json.dumps(classification) if classification is not None else None,
+            "ai_summary": summary or None,
+        },
+    )
+    _index(db, document_id, row, signature)
+    return row is not None
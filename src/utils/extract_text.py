@@ -1,22 +1,320 @@
 #!/usr/bin/env python3
-import sys
+"""Extract text from an uploaded file.
+
+One-shot mode (default):
+    extract_text.py <file_path>
+
+Service mode keeps a pool of warm worker processes (PyPDF2/python-docx are
+imported once per worker) and answers JSON-lines requests on stdin, or on a
+local unix socket with --socket:
+    extract_text.py --serve [--workers 4] [--timeout 30] [--socket /tmp/extract.sock]
+
+Requests:
+    {"id": "1", "path": "/uploads/a.pdf", "filename": "a.pdf", "options": {"char_budget": 3000, "timeout": 10}}
+    {"op": "cancel", "id": "1"}
+    {"op": "shutdown"}
+Responses (one line each, in completion order):
+    {"id": "1", "ok": true, "text": "...", "metadata": {"file_type": "pdf", "chars": 2999, "seconds": 0.04, "worker_pid": 123}}
+    {"id": "1", "ok": false, "error": "Timed out after 10s"}
+
+The timeout runs from when the request is received, so time spent queued
+behind other files counts. Cancelling an id that is neither queued nor
+running answers {"id": "1", "ok": false, "cancelled": false, ...}.
+"""
+import argparse
+import asyncio
+import json
 import os
+import sys
+import time
 
 # Add parent directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from src.utils.file_processor import process_uploaded_file
 
+DEFAULT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+DEFAULT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT_SECONDS", "30"))
+
+
+def extract(request: dict) -> dict:
+    """Handle a single extraction request inside a worker"""
+    request_id = request.get("id")
+    path = request.get("path")
+    filename = request.get("filename") or os.path.basename(path or "")
+    options = request.get("options") or {}
+
+    started = time.perf_counter()
+    try:
+        # Parse in this worker: a nested page pool would outlive a worker that restart() kills
+        text, file_type = process_uploaded_file(path, filename, char_budget=options.get("char_budget"), workers=1)
+    except Exception as e:
+        return {"id": request_id, "ok": False, "error": str(e)}
+
+    return {
+        "id": request_id,
+        "ok": True,
+        "text": text,
+        "metadata": {
+            "filename": filename,
+            "file_type": file_type,
+            "chars": len(text),
+            "seconds": round(time.perf_counter() - started, 4),
+            "worker_pid": os.getpid()
+        }
+    }
+
+
+def run_worker():
+    """Worker process loop: one JSON request per stdin line, one response per stdout line"""
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            response = extract(json.loads(line))
+        except Exception as e:
+            response = {"id": None, "ok": False, "error": f"Bad request: {str(e)}"}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+class WarmWorker:
+    """A long-lived `extract_text.py --worker` subprocess"""
+
+    def __init__(self):
+        self.process = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__), "--worker",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=64 * 1024 * 1024,
+        )
+
+    async def run(self, request: dict, timeout: float) -> dict:
+        self.process.stdin.write((json.dumps(request) + "\n").encode("utf-8"))
+        await self.process.stdin.drain()
+        line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        if not line:
+            raise RuntimeError("Extraction worker exited unexpectedly")
+        return json.loads(line)
+
+    async def restart(self):
+        """Kill a stuck/cancelled worker and replace it with a fresh one"""
+        if self.process and self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+        await self.start()
+
+    async def stop(self):
+        if self.process and self.process.returncode is None:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+
+
+class ExtractionService:
+    """Dispatches JSON-lines requests to a pool of warm workers"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, timeout: float = DEFAULT_TIMEOUT):
+        self.worker_count = workers
+        self.timeout = timeout
+        self.queue = asyncio.Queue()
+        self.workers = []
+        self.running = {}  # request id -> asyncio.Task running it
+        self.queued = set()
+        self.cancelled = set()
+        self.tasks = []
+
+    async def start(self):
+        for _ in range(self.worker_count):
+            worker = WarmWorker()
+            await worker.start()
+            self.workers.append(worker)
+            self.tasks.append(asyncio.create_task(self._dispatch(worker)))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+
+    async def submit(self, request: dict, respond):
+        """Handle one parsed request line; `respond` is an async callable taking a dict"""
+        op = request.get("op", "extract")
+
+        if op == "cancel":
+            if self.cancel(request.get("id")):
+                await respond({"id": request.get("id"), "ok": True, "cancelled": True})
+            else:
+                await respond({"id": request.get("id"), "ok": False, "cancelled": False,
+                               "error": "No such request queued or running"})
+        elif op == "extract":
+            timeout = float((request.get("options") or {}).get("timeout") or self.timeout)
+            deadline = asyncio.get_running_loop().time() + timeout
+            self.queued.add(request.get("id"))
+            await self.queue.put((request, respond, timeout, deadline))
+        else:
+            await respond({"id": request.get("id"), "ok": False, "error": f"Unknown op: {op}"})
+
+    def cancel(self, request_id) -> bool:
+        """Cancel a queued or running request; False if there is no such request"""
+        task = self.running.get(request_id)
+        if task is not None:
+            self.cancelled.add(request_id)
+            task.cancel()
+            return True
+        if request_id in self.queued:
+            # Skip it when a worker picks it up
+            self.cancelled.add(request_id)
+            return True
+        return False
+
+    async def _dispatch(self, worker: WarmWorker):
+        while True:
+            request, respond, timeout, deadline = await self.queue.get()
+            request_id = request.get("id")
+            self.queued.discard(request_id)
+
+            if request_id in self.cancelled:
+                self.cancelled.discard(request_id)
+                await respond({"id": request_id, "ok": False, "error": "Cancelled"})
+                continue
+
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                await respond({"id": request_id, "ok": False, "error": f"Timed out after {timeout}s"})
+                continue
+
+            task = asyncio.create_task(worker.run(request, remaining))
+            self.running[request_id] = task
+            try:
+                response = await task
+            except asyncio.CancelledError:
+                if request_id not in self.cancelled:
+                    raise  # the service itself is shutting down
+                self.cancelled.discard(request_id)
+                await worker.restart()
+                response = {"id": request_id, "ok": False, "error": "Cancelled"}
+            except asyncio.TimeoutError:
+                await worker.restart()
+                response = {"id": request_id, "ok": False, "error": f"Timed out after {timeout}s"}
+            except Exception as e:
+                await worker.restart()
+                response = {"id": request_id, "ok": False, "error": str(e)}
+            finally:
+                self.running.pop(request_id, None)
+
+            await respond(response)
+
+
+async def _serve_lines(service: ExtractionService, reader: asyncio.StreamReader, respond) -> bool:
+    """Read JSON-lines requests until EOF or a shutdown op; returns True on shutdown.
+
+    Waits for every request submitted on this stream to be answered first.
+    """
+    outstanding = 0
+    drained = asyncio.Event()
+    drained.set()
+
+    async def tracked_respond(response):
+        nonlocal outstanding
+        await respond(response)
+        outstanding -= 1
+        if outstanding == 0:
+            drained.set()
+
+    shutdown = False
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            await respond({"id": None, "ok": False, "error": f"Bad request: {str(e)}"})
+            continue
+        if request.get("op") == "shutdown":
+            shutdown = True
+            break
+        outstanding += 1
+        drained.clear()
+        await service.submit(request, tracked_respond)
+
+    await drained.wait()
+    return shutdown
+
+
+async def serve(workers: int, timeout: float, socket_path: str = None):
+    service = ExtractionService(workers, timeout)
+    await service.start()
+
+    try:
+        if socket_path:
+            shutdown = asyncio.Event()
+
+            async def handle_connection(reader, writer):
+                async def respond(response):
+                    writer.write((json.dumps(response) + "\n").encode("utf-8"))
+                    await writer.drain()
+
+                if await _serve_lines(service, reader, respond):
+                    shutdown.set()
+                writer.close()
+
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            server = await asyncio.start_unix_server(handle_connection, path=socket_path, limit=16 * 1024 * 1024)
+            print(f"📡 Extraction service listening on {socket_path} ({workers} workers)", file=sys.stderr)
+            async with server:
+                await shutdown.wait()
+            os.unlink(socket_path)
+        else:
+            reader = asyncio.StreamReader(limit=16 * 1024 * 1024)
+            loop = asyncio.get_running_loop()
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+            async def respond(response):
+                sys.stdout.write(json.dumps(response) + "\n")
+                sys.stdout.flush()
+
+            await _serve_lines(service, reader, respond)
+    finally:
+        await service.stop()
+
+
 def main():
-    if len(sys.argv) != 2:
+    parser = argparse.ArgumentParser(description="Extract text from PDF/DOCX/TXT files")
+    parser.add_argument("file_path", nargs="?", help="File to extract (one-shot mode)")
+    parser.add_argument("--serve", action="store_true", help="Run as a persistent JSON-lines extraction service")
+    parser.add_argument("--socket", help="Listen on this unix socket instead of stdin/stdout")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of warm worker processes")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Default per-file timeout in seconds")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker()
+        return
+
+    if args.serve:
+        asyncio.run(serve(args.workers, args.timeout, args.socket))
+        return
+
+    if not args.file_path:
         print("Usage: extract_text.py <file_path>", file=sys.stderr)
         sys.exit(1)
-    
-    file_path = sys.argv[1]
-    
+
+    file_path = args.file_path
+
     # Extract filename from path
     filename = os.path.basename(file_path)
-    
+
     try:
         extracted_text, file_type = process_uploaded_file(file_path, filename)
         print(extracted_text)
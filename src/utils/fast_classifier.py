@@ -0,0 +1,260 @@
+"""Local keyword/regex classifier used as a fast path ahead of the LLM.
+
+Scores `extracted_text` against per-category patterns, pulls out amounts,
+dates and names, and checks which required fields are filled in. When the
+resulting confidence clears FAST_CLASSIFIER_THRESHOLD and completeness clears
+FAST_CLASSIFIER_MIN_COMPLETENESS, ClassifyDocument uses this result instead of
+a Groq call; otherwise it falls through to the LLM.
+
+The heuristic risk estimate is only ever used to *escalate*: a document with
+obvious red flags can go straight to human review, but nothing is
+auto-approved without the LLM risk score.
+
+Evaluate against stored LLM classifications with:
+    python scripts/evaluate_fast_classifier.py
+"""
+
+import math
+import os
+import re
+from typing import Optional
+
+from utils.instrumentation import inc
+
+FAST_CLASSIFIER_ENABLED = os.getenv("FAST_CLASSIFIER_ENABLED", "true").lower() == "true"
+FAST_CLASSIFIER_THRESHOLD = float(os.getenv("FAST_CLASSIFIER_THRESHOLD", "0.85"))
+# Share of required fields that must be filled in to skip the LLM (default: all)
+FAST_CLASSIFIER_MIN_COMPLETENESS = float(os.getenv("FAST_CLASSIFIER_MIN_COMPLETENESS", "1.0"))
+# Heuristic risk at or above this routes straight to review without the LLM
+FAST_RISK_ESCALATION_SCORE = int(os.getenv("FAST_RISK_ESCALATION_SCORE", "85"))
+
+MAX_ENTITIES = 15
+
+
+def _patterns(*patterns):
+    return [re.compile(p, re.IGNORECASE) for p in patterns]
+
+
+# document_type -> (patterns confirming the type, {category: patterns})
+CATEGORY_RULES = {
+    "loan_application": (
+        _patterns(r"\bloan\b", r"\bborrower\b", r"\bapplicant\b", r"\bcredit score\b", r"\bannual income\b",
+                  r"\binterest rate\b", r"\bterm of loan\b|\bloan term\b"),
+        {
+            "personal_loan": _patterns(r"\bpersonal loan\b", r"\bhome renovation\b", r"\bdebt consolidation\b",
+                                       r"\bdate of birth\b"),
+            "business_loan": _patterns(r"\bbusiness loan\b", r"\b(?:EIN|tax id)\b", r"\bannual revenue\b",
+                                       r"\bbusiness name\b", r"\bworking capital\b"),
+            "mortgage": _patterns(r"\bmortgage\b", r"\bdown payment\b", r"\bproperty address\b",
+                                  r"\bappraised value\b", r"\bescrow\b"),
+            "auto_loan": _patterns(r"\bauto loan\b", r"\bvehicle\b", r"\bVIN\b", r"\bdealership\b"),
+            "student_loan": _patterns(r"\bstudent loan\b", r"\btuition\b", r"\benrollment\b"),
+        },
+    ),
+    "legal_contract": (
+        _patterns(r"\bagreement\b", r"\bparties\b", r"\bhereby\b", r"\bgoverning law\b", r"\bterminat",
+                  r"\bin witness whereof\b", r"\bclause\b"),
+        {
+            "nda": _patterns(r"\bnon-?disclosure\b", r"\bconfidential information\b", r"\breceiving party\b"),
+            "employment_agreement": _patterns(r"\bemployment agreement\b", r"\bemployee\b", r"\bsalary\b",
+                                              r"\bnon-?compete\b"),
+            "service_agreement": _patterns(r"\bservice(?:s)? agreement\b", r"\bstatement of work\b",
+                                           r"\bservice provider\b", r"\bdeliverables\b"),
+            "lease_agreement": _patterns(r"\blease\b", r"\blandlord\b", r"\btenant\b", r"\bpremises\b"),
+            "purchase_agreement": _patterns(r"\bpurchase agreement\b", r"\bpurchase price\b", r"\bbuyer\b",
+                                            r"\bseller\b"),
+        },
+    ),
+    "grant_application": (
+        _patterns(r"\bgrant\b", r"\bfunding\b", r"\bproposal\b", r"\bbudget\b", r"\bobjectives?\b",
+                  r"\bprincipal investigator\b", r"\boutcomes?\b"),
+        {
+            "research_grant": _patterns(r"\bresearch\b", r"\bprincipal investigator\b", r"\bhypothesis\b",
+                                        r"\bmethodology\b"),
+            "nonprofit_grant": _patterns(r"\bnon-?profit\b", r"\b501\(c\)\(3\)\b", r"\bcommunity\b",
+                                         r"\bmission\b"),
+            "small_business_grant": _patterns(r"\bsmall business\b", r"\bstartup\b", r"\bjob creation\b"),
+        },
+    ),
+    "insurance_claim": (
+        _patterns(r"\bclaim\b", r"\bpolicy (?:number|no\.?)\b", r"\bpolicyholder\b", r"\binsured\b",
+                  r"\bdate of (?:loss|incident)\b", r"\bdeductible\b"),
+        {
+            "auto_claim": _patterns(r"\bvehicle\b", r"\bcollision\b", r"\baccident\b", r"\bVIN\b"),
+            "property_claim": _patterns(r"\bproperty damage\b", r"\bfire\b", r"\bflood\b", r"\btheft\b",
+                                        r"\bhomeowner"),
+            "health_claim": _patterns(r"\bmedical\b", r"\bhospital\b", r"\bdiagnosis\b", r"\bprovider\b"),
+        },
+    ),
+}
+
+# Fields whose presence makes a document "complete" for its type
+REQUIRED_FIELDS = {
+    "loan_application": _patterns(r"\bname\b", r"\bamount\b", r"\bincome\b", r"\bemploy", r"\bsignature\b",
+                                  r"\bcredit\b"),
+    "legal_contract": _patterns(r"\bparties\b|\bbetween\b", r"\bterm\b", r"\bsignature\b|\bsigned\b",
+                                r"\bgoverning law\b", r"\bterminat"),
+    "grant_application": _patterns(r"\bbudget\b", r"\bobjectives?\b", r"\btimeline\b", r"\borganization\b",
+                                   r"\bamount\b"),
+    "insurance_claim": _patterns(r"\bpolicy\b", r"\bdate of (?:loss|incident)\b", r"\bdescription\b",
+                                 r"\bamount\b", r"\bsignature\b"),
+}
+
+RED_FLAGS = {
+    label: re.compile(pattern, re.IGNORECASE) for label, pattern in {
+        "Applicant is unemployed": r"\bunemployed\b",
+        "Bankruptcy mentioned": r"\bbankrupt",
+        "Foreclosure mentioned": r"\bforeclos",
+        # Not "default" or "collection" alone: contracts define Events of Default and collection costs
+        "Prior default": r"\bdefaulted\b|\b(?:prior|previous|past) defaults?\b"
+                         r"|\bdefault on (?:a |an |the |(?:his|her|their) )?(?:loan|mortgage|payment|debt)s?\b",
+        "Debt in collections": r"\bin collections\b|\b(?:sent|referred|turned over) to collections?\b"
+                               r"|\bcollections? (?:account|agency|agencies)\b",
+        "Late payments": r"\blate payments?\b",
+        "Judgment or lien": r"\b(?:court|civil|money|default) judgments?\b|\bjudgments? (?:against|entered)\b"
+                            r"|\b(?:tax|mechanic'?s|federal|state) liens?\b|\blien (?:on|against)\b",
+        "Possible fraud": r"\b(?:suspected|possible|alleged|potential) fraud|\bfraud (?:alert|investigation)",
+        "Marked incomplete": r"\bincomplete\b",
+        "Low credit score": r"\bcredit score:?\s*[3-5]\d{2}\b",
+    }.items()
+}
+
+_AMOUNT = re.compile(r"\$\s?\d{1,3}(?:,\d{3})+(?:\.\d{2})?|\$\s?\d+(?:\.\d{2})?")
+_DATE = re.compile(
+    r"\b\d{1,2}/\d{1,2}/\d{2,4}\b|\b\d{4}-\d{2}-\d{2}\b"
+    r"|\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.? \d{1,2},? \d{4}\b"
+)
+_NAME = re.compile(
+    r"(?:Applicant Name|Name|Borrower|Applicant|Signature|Signed by|Policyholder|Insured|Principal Investigator)"
+    r"\s*:\s*([A-Z][a-z]+(?: [A-Z]\.?)?(?: [A-Z][a-z]+)+)"
+)
+
+# The rest of a "Label: value" line after a field keyword ("Employ" + "ment Status: ..."),
+# and the next line for headings like "PARTIES:" whose value follows below
+_LABEL_VALUE = re.compile(r"[^:\n]{0,30}:([^\n]*)(?:\n([^\n]*))?")
+# Values that stand in for data rather than being it
+_PLACEHOLDER = re.compile(
+    r"\s*(?:\[[^\]]*\]|<[^>]*>|\(?(?:n/?a|none|nil|null|tbd|tba|unknown|unsigned"
+    r"|not (?:provided|applicable|available|given))\)?|[-_.\s]*)\s*",
+    re.IGNORECASE,
+)
+
+_stats = {"attempted": 0, "short_circuited": 0, "escalated": 0}
+
+
+def extract_entities(text: str) -> list:
+    """Names, amounts and dates in order of first appearance, de-duplicated"""
+    found = []
+    for pattern, group in ((_NAME, 1), (_AMOUNT, 0), (_DATE, 0)):
+        for match in pattern.finditer(text):
+            found.append((match.start(group), match.group(group).strip()))
+    entities, seen = [], set()
+    for _, value in sorted(found):
+        if value.lower() not in seen:
+            seen.add(value.lower())
+            entities.append(value)
+    return entities[:MAX_ENTITIES]
+
+
+def _hits(patterns, text: str) -> int:
+    return sum(1 for pattern in patterns if pattern.search(text))
+
+
+def _filled(pattern, text: str) -> bool:
+    """Whether a required field appears with a value: "Signature: [Unsigned]",
+    "Amount: N/A" or nothing after the colon count as missing"""
+    for match in pattern.finditer(text):
+        labelled = _LABEL_VALUE.match(text, match.end())
+        if labelled is None:
+            return True
+        value = labelled.group(1) if labelled.group(1).strip() else labelled.group(2) or ""
+        if not _PLACEHOLDER.fullmatch(value):
+            return True
+    return False
+
+
+def classify_text(document_type: str, text: str) -> Optional[dict]:
+    """Classification in the LLM schema plus a heuristic risk estimate.
+
+    Returns None for document types without rules. `confidence` doubles as
+    the fast-path decision score.
+    """
+    rules = CATEGORY_RULES.get(document_type)
+    if rules is None or not text.strip():
+        return None
+    type_patterns, categories = rules
+
+    # Saturating evidence that the text is this document type at all
+    type_hits = _hits(type_patterns, text)
+    type_confidence = 1 - math.exp(-type_hits / 2)
+
+    scores = {category: _hits(patterns, text) for category, patterns in categories.items()}
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    top_category, top_score = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0
+    # How clearly the winning subcategory beats the rest
+    margin = (top_score - runner_up) / top_score if top_score else 0.0
+
+    required = REQUIRED_FIELDS.get(document_type, [])
+    completeness = sum(1 for pattern in required if _filled(pattern, text)) / len(required) if required else 0.5
+    red_flags = [label for label, pattern in RED_FLAGS.items() if pattern.search(text)]
+
+    confidence = round(type_confidence * (0.5 + 0.5 * margin) if top_score else type_confidence * 0.3, 3)
+
+    risk_score = min(100, 15 + 20 * len(red_flags) + round((1 - completeness) * 40))
+    risk_level = "low" if risk_score < 40 else "medium" if risk_score < 70 else "high" if risk_score < 85 else "critical"
+
+    return {
+        "classification": {
+            "confidence": confidence,
+            "key_entities": extract_entities(text),
+            "document_category": top_category if top_score else "unknown",
+            "requires_review": bool(red_flags) or completeness < 0.6,
+            "completeness_score": round(completeness, 3),
+            "source": "fast_path",
+        },
+        "risk": {
+            "total_score": risk_score,
+            "risk_level": risk_level,
+            "concerns": red_flags or (["Missing required fields"] if completeness < 1 else []),
+            "source": "fast_path",
+        },
+    }
+
+
+def fast_classify(document_type: str, text: str, threshold: float = FAST_CLASSIFIER_THRESHOLD) -> tuple:
+    """(result, short_circuit): result may be None; short_circuit means skip the LLM"""
+    if not FAST_CLASSIFIER_ENABLED:
+        return None, False
+    _stats["attempted"] += 1
+    result = classify_text(document_type, text)
+    short_circuit = (
+        result is not None
+        and result["classification"]["confidence"] >= threshold
+        and result["classification"]["completeness_score"] >= FAST_CLASSIFIER_MIN_COMPLETENESS
+    )
+    if short_circuit:
+        _stats["short_circuited"] += 1
+    inc("docflow_fast_path_total", outcome="short_circuit" if short_circuit else "fall_through")
+    return result, short_circuit
+
+
+def should_escalate(risk_prescreen: Optional[dict]) -> bool:
+    """True when the heuristic risk is high enough to skip the LLM and go to review"""
+    if not FAST_CLASSIFIER_ENABLED or not risk_prescreen:
+        return False
+    escalate = risk_prescreen.get("total_score", 0) >= FAST_RISK_ESCALATION_SCORE
+    if escalate:
+        _stats["escalated"] += 1
+        inc("docflow_fast_path_total", outcome="risk_escalation")
+    return escalate
+
+
+def stats() -> dict:
+    attempted = _stats["attempted"]
+    return {
+        **_stats,
+        "threshold": FAST_CLASSIFIER_THRESHOLD,
+        "min_completeness": FAST_CLASSIFIER_MIN_COMPLETENESS,
+        "short_circuit_rate": round(_stats["short_circuited"] / attempted, 3) if attempted else 0.0,
+    }
@@ -0,0 +1,265 @@
+"""Process-wide async Groq client with pooled connections and rate limiting.
+
+All AI steps share one `AsyncGroq` instance per event loop, backed by an
+`httpx.AsyncClient` whose keep-alive pool survives across events. Every call
+goes through a limiter that respects Groq's requests-per-minute and
+tokens-per-minute quotas plus a cap on in-flight requests, so many documents
+can be processed concurrently without triggering 429 storms.
+
+The groq SDK and httpx are imported when the first client is built, so steps
+that never reach the API (cache hits, fast-path and near-duplicate results,
+API steps) do not pay for loading them.
+
+Point GROQ_BASE_URL at a local server (see scripts/fake_groq_server.py) to
+exercise the client without touching the real API.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Optional
+
+from utils.instrumentation import observe, record_stage, record_tokens
+
+if TYPE_CHECKING:
+    from groq import AsyncGroq
+
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+GROQ_TIMEOUT_SECONDS = float(os.getenv("GROQ_TIMEOUT_SECONDS", "60"))
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+GROQ_MAX_KEEPALIVE = int(os.getenv("GROQ_MAX_KEEPALIVE", "10"))
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
+GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "6000"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token for English text)"""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Continuously refilling bucket; capacity is the per-minute quota"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` tokens, returning how long the caller must wait first"""
+        with self._lock:
+            self._refill()
+            # Requests larger than the whole bucket are clamped so they can still run
+            amount = min(amount, self.capacity)
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def refund(self, amount: float):
+        """Give back tokens that were over-reserved"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Admission control for Groq calls: RPM + TPM buckets and a concurrency cap"""
+
+    def __init__(self, requests_per_minute: int = GROQ_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = GROQ_TOKENS_PER_MINUTE,
+                 max_concurrency: int = GROQ_MAX_CONCURRENCY):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self._semaphores = {}
+        self.stats = {"calls": 0, "throttled": 0, "wait_seconds": 0.0, "in_flight": 0}
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives are bound to the loop that first uses them
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores = {l: s for l, s in self._semaphores.items() if not l.is_closed()}
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def acquire(self, estimated_tokens: int):
+        await self._semaphore().acquire()
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        self.stats["calls"] += 1
+        self.stats["in_flight"] += 1
+        if wait > 0:
+            self.stats["throttled"] += 1
+            self.stats["wait_seconds"] += wait
+            await asyncio.sleep(wait)
+
+    def release(self, estimated_tokens: int, actual_tokens: Optional[int] = None):
+        if actual_tokens is not None and actual_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+        self.stats["in_flight"] -= 1
+        self._semaphore().release()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+limiter = RateLimiter()
+
+# Recent provider round-trip times per model (excluding limiter queueing)
+provider_latencies = {}
+
+
+def get_async_client() -> "AsyncGroq":
+    """Return the shared AsyncGroq client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None:
+            import httpx
+            from groq import AsyncGroq
+
+            # Drop clients whose loop has gone away
+            for stale in [l for l in _clients if l.is_closed()]:
+                del _clients[stale]
+            http_client = httpx.AsyncClient(
+                timeout=GROQ_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=GROQ_MAX_CONNECTIONS,
+                    max_keepalive_connections=GROQ_MAX_KEEPALIVE,
+                ),
+            )
+            client = AsyncGroq(
+                api_key=os.getenv("GROQ_API_KEY"),
+                base_url=GROQ_BASE_URL,
+                http_client=http_client,
+                # Retries are owned by utils.resilience (budgeted, breaker-aware)
+                max_retries=0,
+            )
+            _clients[loop] = client
+        return client
+
+
+async def chat_completion(model: str, prompt: str, temperature: float = 0.1,
+                          max_tokens: int = 500, timeout: Optional[float] = None, **kwargs):
+    """Run a single-prompt chat completion through the shared client and limiter.
+
+    `timeout` bounds the provider request only, not time spent queued in the limiter.
+    """
+    estimated = estimate_tokens(prompt) + max_tokens
+    queued_at = time.perf_counter()
+    await limiter.acquire(estimated)
+    started = time.perf_counter()
+    record_stage("llm_queue", started - queued_at)
+    actual = None
+    try:
+        response = await get_async_client().chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout or GROQ_TIMEOUT_SECONDS,
+            **kwargs
+        )
+        seconds = time.perf_counter() - started
+        record_stage("llm_generate", seconds)
+        provider_latencies.setdefault(model, deque(maxlen=200)).append(seconds)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            actual = getattr(usage, "total_tokens", None)
+            record_tokens(model, usage)
+        return response
+    finally:
+        limiter.release(estimated, actual)
+
+
+async def stream_chat_completion(model: str, prompt: str, on_delta: Callable[[str], None],
+                                 temperature: float = 0.1, max_tokens: int = 500,
+                                 timeout: Optional[float] = None, **kwargs) -> str:
+    """Streaming variant of chat_completion: returns the full text, calling
+    `on_delta(text_so_far)` as tokens arrive.
+
+    `timeout` bounds the wait for each chunk; time-to-first-token is recorded
+    as the `llm_first_token` stage.
+    """
+    estimated = estimate_tokens(prompt) + max_tokens
+    queued_at = time.perf_counter()
+    await limiter.acquire(estimated)
+    started = time.perf_counter()
+    record_stage("llm_queue", started - queued_at)
+    actual = None
+    try:
+        stream = await get_async_client().chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout or GROQ_TIMEOUT_SECONDS,
+            stream=True,
+            **kwargs
+        )
+        text = ""
+        try:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    if not text:
+                        first_token = time.perf_counter() - started
+                        record_stage("llm_first_token", first_token)
+                        observe("docflow_llm_time_to_first_token_seconds", first_token, model=model)
+                    text += delta
+                    on_delta(text)
+                # Groq reports usage on the final chunk under x_groq
+                x_groq = getattr(chunk, "x_groq", None)
+                usage = chunk.usage or (x_groq.usage if x_groq is not None else None)
+                if usage is not None:
+                    actual = getattr(usage, "total_tokens", None)
+                    record_tokens(model, usage)
+        except Exception as e:
+            converted = _stream_error(e, stream)
+            if converted is e:
+                raise
+            raise converted from e
+        seconds = time.perf_counter() - started
+        record_stage("llm_generate", seconds)
+        provider_latencies.setdefault(model, deque(maxlen=200)).append(seconds)
+        return text
+    finally:
+        limiter.release(estimated, actual)
+
+
+def _stream_error(error: Exception, stream) -> Exception:
+    """Map a failure while reading an accepted stream onto the SDK's connection errors.
+
+    A dropped connection surfaces as a raw httpx error and an error event as a
+    bare groq.APIError; as APIConnectionError/APITimeoutError both are retried
+    and counted by utils.resilience like a failed request.
+    """
+    import groq
+    import httpx
+
+    if isinstance(error, groq.APIConnectionError) or not isinstance(error, (httpx.TransportError, groq.APIError)):
+        return error
+    request = stream.response.request
+    if isinstance(error, httpx.TimeoutException):
+        return groq.APITimeoutError(request=request)
+    return groq.APIConnectionError(message=f"Stream interrupted: {error}", request=request)
+
+
+async def close_clients():
+    """Close the pooled client for the running loop (for scripts and shutdown)"""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.pop(loop, None)
+    if client is not None:
+        await client.close()
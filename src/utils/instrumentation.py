@@ -0,0 +1,333 @@
+"""Low-overhead timing and token instrumentation for the processing steps.
+
+Step handlers are wrapped with `@instrumented_step("ClassifyDocument")`;
+inside them `with stage("llm"):` times a named stage. The Groq client records
+queue wait, generation time and `usage` tokens, and every SQL statement on
+the shared engine is timed. Everything is tagged with the current step and
+document_id through context variables, so no arguments need threading
+through the helpers.
+
+Aggregates are kept in-process as Prometheus-style counters/histograms
+(labelled by step and stage only; document_id would explode cardinality)
+and, in processes that have run a step, snapshotted to METRICS_DIR (at most
+every METRICS_FLUSH_INTERVAL seconds, and at exit) so the /api/v1/metrics
+endpoint can merge all step processes; snapshots of processes that are no
+longer alive are deleted when merging. Scripts and migrations that only
+import the helpers never write one. Per-document breakdowns go to a
+ring buffer and a single log line per step. When OTEL_EXPORTER_OTLP_ENDPOINT
+is set and the opentelemetry SDK is installed, stages are also exported as
+spans carrying document_id.
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_DIR = os.getenv("METRICS_DIR") or os.path.join(tempfile.gettempdir(), "docflow-metrics")
+METRICS_RECENT_DOCUMENTS = int(os.getenv("METRICS_RECENT_DOCUMENTS", "200"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
+
+# Seconds; covers fast DB statements up to slow, rate-limited LLM calls
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_step = contextvars.ContextVar("docflow_step", default=None)
+_document_id = contextvars.ContextVar("docflow_document_id", default=None)
+_timings = contextvars.ContextVar("docflow_stage_timings", default=None)
+
+_lock = threading.Lock()
+_counters = {}    # (metric, labels) -> float
+_histograms = {}  # (metric, labels) -> [bucket counts..., count, sum]
+_recent = deque(maxlen=METRICS_RECENT_DOCUMENTS)
+_last_flush = 0.0
+# Set once this process runs a step; only such processes write snapshots
+_ran_step = False
+
+HELP = {
+    "docflow_step_seconds": ("histogram", "Wall time of a step handler"),
+    "docflow_stage_seconds": ("histogram", "Wall time of a named stage inside a step"),
+    "docflow_db_query_seconds": ("histogram", "Time spent executing SQL statements"),
+    "docflow_llm_tokens_total": ("counter", "Groq tokens reported in response usage"),
+    "docflow_llm_time_to_first_token_seconds": ("histogram", "Time from request to first streamed token"),
+    "docflow_step_runs_total": ("counter", "Step handler invocations by outcome"),
+    "docflow_fast_path_total": ("counter", "Local fast-path classifier decisions"),
+    "docflow_near_duplicate_total": ("counter", "Near-duplicate lookups by outcome (reused, seeded, misses)"),
+    "docflow_model_calls_total": ("counter", "LLM calls by step and model tier"),
+    "docflow_model_escalations_total": ("counter", "Small-model answers escalated to the large model"),
+    "docflow_model_latency_seconds": ("histogram", "LLM call latency by step and model tier"),
+    "docflow_llm_resilience_total": ("counter", "Retries, hedges and fast failures of Groq calls"),
+    "docflow_llm_breaker_transitions_total": ("counter", "Circuit breaker state changes"),
+}
+
+try:
+    if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        _provider = TracerProvider(resource=Resource.create({"service.name": "docflow-ai"}))
+        _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        trace.set_tracer_provider(_provider)
+        _tracer = trace.get_tracer("docflow")
+    else:
+        _tracer = None
+except ImportError:
+    _tracer = None
+
+
+def _key(metric: str, labels: dict) -> tuple:
+    return metric, tuple(sorted(labels.items()))
+
+
+def inc(metric: str, value: float = 1.0, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = _key(metric, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + value
+
+
+def observe(metric: str, seconds: float, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = _key(metric, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * len(BUCKETS) + [0, 0.0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+        hist[-2] += 1
+        hist[-1] += seconds
+
+
+def record_stage(name: str, seconds: float):
+    """Record an already-measured stage against the current step/document"""
+    observe("docflow_stage_seconds", seconds, step=_step.get() or "none", stage=name)
+    timings = _timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as `name` within the current step"""
+    started = time.perf_counter()
+    span = None
+    if _tracer is not None:
+        span = _tracer.start_span(name, attributes={
+            "docflow.step": _step.get() or "none",
+            "docflow.document_id": _document_id.get() or "",
+        })
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+        if span is not None:
+            span.end()
+
+
+def record_tokens(model: str, usage):
+    """Count prompt/completion tokens from a Groq response `usage` object"""
+    if usage is None:
+        return
+    step = _step.get() or "none"
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            inc("docflow_llm_tokens_total", value, step=step, model=model, kind=kind.split("_")[0])
+            timings = _timings.get()
+            if timings is not None:
+                timings[kind] = timings.get(kind, 0) + value
+
+
+def instrument_engine(engine):
+    """Time every statement executed on `engine` (attributed to the current step)"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("docflow_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["docflow_query_started"].pop()
+        record_stage("db_query", seconds)
+        observe("docflow_db_query_seconds", seconds, step=_step.get() or "none")
+
+
+def instrumented_step(step_name: str):
+    """Decorator for `async def handler(input_data, context)` step handlers"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(input_data, context, *args, **kwargs):
+            global _ran_step
+            _ran_step = True
+            document_id = input_data.get("document_id") if isinstance(input_data, dict) else None
+            tokens = (_step.set(step_name), _document_id.set(document_id), _timings.set({}))
+            started = time.perf_counter()
+            outcome = "ok"
+            try:
+                return await handler(input_data, context, *args, **kwargs)
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                seconds = time.perf_counter() - started
+                timings = _timings.get()
+                observe("docflow_step_seconds", seconds, step=step_name)
+                inc("docflow_step_runs_total", step=step_name, outcome=outcome)
+                _step.reset(tokens[0])
+                _document_id.reset(tokens[1])
+                _timings.reset(tokens[2])
+                _finish_step(context, step_name, document_id, seconds, outcome, timings)
+        return wrapper
+    return decorator
+
+
+def _finish_step(context, step_name, document_id, seconds, outcome, timings):
+    if not METRICS_ENABLED:
+        return
+    entry = {
+        "step": step_name,
+        "document_id": document_id,
+        "outcome": outcome,
+        "seconds": round(seconds, 4),
+        "stages": {k: round(v, 4) if isinstance(v, float) else v for k, v in (timings or {}).items()},
+        "finished_at": time.time(),
+    }
+    with _lock:
+        _recent.append(entry)
+
+    if document_id and context is not None:
+        stages = ", ".join(f"{k} {v:.2f}s" for k, v in entry["stages"].items() if isinstance(v, float))
+        context.logger.info(f"⏱️ {step_name} {document_id}: {seconds:.2f}s" + (f" ({stages})" if stages else ""))
+    if time.monotonic() - _last_flush >= METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "counters": [[m, list(map(list, l)), v] for (m, l), v in _counters.items()],
+            "histograms": [[m, list(map(list, l)), list(h)] for (m, l), h in _histograms.items()],
+            "recent": list(_recent),
+        }
+
+
+def flush():
+    """Write this process's snapshot to METRICS_DIR for the metrics endpoint"""
+    global _last_flush
+    if not (METRICS_ENABLED and _ran_step):
+        return
+    _last_flush = time.monotonic()
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot(), f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # metrics must never fail a step
+
+
+atexit.register(flush)
+
+
+def _alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows; keep every snapshot
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect() -> dict:
+    """Merge snapshots from every live step process with this process's own metrics"""
+    counters, histograms, recent = {}, {}, []
+    try:
+        filenames = [f for f in os.listdir(METRICS_DIR) if f.endswith(".json")]
+    except FileNotFoundError:
+        filenames = []
+
+    snapshots = [snapshot()]
+    for filename in filenames:
+        path = os.path.join(METRICS_DIR, filename)
+        pid = filename[:-len(".json")]
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        if not _alive(int(pid)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+
+    for data in snapshots:
+        for metric, labels, value in data["counters"]:
+            key = (metric, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0.0) + value
+        for metric, labels, values in data["histograms"]:
+            key = (metric, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                merged[i] += value
+        recent.extend(data.get("recent", []))
+
+    recent.sort(key=lambda e: e["finished_at"])
+    return {"counters": counters, "histograms": histograms, "recent": recent}
+
+
+def _format_labels(labels, extra: Optional[tuple] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in items)
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus(merged: dict) -> str:
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    by_metric = {}
+    for (metric, labels), value in merged["counters"].items():
+        by_metric.setdefault(metric, []).append(("counter", labels, value))
+    for (metric, labels), values in merged["histograms"].items():
+        by_metric.setdefault(metric, []).append(("histogram", labels, values))
+
+    for metric in sorted(by_metric):
+        kind, help_text = HELP.get(metric, (by_metric[metric][0][0], metric))
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for kind, labels, value in by_metric[metric]:
+            if kind == "counter":
+                lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+                continue
+            for bound, count in zip(BUCKETS, value):
+                lines.append(f"{metric}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {count}")
+            lines.append(f"{metric}_bucket{_format_labels(labels, ('le', '+Inf'))} {value[-2]}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {value[-2]}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {value[-1]:.6f}")
+    return "\n".join(lines) + "\n"
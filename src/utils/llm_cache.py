@@ -0,0 +1,218 @@
+"""Content-addressed cache for Groq chat completions.
+
+Two tiers:
+  1. An in-process LRU (bounded by LLM_CACHE_MAX_ENTRIES)
+  2. A persistent Postgres table (`llm_cache`) shared by every worker
+
+Entries are keyed on sha256(model, prompt, temperature, max_tokens), so a
+re-submitted document with the same prompt never pays for a second call.
+Callers only store responses that passed their validation (see
+cached_completion), and the PurgeLLMCache cron step deletes expired rows.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from utils.database import SessionLocal, LLMCacheEntry, db_executor
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PERSISTENT = os.getenv("LLM_CACHE_PERSISTENT", "true").lower() == "true"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+def make_cache_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+    """Build a stable content hash for a completion request"""
+    payload = json.dumps(
+        {"model": model, "prompt": prompt, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Bounded LRU in front of the persistent `llm_cache` table"""
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+                 persistent: bool = LLM_CACHE_PERSISTENT):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self._memory = OrderedDict()  # key -> (response_text, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    # ------------------------------------------------------------------
+    # Counters
+    # ------------------------------------------------------------------
+    def _count(self, step: str, outcome: str):
+        with self._lock:
+            counters = self._stats.setdefault(
+                step, {"memory_hits": 0, "db_hits": 0, "misses": 0, "bypassed": 0}
+            )
+            counters[outcome] += 1
+
+    def stats(self, step: Optional[str] = None) -> dict:
+        """Return hit/miss counters, for one step or all of them"""
+        with self._lock:
+            if step is not None:
+                return dict(self._stats.get(step, {}))
+            return {name: dict(counters) for name, counters in self._stats.items()}
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+    def get(self, key: str, step: str = "default", bypass: bool = False) -> Optional[str]:
+        """Return the cached response text, or None on a miss"""
+        if bypass or not LLM_CACHE_ENABLED:
+            self._count(step, "bypassed")
+            return None
+
+        now = datetime.utcnow()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response_text, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                else:
+                    del self._memory[key]
+                    entry = None
+
+        if entry is not None:
+            self._count(step, "memory_hits")
+            return entry[0]
+
+        if self.persistent:
+            row = self._db_get(key, now)
+            if row is not None:
+                # Keep the row's expiry; a fresh one would outlive the persistent entry
+                response_text, expires_at = row
+                self._remember(key, response_text, expires_at)
+                self._count(step, "db_hits")
+                return response_text
+
+        self._count(step, "misses")
+        return None
+
+    def set(self, key: str, model: str, response_text: str):
+        """Store a response in both tiers"""
+        if not LLM_CACHE_ENABLED or response_text is None:
+            return
+
+        expires_at = self._expiry(datetime.utcnow())
+        self._remember(key, response_text, expires_at)
+
+        if self.persistent:
+            self._db_set(key, model, response_text, expires_at)
+
+    async def aget(self, key: str, step: str = "default", bypass: bool = False) -> Optional[str]:
+        """Async get(); the persistent lookup runs on the DB executor"""
+        if bypass or not LLM_CACHE_ENABLED or not self.persistent:
+            return self.get(key, step, bypass)
+        with self._lock:
+            in_memory = key in self._memory
+        if in_memory:
+            return self.get(key, step, bypass)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(db_executor, self.get, key, step, bypass)
+
+    async def aset(self, key: str, model: str, response_text: str):
+        """Async set(); the persistent write runs on the DB executor"""
+        if not self.persistent:
+            self.set(key, model, response_text)
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(db_executor, self.set, key, model, response_text)
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from the persistent tier, returns rows removed"""
+        db = SessionLocal()
+        try:
+            removed = db.query(LLMCacheEntry).filter(
+                LLMCacheEntry.expires_at.isnot(None),
+                LLMCacheEntry.expires_at <= datetime.utcnow()
+            ).delete(synchronize_session=False)
+            db.commit()
+            return removed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def apurge_expired(self) -> int:
+        """Async purge_expired() on the DB executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(db_executor, self.purge_expired)
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _expiry(self, now: datetime) -> Optional[datetime]:
+        if self.ttl_seconds <= 0:
+            return None
+        return now + timedelta(seconds=self.ttl_seconds)
+
+    def _remember(self, key: str, response_text: str, expires_at: Optional[datetime]):
+        with self._lock:
+            self._memory[key] = (response_text, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _db_get(self, key: str, now: datetime) -> Optional[tuple]:
+        """(response_text, expires_at) of a live row, or None"""
+        db = SessionLocal()
+        try:
+            entry = db.query(LLMCacheEntry).filter(LLMCacheEntry.cache_key == key).first()
+            if entry is None:
+                return None
+            if entry.expires_at is not None and entry.expires_at <= now:
+                db.delete(entry)
+                db.commit()
+                return None
+            entry.hit_count = (entry.hit_count or 0) + 1
+            row = (entry.response_text, entry.expires_at)
+            db.commit()
+            return row
+        except Exception:
+            # The persistent tier is best-effort; a broken cache must never fail a step
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def _db_set(self, key: str, model: str, response_text: str, expires_at: Optional[datetime]):
+        db = SessionLocal()
+        try:
+            db.merge(LLMCacheEntry(
+                cache_key=key,
+                model=model,
+                response_text=response_text,
+                created_at=datetime.utcnow(),
+                expires_at=expires_at,
+                hit_count=0
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+        finally:
+            db.close()
+
+
+# Process-wide cache shared by all AI steps
+llm_cache = LLMCache()
@@ -0,0 +1,215 @@
+"""Model tiering for the AI steps: small fast model first, 70B when needed.
+
+Short documents go to MODEL_SMALL. Its answer is checked by a per-step
+validator and the call is escalated to MODEL_LARGE when the JSON does not
+parse, the classification confidence is below `min_confidence`, the risk
+score lands within `risk_margin` points of the review threshold, or the
+summary is malformed. Long documents (above `small_max_chars`) go straight
+to the large model.
+
+Defaults are per DocumentType and can be overridden with MODEL_ROUTING_POLICY,
+a JSON object keyed by document type (or "default"), e.g.
+    {"legal_contract": {"small_max_chars": 0}, "default": {"min_confidence": 0.8}}
+"""
+
+import json
+import os
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from utils.analysis import DEFAULT_MODEL, HIGH_RISK_THRESHOLD, cached_completion, parse_json_response
+from utils.instrumentation import inc, observe
+
+MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "true").lower() == "true"
+MODEL_SMALL = os.getenv("MODEL_SMALL", "llama-3.1-8b-instant")
+MODEL_LARGE = os.getenv("MODEL_LARGE", DEFAULT_MODEL)
+
+DEFAULT_POLICY = {
+    # Documents longer than this skip the small model entirely
+    "small_max_chars": 6000,
+    "min_confidence": 0.75,
+    # Risk scores this close to HIGH_RISK_THRESHOLD are re-scored by the large model
+    "risk_margin": 10,
+    # Optional per-step completion budgets, e.g. {"classify": 300}
+    "max_tokens": {},
+}
+
+POLICIES = {
+    "loan_application": {},
+    "grant_application": {},
+    "insurance_claim": {},
+    # Contracts are dense; only short ones are trusted to the small model
+    "legal_contract": {"small_max_chars": 3000, "min_confidence": 0.8},
+}
+
+_overrides = json.loads(os.getenv("MODEL_ROUTING_POLICY") or "{}")
+
+_stats = {}  # step -> counters
+_latencies = {"small": deque(maxlen=500), "large": deque(maxlen=500)}
+
+
+def policy_for(document_type: Optional[str]) -> dict:
+    policy = dict(DEFAULT_POLICY)
+    policy.update(_overrides.get("default", {}))
+    policy.update(POLICIES.get(document_type or "", {}))
+    policy.update(_overrides.get(document_type or "", {}))
+    return policy
+
+
+def choose_tier(document_type: Optional[str], content_length: Optional[int]) -> str:
+    if not MODEL_ROUTING_ENABLED:
+        return "large"
+    limit = policy_for(document_type)["small_max_chars"]
+    if content_length is None or content_length > limit:
+        return "large"
+    return "small"
+
+
+# Validators return an escalation reason, or None when the small model's answer is usable.
+# Well-formed JSON with unusable fields ("confidence": "high", a list instead of
+# an object) escalates as "invalid_fields" rather than raising
+
+def validate_classification(text: str, policy: dict) -> Optional[str]:
+    try:
+        result = parse_json_response(text)
+    except ValueError:
+        return "invalid_json"
+    try:
+        confidence = float(result.get("confidence") or 0)
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return "invalid_fields"
+    if confidence < policy["min_confidence"]:
+        return "low_confidence"
+    return None
+
+
+def validate_summary(text: str, policy: dict) -> Optional[str]:
+    if len(text.strip()) < 100 or "overview" not in text.lower():
+        return "malformed_summary"
+    return None
+
+
+def validate_risk(text: str, policy: dict) -> Optional[str]:
+    try:
+        result = parse_json_response(text)
+    except ValueError:
+        return "invalid_json"
+    try:
+        total_score = float(result["total_score"])
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return "invalid_fields"
+    if abs(total_score - HIGH_RISK_THRESHOLD) <= policy["risk_margin"]:
+        return "near_threshold"
+    return None
+
+
+def validate_fused(text: str, policy: dict) -> Optional[str]:
+    try:
+        result = parse_json_response(text)
+    except ValueError:
+        return "invalid_json"
+    if not isinstance(result, dict) or not isinstance(result.get("summary") or "", str):
+        return "invalid_fields"
+    return (
+        validate_classification(json.dumps(result.get("classification") or {}), policy)
+        or validate_summary(result.get("summary") or "", policy)
+        or validate_risk(json.dumps(result.get("risk") or {}), policy)
+    )
+
+
+def validate_json(text: str, policy: dict) -> Optional[str]:
+    try:
+        parse_json_response(text)
+    except ValueError:
+        return "invalid_json"
+    return None
+
+
+# Reasons that mean the answer is unusable, as opposed to usable but worth a second opinion
+MALFORMED = {"invalid_json", "invalid_fields", "malformed_summary"}
+
+VALIDATORS = {
+    "classify": validate_classification,
+    "summarize": validate_summary,
+    "risk_score": validate_risk,
+    "fused": validate_fused,
+    "chunk_map": validate_json,
+}
+
+
+def _record(step: str, tier: str, seconds: float):
+    stats = _stats.setdefault(step, {"small": 0, "large": 0, "escalated": 0, "reasons": {}})
+    stats[tier] += 1
+    _latencies[tier].append(seconds)
+    inc("docflow_model_calls_total", step=step, tier=tier)
+    observe("docflow_model_latency_seconds", seconds, step=step, tier=tier)
+
+
+async def _timed_completion(prompt, step, tier, max_tokens, bypass, on_delta=None, cacheable=None):
+    started = time.perf_counter()
+    text = await cached_completion(
+        prompt, step=step, model=MODEL_SMALL if tier == "small" else MODEL_LARGE,
+        max_tokens=max_tokens, bypass=bypass, on_delta=on_delta, cacheable=cacheable
+    )
+    _record(step, tier, time.perf_counter() - started)
+    return text
+
+
+async def routed_completion(prompt: str, step: str, document_type: Optional[str] = None,
+                            content_length: Optional[int] = None, max_tokens: int = 500,
+                            bypass: bool = False, validate: Optional[Callable] = None,
+                            on_delta: Optional[Callable[[str], None]] = None) -> str:
+    """Completion text from the cheapest tier whose answer passes the step's validator.
+
+    `on_delta` streams partial text; if the small model's answer is escalated,
+    the large model's stream replaces it from the start.
+    """
+    policy = policy_for(document_type)
+    max_tokens = policy["max_tokens"].get(step, max_tokens)
+    tier = choose_tier(document_type, content_length)
+    validator = validate or VALIDATORS.get(step, validate_json)
+
+    # Either tier's answer is cached only if it is well-formed; a low-confidence
+    # small answer is kept, so a repeat escalates without a second small call
+    def cacheable(text):
+        return validator(text, policy) not in MALFORMED
+
+    if tier == "small":
+        text = await _timed_completion(prompt, step, "small", max_tokens, bypass, on_delta, cacheable)
+        reason = validator(text, policy)
+        if reason is None:
+            return text
+        stats = _stats[step]
+        stats["escalated"] += 1
+        stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+        inc("docflow_model_escalations_total", step=step, reason=reason)
+
+    return await _timed_completion(prompt, step, "large", max_tokens, bypass, on_delta, cacheable)
+
+
+def _p95(samples) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3)
+
+
+def stats() -> dict:
+    """Per-step tier usage and escalation rate, plus per-tier latency"""
+    steps = {}
+    for step, counters in _stats.items():
+        steps[step] = {
+            **counters,
+            "escalation_rate": round(counters["escalated"] / counters["small"], 3) if counters["small"] else 0.0,
+        }
+    tiers = {
+        tier: {
+            "model": MODEL_SMALL if tier == "small" else MODEL_LARGE,
+            "samples": len(samples),
+            "mean_seconds": round(sum(samples) / len(samples), 3) if samples else None,
+            "p95_seconds": _p95(samples),
+        }
+        for tier, samples in _latencies.items()
+    }
+    return {"steps": steps, "tiers": tiers}
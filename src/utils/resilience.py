@@ -0,0 +1,269 @@
+"""Deadlines, retries, hedging and a circuit breaker around Groq calls.
+
+`resilient_call(make_call, model)` wraps a coroutine factory that takes the
+per-attempt timeout:
+
+- each attempt's provider request is bounded by LLM_ATTEMPT_TIMEOUT_SECONDS
+  (time queued in our own rate limiter does not count), and no retry is
+  scheduled past the overall LLM_CALL_DEADLINE_SECONDS;
+- retryable failures (timeouts, connection errors, 429, 5xx) are retried
+  with exponential backoff and full jitter, honouring Retry-After, but only
+  while the process-wide retry budget has tokens, so a provider outage
+  cannot turn into a retry storm;
+- with LLM_HEDGE_ENABLED, a duplicate request is sent once the first has
+  been outstanding longer than the model's recent p95 provider latency, and
+  the first answer wins (hedges spend retry budget too);
+- consecutive failures open a circuit breaker that fails fast with
+  ProviderUnavailable until a half-open probe succeeds.
+
+Steps catch ProviderUnavailable (and any other error) and park the document
+(status FAILED with a comment) instead of silently dropping it; parked
+documents are resumed by utils/checkpoints.py.
+
+Exercise it against the fake server with scripts/resilience_drill.py.
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Awaitable, Callable, Optional
+
+from utils.database import run_in_session
+from utils.groq_client import provider_latencies
+from utils.instrumentation import inc
+
+LLM_ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", "20"))
+LLM_CALL_DEADLINE_SECONDS = float(os.getenv("LLM_CALL_DEADLINE_SECONDS", "60"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+# Retries (and hedges) may add at most this fraction on top of first attempts
+LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))
+LLM_RETRY_BUDGET_MIN = float(os.getenv("LLM_RETRY_BUDGET_MIN", "10"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0.5"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+_retryable_errors = None
+
+
+def retryable_errors() -> tuple:
+    """groq exception types worth retrying (the SDK is imported on first use)"""
+    global _retryable_errors
+    if _retryable_errors is None:
+        import groq
+        _retryable_errors = (
+            groq.APIConnectionError,  # includes APITimeoutError
+            groq.RateLimitError,
+            groq.InternalServerError,
+        )
+    return _retryable_errors
+
+
+class ProviderUnavailable(Exception):
+    """The AI provider is degraded; the document should be parked and retried later"""
+
+
+class RetryBudget:
+    """Bucket of retry tokens: each first attempt deposits `ratio`, each retry or hedge spends 1"""
+
+    def __init__(self, ratio: float = LLM_RETRY_BUDGET_RATIO, minimum: float = LLM_RETRY_BUDGET_MIN):
+        self.ratio = ratio
+        self.capacity = minimum
+        self.tokens = minimum
+
+    def record_request(self):
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half_open after a cool-down -> closed on success"""
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = LLM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            self.probe_in_flight = False
+        if self.state == "half_open" and not self.probe_in_flight:
+            # Exactly one probe call decides whether the provider has recovered
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.state != "closed":
+            inc("docflow_llm_breaker_transitions_total", to="closed")
+        self.state = "closed"
+        self.failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                inc("docflow_llm_breaker_transitions_total", to="open")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.probe_in_flight = False
+
+    def release_probe(self):
+        """Free the half-open probe slot after a call that said nothing about the provider"""
+        self.probe_in_flight = False
+
+
+budget = RetryBudget()
+breaker = CircuitBreaker()
+_stats = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failures": 0,
+          "rejected_open": 0, "budget_exhausted": 0, "deadline_exceeded": 0}
+
+
+def _count(name: str):
+    _stats[name] += 1
+    inc("docflow_llm_resilience_total", event=name)
+
+
+def hedge_delay(model: str) -> Optional[float]:
+    """p95 of recent provider latencies for `model`, or None until there are enough samples"""
+    samples = provider_latencies.get(model)
+    if not LLM_HEDGE_ENABLED or not samples or len(samples) < LLM_HEDGE_MIN_SAMPLES:
+        return None
+    ordered = sorted(samples)
+    return max(LLM_HEDGE_MIN_DELAY_SECONDS, ordered[int(len(ordered) * 0.95) - 1])
+
+
+def backoff_delay(attempt: int, error: Exception) -> float:
+    """Full-jitter exponential backoff; a server Retry-After wins if it is longer"""
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return max(delay, float(retry_after)) if retry_after else delay
+    except ValueError:
+        return delay
+
+
+async def _hedged(make_call: Callable[[float], Awaitable], model: str, timeout: float, hedge: bool = True):
+    """One attempt, plus a duplicate if the first outlives the p95 latency"""
+    tasks = [asyncio.ensure_future(make_call(timeout))]
+    try:
+        delay = hedge_delay(model) if hedge else None
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and budget.try_spend():
+                _count("hedges")
+                tasks.append(asyncio.ensure_future(make_call(timeout)))
+
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if len(tasks) > 1 and task is tasks[1]:
+                        _count("hedge_wins")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def resilient_call(make_call: Callable[[float], Awaitable], model: str,
+                         attempt_timeout: float = LLM_ATTEMPT_TIMEOUT_SECONDS,
+                         deadline: float = LLM_CALL_DEADLINE_SECONDS, hedge: bool = True):
+    """Run `make_call(timeout)` with budgeted retries, hedging and the circuit breaker.
+
+    Pass hedge=False for calls with side effects while in flight (streamed
+    completions), where a duplicate request would interleave its output.
+    """
+    if not breaker.allow():
+        _count("rejected_open")
+        raise ProviderUnavailable("Circuit breaker open: AI provider degraded")
+
+    _stats["calls"] += 1
+    budget.record_request()
+    deadline_at = time.monotonic() + deadline
+    attempt = 0
+    import groq  # cached after the first call; see retryable_errors()
+
+    while True:
+        try:
+            result = await _hedged(make_call, model, attempt_timeout, hedge)
+        except retryable_errors() as e:
+            breaker.record_failure()
+            _count("failures")
+            attempt += 1
+            if attempt >= LLM_MAX_ATTEMPTS:
+                raise ProviderUnavailable(f"Gave up after {attempt} attempts: {e!r}") from e
+            if not breaker.allow():
+                _count("rejected_open")
+                raise ProviderUnavailable("Circuit breaker opened: AI provider degraded") from e
+            delay = backoff_delay(attempt, e)
+            if time.monotonic() + delay >= deadline_at:
+                _count("deadline_exceeded")
+                raise ProviderUnavailable(f"Deadline of {deadline}s exceeded: {e!r}") from e
+            if not budget.try_spend():
+                _count("budget_exhausted")
+                raise ProviderUnavailable(f"Retry budget exhausted: {e!r}") from e
+            _count("retries")
+            await asyncio.sleep(delay)
+            continue
+        except groq.APIStatusError:
+            # A 4xx answer means the provider is up; the request itself is bad
+            breaker.record_success()
+            raise
+        except groq.APIError:
+            # Any other provider error (e.g. an error event mid-stream) still counts against it
+            breaker.record_failure()
+            _count("failures")
+            raise
+        except BaseException:
+            # Our own bugs or a cancelled caller: no verdict, but a half-open
+            # probe must not hold the slot forever or the breaker never closes
+            breaker.release_probe()
+            raise
+
+        breaker.record_success()
+        return result
+
+
+def stats() -> dict:
+    return {
+        **_stats,
+        "breaker_state": breaker.state,
+        "retry_budget_tokens": round(budget.tokens, 2),
+        "hedge_delays": {model: hedge_delay(model) for model in provider_latencies},
+    }
+
+
+async def park_document(document_id: str, step: str, reason: str, **pending):
+    """Mark a document FAILED with a comment so it can be resumed once the provider recovers.
+
+    `pending` carries write-behind results (classification, summary, signature)
+    that would otherwise be lost with the event.
+    """
+    # Imported here: the repository depends on utils.analysis, which imports this module
+    from utils.document_repository import park
+
+    await run_in_session(park, document_id, step, reason, **pending)
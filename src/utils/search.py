@@ -0,0 +1,164 @@
+"""Full-text and entity search over documents (PostgreSQL).
+
+The bulky text lives compressed in document_blobs, so the database cannot
+derive a tsvector from it itself. The repository writes the search columns
+in the same statements that store the text instead:
+
+- `search_vector`: to_tsvector of extracted_text (weight B, first
+  SEARCH_MAX_CHARS characters) set on insert, plus the summary (weight A)
+  swapped in whenever a summary is saved; GIN-indexed;
+- `key_entities`: the classification's entities, lower-cased, as JSONB
+  (GIN, jsonb_path_ops) for containment filters;
+- `max_amount`: the largest dollar amount among those entities (btree).
+
+search() ranks matches with ts_rank_cd and builds snippets in Python from the
+hits' summary/text, so only one page of blobs is ever decompressed.
+Documents stored before these columns existed are indexed with
+scripts/backfill_search.py. On SQLite the columns stay empty and search()
+is unavailable.
+"""
+
+import os
+import re
+from typing import Optional
+
+from sqlalchemy import Text, bindparam, cast, func, literal, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+
+from utils.database import (
+    Document, DocumentBlob, DocumentStatus, DocumentType, decompress_text, read_text_field
+)
+
+SEARCH_CONFIG = os.getenv("SEARCH_CONFIG", "english")
+SEARCH_MAX_CHARS = int(os.getenv("SEARCH_MAX_CHARS", "100000"))
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "200"))
+
+_AMOUNT = re.compile(r"\$\s?(\d[\d,]*(?:\.\d+)?)\s*(k|m|million|thousand)?\b", re.IGNORECASE)
+_MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6}
+_WORD = re.compile(r"\w+")
+
+documents = Document.__table__
+
+
+def supported(db) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def text_vector(text: str):
+    """SQL expression for the weight-B vector of a document's extracted text"""
+    return func.setweight(func.to_tsvector(SEARCH_CONFIG, (text or "")[:SEARCH_MAX_CHARS]), "B")
+
+
+def text_vector_param(name: str):
+    """text_vector() of a bound parameter, for multi-row inserts; pass each
+    row's text already cut to SEARCH_MAX_CHARS"""
+    return func.setweight(func.to_tsvector(SEARCH_CONFIG, bindparam(name, type_=Text)), "B")
+
+
+def with_summary(summary: str):
+    """SQL expression replacing the summary lexemes (weight A) of search_vector"""
+    current = func.coalesce(documents.c.search_vector, cast("", TSVECTOR))
+    return func.ts_filter(current, literal("{b}")).op("||")(
+        func.setweight(func.to_tsvector(SEARCH_CONFIG, summary[:SEARCH_MAX_CHARS]), "A")
+    )
+
+
+def parse_amount(entity: str) -> Optional[float]:
+    """Dollar amount in an entity such as "$500,000" or "$1.2 million", else None"""
+    match = _AMOUNT.search(entity)
+    if not match:
+        return None
+    value = float(match.group(1).replace(",", ""))
+    return value * _MULTIPLIERS.get((match.group(2) or "").lower(), 1)
+
+
+def entity_values(classification: dict) -> dict:
+    """key_entities/max_amount column values for a classification"""
+    entities = [str(e).strip().lower() for e in classification.get("key_entities") or [] if str(e).strip()]
+    amounts = [a for a in (parse_amount(e) for e in entities) if a is not None]
+    return {"key_entities": entities, "max_amount": max(amounts) if amounts else None}
+
+
+def snippet(text: str, terms: list, width: int = SEARCH_SNIPPET_CHARS) -> str:
+    """About `width` characters of text around the first query term, terms in <b></b>"""
+    if not text:
+        return ""
+    lowered = text.lower()
+    hits = [lowered.find(term) for term in terms if term and lowered.find(term) >= 0]
+    start = max(0, min(hits) - width // 3) if hits else 0
+    excerpt = text[start:start + width]
+    for term in sorted(set(terms), key=len, reverse=True):
+        excerpt = re.sub(rf"(?i)\b({re.escape(term)}\w*)", r"<b>\1</b>", excerpt)
+    return ("…" if start else "") + excerpt.strip() + ("…" if start + width < len(text) else "")
+
+
+def read_text_fields(db, document_ids: list, field: str) -> dict:
+    """{document_id: text} for one blob-backed field of several documents in one query"""
+    if not document_ids:
+        return {}
+    found = {
+        row.document_id: decompress_text(row.codec, row.data)
+        for row in db.query(DocumentBlob.document_id, DocumentBlob.codec, DocumentBlob.data).filter(
+            DocumentBlob.document_id.in_(document_ids), DocumentBlob.field == field)
+    }
+    # Legacy rows still hold the text inline
+    return {document_id: found[document_id] if document_id in found else read_text_field(db, document_id, field) or ""
+            for document_id in document_ids}
+
+
+def search(db, q: Optional[str] = None, entities: Optional[list] = None, document_type: Optional[str] = None,
+           status: Optional[str] = None, min_amount: Optional[float] = None, limit: int = 20, offset: int = 0) -> dict:
+    """Ranked, paginated hits. Without `q`, matching documents are returned newest first.
+
+    Raises ValueError for an unknown document_type or status.
+    """
+    filters = []
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q) if q else None
+    if query is not None:
+        filters.append(documents.c.search_vector.op("@@")(query))
+    if entities:
+        # jsonb_path_ops GIN index serves @>
+        filters.append(type_coerce(documents.c.key_entities, JSONB).contains(
+            [e.strip().lower() for e in entities]))
+    if document_type:
+        filters.append(documents.c.document_type == DocumentType(document_type.lower()))
+    if status:
+        filters.append(documents.c.status == DocumentStatus(status.lower()))
+    if min_amount is not None:
+        filters.append(documents.c.max_amount >= min_amount)
+
+    rank = func.ts_rank_cd(documents.c.search_vector, query, 32) if query is not None else literal(None)
+    if query is not None:
+        order = [rank.desc(), documents.c.id.desc()]
+    else:
+        order = [documents.c.uploaded_at.desc(), documents.c.id.desc()]
+    rows = db.query(
+        Document.document_id, Document.filename, Document.document_type, Document.status,
+        Document.risk_score, Document.uploaded_at, Document.key_entities, rank.label("rank"),
+    ).filter(*filters).order_by(*order).offset(offset).limit(limit + 1).all()
+    has_more = len(rows) > limit
+
+    terms = [t.lower() for t in _WORD.findall(q or "") if t.lower() not in ("or", "and", "not")]
+    terms += [e.strip().lower() for e in entities or []]
+    rows = rows[:limit]
+    # Snippets come from the summary when it mentions a term, else from the text
+    summaries = read_text_fields(db, [row.document_id for row in rows], "ai_summary")
+    need_text = [row.document_id for row in rows
+                 if terms and not any(t in summaries[row.document_id].lower() for t in terms)]
+    texts = read_text_fields(db, need_text, "extracted_text")
+
+    hits = []
+    for row in rows:
+        source = texts[row.document_id] if row.document_id in texts else summaries[row.document_id]
+        hits.append({
+            "document_id": row.document_id,
+            "filename": row.filename,
+            "document_type": row.document_type.value if row.document_type else None,
+            "status": row.status.value if row.status else None,
+            "risk_score": row.risk_score,
+            "uploaded_at": row.uploaded_at.isoformat() if row.uploaded_at else None,
+            "key_entities": row.key_entities or [],
+            "rank": round(row.rank, 4) if row.rank is not None else None,
+            "snippet": snippet(source, terms),
+        })
+    return {"hits": hits, "has_more": has_more}
@@ -0,0 +1,271 @@
+"""Near-duplicate detection over extracted_text with MinHash + LSH.
+
+Every classified document gets a MinHash signature of its word shingles
+(`document_signatures`) and one bucket per LSH band (`document_lsh_bands`).
+Documents sharing a bucket in any band are candidates; their signatures are
+compared to estimate Jaccard similarity.
+
+When ClassifyDocument finds a finished document of the same type that is at
+least SIMILARITY_REUSE_THRESHOLD similar, its LLM classification is reused
+with the entities patched from the new text (no Groq call). Between
+SIMILARITY_SEED_THRESHOLD and the reuse threshold, the neighbour's
+classification is put in the prompt as a reference instead.
+
+Index existing documents with:
+    python scripts/backfill_signatures.py
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import zlib
+from array import array
+from typing import Optional
+
+from sqlalchemy import and_, func, or_
+
+try:
+    import numpy as np
+except ImportError:  # numpy is in requirements.txt; the pure-Python path gives the same signatures
+    np = None
+
+from utils.database import run_in_session, read_text_field, Document, DocumentSignature, DocumentLSHBand, DocumentStatus
+from utils.fast_classifier import MAX_ENTITIES, RED_FLAGS, extract_entities
+from utils.instrumentation import inc
+
+SIMILARITY_ENABLED = os.getenv("SIMILARITY_ENABLED", "true").lower() == "true"
+SIMILARITY_REUSE_THRESHOLD = float(os.getenv("SIMILARITY_REUSE_THRESHOLD", "0.85"))
+SIMILARITY_SEED_THRESHOLD = float(os.getenv("SIMILARITY_SEED_THRESHOLD", "0.6"))
+SIMILARITY_SHINGLE_WORDS = int(os.getenv("SIMILARITY_SHINGLE_WORDS", "2"))
+# Signature length is SIMILARITY_BANDS * SIMILARITY_ROWS_PER_BAND; changing
+# either invalidates stored signatures (re-run the backfill script)
+SIMILARITY_BANDS = int(os.getenv("SIMILARITY_BANDS", "32"))
+SIMILARITY_ROWS_PER_BAND = int(os.getenv("SIMILARITY_ROWS_PER_BAND", "4"))
+SIMILARITY_MAX_CHARS = int(os.getenv("SIMILARITY_MAX_CHARS", "20000"))
+SIMILARITY_MAX_CANDIDATES = int(os.getenv("SIMILARITY_MAX_CANDIDATES", "20"))
+
+NUM_PERM = SIMILARITY_BANDS * SIMILARITY_ROWS_PER_BAND
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20250101)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+# Shingles hashed per numpy pass; bounds the (NUM_PERM x block) temporaries to a few MB
+_BLOCK = 2048
+
+if np is not None:
+    _P = np.uint64(_PRIME)
+    # a = a_hi * 2**32 + a_lo keeps every product below 2**64
+    _A_HI = np.array([a >> 32 for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+    _A_LO = np.array([a & 0xFFFFFFFF for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+    _B = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)[:, None]
+
+# Only these have a finished analysis worth reusing
+FINISHED_STATUSES = (DocumentStatus.APPROVED, DocumentStatus.PENDING_REVIEW, DocumentStatus.REJECTED)
+
+_WORD = re.compile(r"\w+")
+_DIGIT = re.compile(r"\d")
+
+_stats = {"lookups": 0, "reused": 0, "seeded": 0, "misses": 0}
+
+
+def shingles(text: str) -> set:
+    """crc32 hashes of overlapping word n-grams of the normalised text.
+
+    Digits are masked so templated documents that differ only in amounts,
+    dates and account numbers still shingle alike.
+    """
+    words = _WORD.findall(_DIGIT.sub("0", text[:SIMILARITY_MAX_CHARS].lower()))
+    n = SIMILARITY_SHINGLE_WORDS
+    if len(words) < n:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + n]).encode("utf-8")) for i in range(len(words) - n + 1)}
+
+
+def _fold(x):
+    """x mod 2**61 - 1, up to a few multiples of the prime (2**61 is 1 mod the prime)"""
+    return (x & _P) + (x >> np.uint64(61))
+
+
+def _residues(h):
+    """(a * h + b) mod 2**61 - 1 for every permutation (rows) and shingle (columns), in uint64"""
+    high = _A_HI * h  # < 2**61
+    # high * 2**32: the bits that pass 2**61 wrap around to the bottom
+    x = ((high & np.uint64((1 << 29) - 1)) << np.uint64(32)) + (high >> np.uint64(29))
+    x = _fold(x + _fold(_A_LO * h) + _B)
+    return np.where(x >= _P, x - _P, x)
+
+
+def _minhash_numpy(hashes) -> list:
+    h = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    mins = None
+    for start in range(0, len(h), _BLOCK):
+        block = _residues(h[None, start:start + _BLOCK]).min(axis=1)
+        mins = block if mins is None else np.minimum(mins, block)
+    return (mins & np.uint64(0xFFFFFFFF)).tolist()
+
+
+def _minhash_python(hashes) -> list:
+    return [min((a * h + b) % _PRIME for h in hashes) & 0xFFFFFFFF for a, b in _PERMUTATIONS]
+
+
+def minhash(text: str) -> Optional[list]:
+    """NUM_PERM 32-bit MinHash values, or None for empty text.
+
+    With numpy the permutations are applied to all shingles at once (and the
+    GIL is released while they are); both paths produce identical values.
+    """
+    hashes = shingles(text)
+    if not hashes:
+        return None
+    return _minhash_numpy(hashes) if np is not None else _minhash_python(hashes)
+
+
+def pack(signature: list) -> bytes:
+    return array("I", signature).tobytes()
+
+
+def unpack(data: bytes) -> list:
+    values = array("I")
+    values.frombytes(bytes(data))
+    return values.tolist()
+
+
+def band_buckets(signature: list) -> list:
+    """[(band, bucket)] with a 56-bit bucket hash per band (fits a signed BIGINT)"""
+    rows = SIMILARITY_ROWS_PER_BAND
+    buckets = []
+    for band in range(SIMILARITY_BANDS):
+        chunk = pack(signature[band * rows:(band + 1) * rows])
+        buckets.append((band, int.from_bytes(hashlib.blake2b(chunk, digest_size=7).digest(), "big")))
+    return buckets
+
+
+def estimate_similarity(a: list, b: list) -> float:
+    """Estimated Jaccard similarity: share of MinHash positions that agree"""
+    if len(a) != len(b):
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def index_signature(db, document_id: str, document_type: str, signature: list):
+    """Store (or replace) a document's signature and band buckets in the given session"""
+    db.query(DocumentLSHBand).filter(DocumentLSHBand.document_id == document_id).delete(synchronize_session=False)
+    db.merge(DocumentSignature(document_id=document_id, document_type=document_type, minhash=pack(signature)))
+    db.add_all(DocumentLSHBand(band=band, bucket=bucket, document_id=document_id)
+               for band, bucket in band_buckets(signature))
+
+
+def find_near_duplicate(db, document_id: str, document_type: str, signature: list,
+                        min_similarity: float = SIMILARITY_SEED_THRESHOLD) -> Optional[dict]:
+    """Most similar finished document of the same type with an LLM classification.
+
+    Returns {document_id, similarity, classification} or None.
+    """
+    buckets = band_buckets(signature)
+    candidates = (
+        db.query(DocumentLSHBand.document_id, func.count().label("shared"))
+        .filter(or_(*[and_(DocumentLSHBand.band == band, DocumentLSHBand.bucket == bucket)
+                      for band, bucket in buckets]))
+        .filter(DocumentLSHBand.document_id != document_id)
+        .group_by(DocumentLSHBand.document_id)
+        .order_by(func.count().desc())
+        .limit(SIMILARITY_MAX_CANDIDATES)
+        .all()
+    )
+    if not candidates:
+        return None
+
+    rows = db.query(DocumentSignature.document_id, DocumentSignature.minhash).filter(
+        DocumentSignature.document_id.in_([c.document_id for c in candidates]),
+        DocumentSignature.document_type == document_type,
+    ).all()
+    scored = sorted(
+        ((estimate_similarity(signature, unpack(row.minhash)), row.document_id) for row in rows),
+        reverse=True,
+    )
+
+    for similarity, candidate_id in scored:
+        if similarity < min_similarity:
+            break
+        # Status only; the blobs (extracted text included) stay unread
+        finished = db.query(Document.status).filter(
+            Document.document_id == candidate_id, Document.status.in_(FINISHED_STATUSES)
+        ).first()
+        if finished is None:
+            continue
+        stored = read_text_field(db, candidate_id, "classification")
+        if not stored:
+            continue
+        try:
+            classification = json.loads(stored)
+        except ValueError:
+            continue
+        # Only reuse LLM output, never heuristics or earlier reuses
+        if classification.get("source"):
+            continue
+        return {"document_id": candidate_id, "similarity": round(similarity, 3), "classification": classification}
+    return None
+
+
+async def lookup(document_id: str, document_type: str, text: str) -> tuple:
+    """(signature, match) for a new document; index the signature with
+    index_signature() once the document's own classification is saved"""
+    if not SIMILARITY_ENABLED:
+        return None, None
+
+    def _lookup(db):
+        signature = minhash(text)
+        if signature is None:
+            return None, None
+        return signature, find_near_duplicate(db, document_id, document_type, signature)
+
+    # Hashing runs on the DB executor too, off the event loop
+    return await run_in_session(_lookup)
+
+
+def decide(match: Optional[dict]) -> Optional[str]:
+    """"reuse", "seed" or None for a lookup result, counting the outcome"""
+    _stats["lookups"] += 1
+    if match and match["similarity"] >= SIMILARITY_REUSE_THRESHOLD:
+        outcome = "reused"
+    elif match:
+        outcome = "seeded"
+    else:
+        outcome = "misses"
+    _stats[outcome] += 1
+    inc("docflow_near_duplicate_total", outcome=outcome)
+    return {"reused": "reuse", "seeded": "seed"}.get(outcome)
+
+
+def patch_classification(match: dict, text: str) -> dict:
+    """The neighbour's classification with entities and review flag updated for `text`.
+
+    Entities from the neighbour that no longer appear are dropped and entities
+    found in the new text are added; red flags in the new text force review.
+    """
+    reference = match["classification"]
+    lowered = text.lower()
+    kept = [e for e in reference.get("key_entities") or [] if str(e).lower() in lowered]
+    seen = {str(e).lower() for e in kept}
+    added = [e for e in extract_entities(text) if e.lower() not in seen]
+    red_flags = [label for label, pattern in RED_FLAGS.items() if pattern.search(text)]
+
+    return {
+        **reference,
+        "key_entities": (kept + added)[:MAX_ENTITIES],
+        "requires_review": bool(reference.get("requires_review")) or bool(red_flags),
+        "source": "near_duplicate",
+        "reused_from": match["document_id"],
+        "similarity": match["similarity"],
+    }
+
+
+def stats() -> dict:
+    lookups = _stats["lookups"]
+    return {
+        **_stats,
+        "reuse_threshold": SIMILARITY_REUSE_THRESHOLD,
+        "seed_threshold": SIMILARITY_SEED_THRESHOLD,
+        "reuse_rate": round(_stats["reused"] / lookups, 3) if lookups else 0.0,
+    }
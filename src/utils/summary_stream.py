@@ -0,0 +1,74 @@
+"""Partial summaries pushed to the review UI while Groq is still generating.
+
+SummarizeDocument streams its completion and hands each partial text to a
+SummaryPublisher, which writes it to the `documentSummary` Motia stream
+(group = document_id, item = "summary"). Clients subscribed to that group
+see the summary grow token by token instead of a "processing" badge.
+
+Stream writes are throttled to one every SUMMARY_STREAM_INTERVAL_SECONDS and
+never block generation; the database is written once, with the final text,
+by the step itself. The stream is defined in src/steps/document_summary_stream.py.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+SUMMARY_STREAMING_ENABLED = os.getenv("SUMMARY_STREAMING_ENABLED", "true").lower() == "true"
+SUMMARY_STREAM_INTERVAL_SECONDS = float(os.getenv("SUMMARY_STREAM_INTERVAL_SECONDS", "0.1"))
+
+STREAM_NAME = "documentSummary"
+ITEM_ID = "summary"
+
+
+class SummaryPublisher:
+    """Throttled writer of one document's partial summary to the Motia stream"""
+
+    def __init__(self, context, document_id: str, interval: float = SUMMARY_STREAM_INTERVAL_SECONDS):
+        self.stream = getattr(getattr(context, "streams", None), STREAM_NAME, None)
+        self.logger = context.logger
+        self.document_id = document_id
+        self.interval = interval
+        self.latest = ""
+        self.sent_at = 0.0
+        self.pushes = 0
+        self._inflight: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.stream is not None
+
+    def on_delta(self, text: str):
+        """Called for every streamed token; pushes at most once per interval"""
+        self.latest = text
+        if not self.enabled or (self._inflight is not None and not self._inflight.done()):
+            return
+        now = time.monotonic()
+        # The first token goes out immediately, later ones are batched
+        if self.pushes and now - self.sent_at < self.interval:
+            return
+        self.sent_at = now
+        self._inflight = asyncio.ensure_future(self._push(text, "streaming"))
+
+    async def _push(self, text: str, status: str):
+        try:
+            await self.stream.set(self.document_id, ITEM_ID, {
+                "document_id": self.document_id,
+                "status": status,
+                "text": text,
+                "updated_at": datetime.utcnow().isoformat(),
+            })
+            self.pushes += 1
+        except Exception as e:
+            # The stream is a convenience for the UI; the summary itself is persisted regardless
+            self.logger.warn(f"⚠️  Summary stream update failed for {self.document_id}: {str(e)}")
+
+    async def finish(self, text: Optional[str] = None, status: str = "complete"):
+        """Wait for any in-flight update, then publish the final text and status"""
+        if not self.enabled:
+            return
+        if self._inflight is not None:
+            await self._inflight
+        await self._push(self.latest if text is None else text, status)
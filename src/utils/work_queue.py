@@ -0,0 +1,328 @@
+"""Queue-backed execution of the document-processing pipeline.
+
+With WORK_QUEUE_ENABLED=true, a document.uploaded event only saves the
+document: SaveDocument enqueues a job and ClassifyDocument/AnalyzeDocument
+leave it alone. Queue workers (scripts/queue_worker.py, any number of
+processes on any number of hosts) pull jobs and run the AI steps, so Groq
+calls and DB sessions are bounded by the worker pool rather than by how
+many uploads arrive at once.
+
+Jobs go to one lane per DocumentType. Workers always take from the first
+non-empty lane in WORK_QUEUE_LANES order, so earlier lanes have priority.
+A dequeued job is leased for WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS; the worker
+acks it when the pipeline finishes or releases it on error. A lease that
+expires (a worker died) puts the job back in its lane. A job that has been
+handed out WORK_QUEUE_MAX_ATTEMPTS times goes to the dead-letter list instead:
+the entry carries its payload, and the job id is free to be queued again.
+`scripts/queue_worker.py --replay-dead` puts dead jobs back in their lanes;
+`--purge-dead` drops them.
+
+Backends:
+- "redis": lists per lane, a sorted set of leases and Lua scripts for the
+  atomic steps; uses REDIS_HOST/REDIS_PORT/REDIS_PASSWORD/REDIS_TLS like
+  motia.config.ts;
+- "memory": the same semantics inside one process, for tests and local runs.
+
+Upload endpoints reject new documents with 503 once WORK_QUEUE_MAX_DEPTH jobs
+are waiting (see src/utils/work_queue.ts).
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from utils.instrumentation import inc
+
+WORK_QUEUE_ENABLED = os.getenv("WORK_QUEUE_ENABLED", "false").lower() == "true"
+WORK_QUEUE_BACKEND = os.getenv("WORK_QUEUE_BACKEND", "redis").lower()
+WORK_QUEUE_PREFIX = os.getenv("WORK_QUEUE_PREFIX", "docflow:queue")
+# Highest priority first; unknown document types go to the last lane
+WORK_QUEUE_LANES = [lane.strip() for lane in os.getenv(
+    "WORK_QUEUE_LANES", "loan_application,insurance_claim,legal_contract,grant_application"
+).split(",") if lane.strip()]
+WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS = float(os.getenv("WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS", "300"))
+WORK_QUEUE_MAX_ATTEMPTS = int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "3"))
+WORK_QUEUE_MAX_DEPTH = int(os.getenv("WORK_QUEUE_MAX_DEPTH", "500"))
+
+
+def deferred_to_queue(input_data: dict) -> bool:
+    """True when an event-driven AI step should leave this document to the queue workers"""
+    return WORK_QUEUE_ENABLED and not input_data.get("queue_job")
+
+
+def lane_for(document_type: Optional[str]) -> str:
+    return document_type if document_type in WORK_QUEUE_LANES else WORK_QUEUE_LANES[-1]
+
+
+class MemoryWorkQueue:
+    """In-process stand-in with the same lanes, leases and dead-lettering as Redis"""
+
+    def __init__(self, lanes=None, visibility_timeout=None, max_attempts=None):
+        self.lanes = {lane: deque() for lane in (lanes or WORK_QUEUE_LANES)}
+        self.visibility_timeout = visibility_timeout or WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS
+        self.max_attempts = max_attempts or WORK_QUEUE_MAX_ATTEMPTS
+        self.jobs = {}
+        self.attempts = {}
+        self.leases = {}
+        self.dead = []
+        self._lock = threading.Lock()
+
+    async def enqueue(self, job_id: str, lane: str, payload: dict) -> bool:
+        with self._lock:
+            if job_id in self.jobs:
+                return False
+            self.jobs[job_id] = {"lane": lane, "payload": payload}
+            self.lanes[lane].appendleft(job_id)
+            return True
+
+    async def dequeue(self) -> Optional[dict]:
+        with self._lock:
+            for lane in self.lanes.values():
+                if lane:
+                    job_id = lane.pop()
+                    self.leases[job_id] = time.time() + self.visibility_timeout
+                    self.attempts[job_id] = self.attempts.get(job_id, 0) + 1
+                    return {"id": job_id, **self.jobs[job_id], "attempts": self.attempts[job_id]}
+        return None
+
+    async def extend(self, job: dict):
+        with self._lock:
+            if job["id"] in self.leases:
+                self.leases[job["id"]] = time.time() + self.visibility_timeout
+
+    async def ack(self, job: dict):
+        with self._lock:
+            if self.leases.pop(job["id"], None) is not None:
+                self.jobs.pop(job["id"], None)
+                self.attempts.pop(job["id"], None)
+
+    async def release(self, job: dict) -> Optional[str]:
+        """Return a leased job to the head of its lane ("requeued") or dead-letter it ("dead")"""
+        with self._lock:
+            return self._release(job["id"])
+
+    def _release(self, job_id: str) -> Optional[str]:
+        if self.leases.pop(job_id, None) is None:
+            return None
+        if self.attempts.get(job_id, 0) >= self.max_attempts:
+            self.dead.append({"id": job_id, "attempts": self.attempts.pop(job_id),
+                              "dead_at": time.time(), "job": self.jobs.pop(job_id, None)})
+            return "dead"
+        self.lanes[self.jobs[job_id]["lane"]].append(job_id)
+        return "requeued"
+
+    async def requeue_expired(self) -> int:
+        with self._lock:
+            now = time.time()
+            expired = [job_id for job_id, deadline in self.leases.items() if deadline <= now]
+            return sum(1 for job_id in expired if self._release(job_id))
+
+    async def pop_dead(self) -> Optional[dict]:
+        with self._lock:
+            return self.dead.pop(0) if self.dead else None
+
+    async def purge_dead(self) -> int:
+        with self._lock:
+            purged = len(self.dead)
+            self.dead.clear()
+            return purged
+
+    async def depth(self) -> int:
+        return sum(len(lane) for lane in self.lanes.values())
+
+    async def stats(self) -> dict:
+        return {
+            "lanes": {name: len(lane) for name, lane in self.lanes.items()},
+            "leased": len(self.leases),
+            "dead": len(self.dead),
+        }
+
+
+# KEYS: leases, attempts, lane 1..n   ARGV: deadline
+_DEQUEUE = """
+for i = 3, #KEYS do
+  local job_id = redis.call('RPOP', KEYS[i])
+  if job_id then
+    redis.call('ZADD', KEYS[1], ARGV[1], job_id)
+    return {job_id, redis.call('HINCRBY', KEYS[2], job_id, 1)}
+  end
+end
+return false
+"""
+
+# KEYS: leases, attempts, lane, dead, jobs   ARGV: job_id, max_attempts, now
+# Only the caller that removes the lease moves the job, so concurrent reapers
+# (or a reaper racing a slow worker's release) cannot requeue it twice.
+# A dead job's payload moves into its dead-letter entry and leaves both hashes
+_RELEASE = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+  return false
+end
+local attempts = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+if attempts >= tonumber(ARGV[2]) then
+  local stored = redis.call('HGET', KEYS[5], ARGV[1])
+  redis.call('RPUSH', KEYS[4], '{"id":' .. cjson.encode(ARGV[1]) .. ',"attempts":' .. attempts
+    .. ',"dead_at":' .. ARGV[3] .. ',"job":' .. (stored or 'null') .. '}')
+  redis.call('HDEL', KEYS[2], ARGV[1])
+  redis.call('HDEL', KEYS[5], ARGV[1])
+  return 'dead'
+end
+redis.call('RPUSH', KEYS[3], ARGV[1])
+return 'requeued'
+"""
+
+
+class RedisWorkQueue:
+    """Lanes are lists (LPUSH to enqueue, RPOP to dequeue); leases are a sorted
+    set scored by expiry; payloads and attempt counts are hashes keyed by job id"""
+
+    def __init__(self, client, prefix=WORK_QUEUE_PREFIX, lanes=None, visibility_timeout=None, max_attempts=None):
+        self.client = client
+        self.lane_names = lanes or WORK_QUEUE_LANES
+        self.lane_keys = {lane: f"{prefix}:lane:{lane}" for lane in self.lane_names}
+        self.jobs_key = f"{prefix}:jobs"
+        self.attempts_key = f"{prefix}:attempts"
+        self.leases_key = f"{prefix}:leases"
+        self.dead_key = f"{prefix}:dead"
+        self.visibility_timeout = visibility_timeout or WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS
+        self.max_attempts = max_attempts or WORK_QUEUE_MAX_ATTEMPTS
+        self._dequeue = client.register_script(_DEQUEUE)
+        self._release_script = client.register_script(_RELEASE)
+
+    async def enqueue(self, job_id: str, lane: str, payload: dict) -> bool:
+        # HSETNX makes enqueueing idempotent per document
+        if not await self.client.hsetnx(self.jobs_key, job_id, json.dumps({"lane": lane, "payload": payload})):
+            return False
+        await self.client.lpush(self.lane_keys[lane], job_id)
+        return True
+
+    async def dequeue(self) -> Optional[dict]:
+        result = await self._dequeue(
+            keys=[self.leases_key, self.attempts_key, *self.lane_keys.values()],
+            args=[time.time() + self.visibility_timeout],
+        )
+        if not result:
+            return None
+        job_id, attempts = result[0].decode(), int(result[1])
+        stored = await self.client.hget(self.jobs_key, job_id)
+        if stored is None:
+            # Acked by a worker whose lease had already expired; nothing left to do
+            await self.client.zrem(self.leases_key, job_id)
+            return None
+        return {"id": job_id, **json.loads(stored), "attempts": attempts}
+
+    async def extend(self, job: dict):
+        await self.client.zadd(self.leases_key, {job["id"]: time.time() + self.visibility_timeout}, xx=True)
+
+    async def ack(self, job: dict):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.zrem(self.leases_key, job["id"])
+            pipe.hdel(self.jobs_key, job["id"])
+            pipe.hdel(self.attempts_key, job["id"])
+            await pipe.execute()
+
+    async def release(self, job: dict) -> Optional[str]:
+        """Return a leased job to the head of its lane ("requeued") or dead-letter it ("dead")"""
+        outcome = await self._release_script(
+            keys=[self.leases_key, self.attempts_key, self.lane_keys[job["lane"]], self.dead_key, self.jobs_key],
+            args=[job["id"], self.max_attempts, time.time()],
+        )
+        return outcome.decode() if outcome else None
+
+    async def requeue_expired(self) -> int:
+        expired = await self.client.zrangebyscore(self.leases_key, "-inf", time.time(), start=0, num=100)
+        released = 0
+        for raw_id in expired:
+            job_id = raw_id.decode()
+            stored = await self.client.hget(self.jobs_key, job_id)
+            lane = json.loads(stored)["lane"] if stored else self.lane_names[-1]
+            if await self.release({"id": job_id, "lane": lane}):
+                released += 1
+        return released
+
+    async def pop_dead(self) -> Optional[dict]:
+        stored = await self.client.lpop(self.dead_key)
+        return json.loads(stored) if stored else None
+
+    async def purge_dead(self) -> int:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.llen(self.dead_key)
+            pipe.delete(self.dead_key)
+            purged, _ = await pipe.execute()
+        return purged
+
+    async def depth(self) -> int:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in self.lane_keys.values():
+                pipe.llen(key)
+            return sum(await pipe.execute())
+
+    async def stats(self) -> dict:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in self.lane_keys.values():
+                pipe.llen(key)
+            pipe.zcard(self.leases_key)
+            pipe.llen(self.dead_key)
+            *lanes, leased, dead = await pipe.execute()
+        return {"lanes": dict(zip(self.lane_names, lanes)), "leased": leased, "dead": dead}
+
+
+def redis_client():
+    # Imported lazily: redis is only needed when the queue is enabled
+    import redis.asyncio as aioredis
+
+    return aioredis.Redis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", "6379")),
+        password=os.getenv("REDIS_PASSWORD") or None,
+        ssl=os.getenv("REDIS_TLS", "false").lower() == "true",
+    )
+
+
+# One queue per event loop (the redis.asyncio connection pool is bound to it)
+_queues = {}
+
+
+def get_queue():
+    """The configured queue for the running event loop"""
+    if WORK_QUEUE_BACKEND == "memory":
+        # A single queue per process: workers and producers must share it
+        return _queues.setdefault("memory", MemoryWorkQueue())
+    loop = asyncio.get_running_loop()
+    queue = _queues.get(loop)
+    if queue is None:
+        queue = _queues[loop] = RedisWorkQueue(redis_client())
+    return queue
+
+
+async def replay_dead(limit: Optional[int] = None) -> dict:
+    """Put dead-lettered jobs back in their lanes with a fresh attempt count, oldest first"""
+    queue = get_queue()
+    counts = {"replayed": 0, "duplicate": 0}
+    while limit is None or sum(counts.values()) < limit:
+        entry = await queue.pop_dead()
+        if entry is None:
+            break
+        job = entry.get("job")
+        if not job:
+            continue
+        # False when the same job id has been queued again since it died
+        queued = await queue.enqueue(entry["id"], job["lane"], job["payload"])
+        counts["replayed" if queued else "duplicate"] += 1
+        inc("docflow_queue_jobs_total", lane=job["lane"], outcome="replayed" if queued else "duplicate")
+    return counts
+
+
+async def enqueue_document(input_data: dict, job_id: Optional[str] = None) -> bool:
+    """Queue the AI pipeline for an uploaded document (the document.uploaded payload).
+
+    The job id defaults to the document_id; returns False if it is already queued.
+    """
+    lane = lane_for(input_data.get("document_type"))
+    queued = await get_queue().enqueue(job_id or input_data["document_id"], lane, input_data)
+    inc("docflow_queue_jobs_total", lane=lane, outcome="enqueued" if queued else "duplicate")
+    return queued
@@ -0,0 +1,68 @@
+import Redis from 'ioredis';
+
+// Admission control for the upload endpoints when the pipeline runs on queue
+// workers (WORK_QUEUE_ENABLED=true, see src/utils/work_queue.py). Once more
+// than WORK_QUEUE_MAX_DEPTH jobs are waiting, uploads get a 503 with
+// Retry-After instead of piling more work onto the queue.
+// The memory backend lives inside one Python process and cannot be read from
+// here, so backpressure only applies to the Redis backend.
+
+const ENABLED = process.env.WORK_QUEUE_ENABLED === 'true'
+  && (process.env.WORK_QUEUE_BACKEND || 'redis') === 'redis';
+const PREFIX = process.env.WORK_QUEUE_PREFIX || 'docflow:queue';
+const LANES = (process.env.WORK_QUEUE_LANES || 'loan_application,insurance_claim,legal_contract,grant_application')
+  .split(',').map((lane) => lane.trim()).filter(Boolean);
+const MAX_DEPTH = parseInt(process.env.WORK_QUEUE_MAX_DEPTH || '500');
+const RETRY_AFTER_SECONDS = parseInt(process.env.WORK_QUEUE_RETRY_AFTER_SECONDS || '5');
+
+let client: Redis | null = null;
+
+const getClient = (): Redis => {
+  if (!client) {
+    client = new Redis({
+      host: process.env.REDIS_HOST || 'localhost',
+      port: parseInt(process.env.REDIS_PORT || '6379'),
+      password: process.env.REDIS_PASSWORD,
+      tls: process.env.REDIS_TLS === 'true' ? {} : undefined,
+      maxRetriesPerRequest: 1,
+    });
+  }
+  return client;
+};
+
+export const queueDepth = async (): Promise<number> => {
+  const pipeline = getClient().pipeline();
+  LANES.forEach((lane) => pipeline.llen(`${PREFIX}:lane:${lane}`));
+  const results = (await pipeline.exec()) || [];
+  return results.reduce((total, [error, length]) => total + (error ? 0 : Number(length)), 0);
+};
+
+/**
+ * A 503 response when the queue is over its depth limit, otherwise null.
+ * Fails open: if Redis cannot be reached the upload is accepted.
+ */
+export const backpressureResponse = async (logger: any) => {
+  if (!ENABLED) {
+    return null;
+  }
+  let depth: number;
+  try {
+    depth = await queueDepth();
+  } catch (error: any) {
+    logger.warn(`⚠️  Queue depth check failed, accepting upload: ${error.message}`);
+    return null;
+  }
+  if (depth < MAX_DEPTH) {
+    return null;
+  }
+  logger.warn(`🚦 Upload rejected: ${depth} documents queued (limit ${MAX_DEPTH})`);
+  return {
+    status: 503,
+    headers: { 'Retry-After': String(RETRY_AFTER_SECONDS) },
+    body: {
+      error: `Processing queue is full (${depth} documents waiting). Retry in ${RETRY_AFTER_SECONDS}s.`,
+      queue_depth: depth,
+      retry_after: RETRY_AFTER_SECONDS
+    }
+  };
+};